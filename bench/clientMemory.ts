@@ -0,0 +1,244 @@
+/**
+ * Memory of the Discord client over a simulated multi-day gateway session,
+ * comparing the 'default' and 'lean' profiles from src/clientOptions.ts.
+ *
+ *   npm run bench:client-memory
+ *   npm run bench:client-memory -- --days=7 --guilds=50 --messages-per-hour=6000
+ *
+ * Each profile runs in a fresh child process. Gateway dispatches are fed straight
+ * into the client's packet handlers on a simulated clock: one GUILD_CREATE per
+ * guild, then every hour --messages-per-hour MESSAGE_CREATEs from a pool of
+ * --users authors and --interactions-per-hour slash commands. Like the gateway,
+ * the simulation only dispatches events the profile has the intent for. The
+ * configured sweepers run on simulated time, since their own timers would
+ * not fire. RSS, heap and cache sizes are sampled after a GC at the end of
+ * every simulated day; the last day is the steady state.
+ */
+import './setup';
+import { fork } from 'child_process';
+import { Client, ClientUser, GatewayIntentBits, Status } from 'discord.js';
+import { ClientProfile, clientOptions } from '../src/clientOptions';
+
+interface Sample {
+    profile: ClientProfile;
+    day: number;
+    rssMb: number;
+    heapMb: number;
+    messages: number;
+    members: number;
+    users: number;
+}
+
+interface SessionOptions {
+    days: number;
+    guilds: number;
+    channels: number;
+    users: number;
+    messagesPerHour: number;
+    interactionsPerHour: number;
+}
+
+const HOUR_MS = 60 * 60 * 1000;
+const DISCORD_EPOCH = 1420070400000n;
+const BOT_ID = '100000000000000001';
+
+function numberArg(args: string[], name: string, fallback: number): number {
+    const arg = args.find(a => a.startsWith(`--${name}=`));
+    return arg ? Number(arg.split('=')[1]) : fallback;
+}
+
+// Deterministic, so both profiles see the same session.
+function random(seed: number): () => number {
+    return () => {
+        seed = (seed + 0x6d2b79f5) | 0;
+        let t = Math.imul(seed ^ (seed >>> 15), 1 | seed);
+        t = (t + Math.imul(t ^ (t >>> 7), 61 | t)) ^ t;
+        return ((t ^ (t >>> 14)) >>> 0) / 4294967296;
+    };
+}
+
+function mb(bytes: number): number {
+    return Math.round((bytes / (1024 * 1024)) * 10) / 10;
+}
+
+function rawUser(id: string) {
+    return { id, username: `user${id.slice(-6)}`, global_name: null, discriminator: '0', avatar: null };
+}
+
+function rawMember(joinedAt: string, user?: object) {
+    return { ...(user && { user }), roles: [], joined_at: joinedAt, deaf: false, mute: false, flags: 0, permissions: '0' };
+}
+
+async function runSession(profile: ClientProfile, options: SessionOptions): Promise<Sample[]> {
+    // Simulated clock: sweepers and message lifetimes read Date.now().
+    let now = Date.now();
+    Date.now = () => now;
+    let sequence = 0;
+    const snowflake = () => (((BigInt(now) - DISCORD_EPOCH) << 22n) | BigInt(sequence++ & 0x3fffff)).toString();
+
+    const client = new Client(clientOptions(profile)) as any;
+    client.user = new ClientUser(client, { ...rawUser(BOT_ID), bot: true });
+    client.users.cache.set(BOT_ID, client.user);
+    client.ws.status = Status.Ready;
+    const shard = { id: 0, checkReady() {} };
+    const dispatch = (t: string, d: object) => client.ws.handlePacket({ op: 0, t, d }, shard);
+    const receivesMessages = client.options.intents.has(GatewayIntentBits.GuildMessages);
+
+    const next = random(1);
+    const userIds = Array.from({ length: options.users }, (_, i) => (BigInt(BOT_ID) + 1n + BigInt(i)).toString());
+    const guilds: { id: string; channelIds: string[] }[] = [];
+    for (let g = 0; g < options.guilds; g++) {
+        const id = snowflake();
+        const channelIds = Array.from({ length: options.channels }, () => snowflake());
+        const joinedAt = new Date(now).toISOString();
+        dispatch('GUILD_CREATE', {
+            id,
+            name: `Guild ${g}`,
+            icon: null,
+            owner_id: userIds[0],
+            features: [],
+            large: false,
+            unavailable: false,
+            member_count: 2,
+            roles: [{ id, name: '@everyone', permissions: '0', position: 0, color: 0, hoist: false, managed: false, mentionable: false, flags: 0 }],
+            emojis: [],
+            stickers: [],
+            channels: channelIds.map((channelId, position) => ({
+                id: channelId, type: 0, guild_id: id, name: `channel-${position}`, position,
+                permission_overwrites: [], topic: null, nsfw: false, last_message_id: null, rate_limit_per_user: 0, parent_id: null,
+            })),
+            members: [rawMember(joinedAt, rawUser(BOT_ID)), rawMember(joinedAt, rawUser(userIds[0]))],
+            presences: [],
+            voice_states: [],
+            threads: [],
+            stage_instances: [],
+            guild_scheduled_events: [],
+        });
+        guilds.push({ id, channelIds });
+    }
+
+    const runSweepers = () => {
+        const sweepers = client.options.sweepers ?? {};
+        const messages = sweepers.messages?.filter?.();
+        if (messages) {
+            client.sweepers.sweepMessages(messages);
+        }
+        const users = sweepers.users?.filter?.();
+        if (users) {
+            client.sweepers.sweepUsers(users);
+        }
+    };
+    const sweepEveryHours = Math.max(1, Math.round((client.options.sweepers?.messages?.interval ?? 3600) / 3600));
+
+    const gc = (global as any).gc as (() => void) | undefined;
+    const samples: Sample[] = [];
+    const content = 'x'.repeat(120);
+    const eventsPerHour = options.messagesPerHour + options.interactionsPerHour;
+    for (let hour = 1; hour <= options.days * 24; hour++) {
+        for (let e = 0; e < eventsPerHour; e++) {
+            now += Math.floor(HOUR_MS / eventsPerHour);
+            const guild = guilds[Math.floor(next() * guilds.length)];
+            const channelId = guild.channelIds[Math.floor(next() * guild.channelIds.length)];
+            const author = rawUser(userIds[Math.floor(next() * userIds.length)]);
+            const timestamp = new Date(now).toISOString();
+            if (e < options.interactionsPerHour) {
+                // Slash commands arrive whatever the intents.
+                dispatch('INTERACTION_CREATE', {
+                    id: snowflake(), application_id: BOT_ID, type: 2, token: 'token', version: 1,
+                    guild_id: guild.id, channel: { id: channelId, type: 0 }, channel_id: channelId,
+                    member: rawMember(timestamp, author), app_permissions: '0', locale: 'en-US', guild_locale: 'en-US',
+                    entitlements: [], authorizing_integration_owners: {}, context: 0,
+                    data: { id: snowflake(), name: 'status', type: 1 },
+                });
+            } else if (receivesMessages) {
+                dispatch('MESSAGE_CREATE', {
+                    id: snowflake(), type: 0, channel_id: channelId, guild_id: guild.id, author, member: rawMember(timestamp),
+                    content, timestamp, edited_timestamp: null, tts: false, mention_everyone: false, mentions: [],
+                    mention_roles: [], attachments: [], embeds: [], components: [], pinned: false, flags: 0,
+                });
+            }
+        }
+        if (hour % sweepEveryHours === 0) {
+            runSweepers();
+        }
+        if (hour % 24 === 0) {
+            gc?.();
+            gc?.();
+            const memory = process.memoryUsage();
+            let messages = 0;
+            let members = 0;
+            for (const guild of client.guilds.cache.values()) {
+                members += guild.members.cache.size;
+                for (const channel of guild.channels.cache.values()) {
+                    messages += channel.messages?.cache.size ?? 0;
+                }
+            }
+            samples.push({
+                profile,
+                day: hour / 24,
+                rssMb: mb(memory.rss),
+                heapMb: mb(memory.heapUsed),
+                messages,
+                members,
+                users: client.users.cache.size,
+            });
+        }
+    }
+    return samples;
+}
+
+function runChild(profile: ClientProfile, args: string[]): Promise<Sample[]> {
+    return new Promise((resolve, reject) => {
+        const child = fork(__filename, [`--child=${profile}`, ...args], { execArgv: process.execArgv });
+        let samples: Sample[] | null = null;
+        child.on('message', message => {
+            samples = message as Sample[];
+        });
+        child.on('error', reject);
+        child.on('exit', code => {
+            if (samples) {
+                resolve(samples);
+            } else {
+                reject(new Error(`${profile} session exited with code ${code}`));
+            }
+        });
+    });
+}
+
+async function main(): Promise<void> {
+    const args = process.argv.slice(2);
+    const options: SessionOptions = {
+        days: numberArg(args, 'days', 3),
+        guilds: numberArg(args, 'guilds', 25),
+        channels: numberArg(args, 'channels', 10),
+        users: numberArg(args, 'users', 20000),
+        messagesPerHour: numberArg(args, 'messages-per-hour', 3000),
+        interactionsPerHour: numberArg(args, 'interactions-per-hour', 30),
+    };
+
+    const child = args.find(arg => arg.startsWith('--child='));
+    if (child) {
+        const samples = await runSession(child.split('=')[1] as ClientProfile, options);
+        process.send!(samples, () => process.exit(0));
+        return;
+    }
+
+    if (!(global as any).gc) {
+        console.warn('Run with node --expose-gc for steadier numbers.');
+    }
+    const passthrough = args.filter(arg => !arg.startsWith('--child='));
+    const defaults = await runChild('default', passthrough);
+    const lean = await runChild('lean', passthrough);
+    console.table([...defaults, ...lean]);
+
+    const before = defaults[defaults.length - 1];
+    const after = lean[lean.length - 1];
+    const reduction = (a: number, b: number) => `${(((a - b) / a) * 100).toFixed(1)}%`;
+    console.log(`Steady state after ${options.days} days: RSS ${before.rssMb} MB -> ${after.rssMb} MB (-${reduction(before.rssMb, after.rssMb)}), `
+        + `heap ${before.heapMb} MB -> ${after.heapMb} MB (-${reduction(before.heapMb, after.heapMb)})`);
+}
+
+main().catch(error => {
+    console.error('Benchmark failed:', error);
+    process.exit(1);
+});
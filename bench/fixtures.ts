@@ -0,0 +1,47 @@
+import { Concert } from '../src/scraper';
+
+const BASE_DATE = Date.UTC(2020, 0, 1);
+const DAY_MS = 24 * 60 * 60 * 1000;
+
+// Deterministic event number -> concert, so payloads and tables of the same size overlap predictably.
+export function syntheticConcert(i: number): Concert {
+    return {
+        id: `00000000-0000-4000-8000-${i.toString(16).padStart(12, '0')}`,
+        venue: `Venue ${i}`,
+        location: `${i % 500} Main St, City ${i % 97}, ST, USA`,
+        date: new Date(BASE_DATE + Math.floor(i / 3) * DAY_MS).toISOString().split('T')[0],
+        details: i % 10 === 0 ? 'Goose & Friends' : undefined,
+    };
+}
+
+/**
+ * A Seated tour document (`?include=tour-events`) holding events first..first+count-1.
+ */
+export function seatedPayload(count: number, first = 0): string {
+    const included = [];
+    for (let i = first; i < first + count; i++) {
+        const concert = syntheticConcert(i);
+        included.push({
+            id: concert.id,
+            type: 'tour-events',
+            attributes: {
+                'starts-at-date-local': concert.date,
+                'venue-name': concert.venue,
+                'formatted-address': concert.location,
+                details: concert.details ?? null,
+            },
+        });
+    }
+    return JSON.stringify({ data: { id: 'tour', type: 'tours' }, included });
+}
+
+/**
+ * Rows for an existing concerts table holding events 0..count-1.
+ */
+export function concertRows(count: number): Concert[] {
+    const rows = [];
+    for (let i = 0; i < count; i++) {
+        rows.push(syntheticConcert(i));
+    }
+    return rows;
+}
@@ -0,0 +1,127 @@
+/**
+ * Load test of the checkTours pipeline over HTTP against the stand-in servers,
+ * so fetch, supabase-js and @discordjs/rest queueing are all in the loop.
+ *
+ *   npm run bench:load
+ *   npm run bench:load -- --tours=4 --events=2000 --existing=4000 --channels=3
+ *
+ * Each of the --tours feeds holds --events tour-events, numbered consecutively
+ * across tours; the concerts table holds events 0..--existing. Stages:
+ *   scrape     Scraper.scrapeTourDates() against the Seated stand-in
+ *   diff       findExistingKeys() + findActiveBySource() + diffConcerts(), including the first index load
+ *   save       DatabaseService.saveConcerts() of the new concerts
+ *   post       batched announcements through MessageQueue to --channels channels, until drained
+ *   rescrape   a second scrape, answered with 304s
+ * Latency and error rates come from the STANDIN_* variables described in standins/index.ts.
+ */
+import './setup';
+import { promises as fs } from 'fs';
+import os from 'os';
+import path from 'path';
+import { Client } from 'discord.js';
+import { buildAnnouncementBatches } from '../src/announcements';
+import { ChannelResolver } from '../src/channelResolver';
+import { DatabaseService } from '../src/database';
+import { diffConcerts } from '../src/diff';
+import { MessageQueue } from '../src/messageQueue';
+import { Scraper } from '../src/scraper';
+import { concertRows } from './fixtures';
+import { startDiscordServer } from './standins/discordServer';
+import { faultsFromEnv } from './standins/faults';
+import { MemoryTables } from './standins/memorySupabase';
+import { startPostgrestServer } from './standins/postgrestServer';
+import { startSeatedServer } from './standins/seatedServer';
+
+function numberArg(args: string[], name: string, fallback: number): number {
+    const arg = args.find(a => a.startsWith(`--${name}=`));
+    return arg ? Number(arg.split('=')[1]) : fallback;
+}
+
+async function timed<T>(rows: object[], stage: string, items: number, run: () => Promise<T>): Promise<T> {
+    const start = process.hrtime.bigint();
+    const result = await run();
+    const ms = Number(process.hrtime.bigint() - start) / 1e6;
+    rows.push({ stage, items, ms: ms.toFixed(1), 'items/s': Math.round(items / (ms / 1000)) });
+    return result;
+}
+
+async function main(): Promise<void> {
+    const args = process.argv.slice(2);
+    const tours = numberArg(args, 'tours', 2);
+    const events = numberArg(args, 'events', 500);
+    const existing = numberArg(args, 'existing', 500);
+    const channelCount = numberArg(args, 'channels', 2);
+
+    const tourIds = Array.from({ length: tours }, (_, i) => `standin-tour-${i}`);
+    const tables = new MemoryTables();
+    tables.seed('concerts', concertRows(existing));
+
+    const seated = await startSeatedServer({
+        ...faultsFromEnv('STANDIN_SEATED'),
+        events,
+        offsetFor: tourId => tourIds.indexOf(tourId) * events,
+    });
+    const supabase = await startPostgrestServer(tables, { ...faultsFromEnv('STANDIN_SUPABASE'), maxRows: 1000 });
+    const discord = await startDiscordServer(faultsFromEnv('STANDIN_DISCORD'));
+    const queueFile = path.join(os.tmpdir(), `goose-load-${process.pid}.json`);
+
+    // The services read their endpoints when constructed.
+    process.env.SEATED_API_BASE = `${seated.url}/api`;
+    process.env.SUPABASE_URL = supabase.url;
+    process.env.SUPABASE_KEY = 'standin';
+    process.env.MESSAGE_QUEUE_FILE = queueFile;
+
+    const client = new Client({ intents: [], rest: { api: `${discord.url}/api` } });
+    client.rest.setToken('standin');
+    const channels = new ChannelResolver(client);
+    const queue = new MessageQueue(client, channels);
+    queue.start();
+
+    const scraper = new Scraper(tourIds);
+    const database = new DatabaseService();
+    const rows: object[] = [];
+
+    try {
+        const scraped = await timed(rows, 'scrape', tours * events, () => scraper.scrapeTourDates());
+        const newConcerts = await timed(rows, 'diff', scraped.concerts.length, async () => {
+            const existing = await database.findExistingKeys(scraped.concerts);
+            const active = await database.findActiveBySource(scraped.changedSources);
+            return diffConcerts(scraped.concerts, existing, active).added;
+        });
+        await timed(rows, 'save', newConcerts.length, () => database.saveConcerts(newConcerts));
+
+        const batches = buildAnnouncementBatches(newConcerts).map(batch => ({
+            payload: {
+                content: batch.content || undefined,
+                embeds: batch.embeds.map(embed => embed.toJSON()),
+            },
+        }));
+        const channelIds = Array.from({ length: channelCount }, (_, i) => String(900000000000000000n + BigInt(i)));
+        await timed(rows, 'post', batches.length * channelCount, async () => {
+            for (const channelId of channelIds) {
+                await channels.resolveSendable(channelId);
+                await queue.enqueue(channelId, batches);
+            }
+            while (queue.getStats().pending > 0) {
+                await new Promise(resolve => setTimeout(resolve, 20));
+            }
+        });
+        scraper.acknowledge();
+
+        await timed(rows, 'rescrape', tours, () => scraper.scrapeTourDates());
+    } finally {
+        await queue.stop();
+        await client.destroy();
+        await Promise.all([seated.close(), supabase.close(), discord.close()]);
+        await fs.rm(queueFile, { force: true });
+    }
+
+    console.table(rows);
+    console.log('Queue:', queue.getStats());
+    console.log('Discord stand-in:', discord.stats());
+}
+
+main().catch(error => {
+    console.error('Load test failed:', error);
+    process.exit(1);
+});
@@ -0,0 +1,225 @@
+/**
+ * End-to-end benchmark of the checkTours pipeline against local stand-ins.
+ *
+ *   npm run bench                          # 10, 1k and 100k tour-events, compared with the baseline
+ *   npm run bench -- --sizes=10,1000       # a subset of sizes
+ *   npm run bench -- --save-baseline       # record the results as the new baseline
+ *
+ * bench/baseline.json is committed and was recorded with the default sizes, together
+ * with the machine it ran on (Node version, platform, CPU model and count). Timings
+ * only carry over on the same machine, so a run elsewhere prints its results without
+ * comparing; record a local baseline with --save-baseline to get deltas. When the
+ * file is missing, the run records a new one instead of comparing.
+ *
+ * For each size N the tour feed holds events N/2..3N/2 and the concerts table
+ * holds events 0..N, so half of every scrape is new. Stages:
+ *   parse     Scraper.scrapeTourDates() on a stubbed fetch (body read, JSON parse, fingerprint, mapping)
+ *   loadIndex DatabaseService.loadIndex() over the full table
+ *   diff      findExistingKeys() + findActiveBySource() + diffConcerts(), as in checkTours
+ *   save      DatabaseService.saveConcerts() of the new concerts
+ * Run with node --expose-gc for steadier heap numbers.
+ */
+import './setup';
+import { promises as fs } from 'fs';
+import os from 'os';
+import path from 'path';
+import { Scraper } from '../src/scraper';
+import { DatabaseService } from '../src/database';
+import { diffConcerts } from '../src/diff';
+import { concertRows, seatedPayload } from './fixtures';
+import { MemoryTables, createMemoryClient } from './standins/memorySupabase';
+
+interface StageResult {
+    stage: string;
+    size: number;
+    iterations: number;
+    p50Ms: number;
+    p99Ms: number;
+    itemsPerSec: number;
+    peakHeapMb: number;
+}
+
+interface Environment {
+    node: string;
+    platform: string;
+    arch: string;
+    cpuModel: string;
+    cpus: number;
+}
+
+const BASELINE_PATH = path.join(__dirname, 'baseline.json');
+// A stage is flagged when its p50 is this much slower than the baseline.
+const REGRESSION_THRESHOLD = 0.2;
+
+function currentEnvironment(): Environment {
+    const cpus = os.cpus();
+    return {
+        node: process.version,
+        platform: process.platform,
+        arch: process.arch,
+        cpuModel: cpus[0]?.model.trim() ?? 'unknown',
+        cpus: cpus.length,
+    };
+}
+
+// Names the fields that differ, or returns an empty list when the machines match.
+function environmentMismatch(recorded: Partial<Environment>, current: Environment): string[] {
+    return (Object.keys(current) as (keyof Environment)[])
+        .filter(key => recorded[key] !== current[key])
+        .map(key => `${key}: ${recorded[key] ?? 'not recorded'} -> ${current[key]}`);
+}
+
+function percentile(sorted: number[], p: number): number {
+    const index = Math.min(sorted.length - 1, Math.ceil((p / 100) * sorted.length) - 1);
+    return sorted[Math.max(0, index)];
+}
+
+function iterationsFor(size: number): number {
+    return size <= 100 ? 200 : size <= 10000 ? 30 : 5;
+}
+
+async function measure(stage: string, size: number, items: number, run: () => Promise<void>): Promise<StageResult> {
+    const iterations = iterationsFor(size);
+    const gc = (global as any).gc as (() => void) | undefined;
+
+    await run(); // Warm-up, not recorded
+    gc?.();
+    const heapBase = process.memoryUsage().heapUsed;
+    let peakHeap = heapBase;
+    const sampler = setInterval(() => {
+        peakHeap = Math.max(peakHeap, process.memoryUsage().heapUsed);
+    }, 5);
+
+    const durations: number[] = [];
+    for (let i = 0; i < iterations; i++) {
+        const start = process.hrtime.bigint();
+        await run();
+        durations.push(Number(process.hrtime.bigint() - start) / 1e6);
+        peakHeap = Math.max(peakHeap, process.memoryUsage().heapUsed);
+    }
+    clearInterval(sampler);
+
+    durations.sort((a, b) => a - b);
+    const meanMs = durations.reduce((sum, d) => sum + d, 0) / durations.length;
+    return {
+        stage,
+        size,
+        iterations,
+        p50Ms: percentile(durations, 50),
+        p99Ms: percentile(durations, 99),
+        itemsPerSec: items / (meanMs / 1000),
+        peakHeapMb: (peakHeap - heapBase) / (1024 * 1024),
+    };
+}
+
+async function benchmarkSize(size: number): Promise<StageResult[]> {
+    const results: StageResult[] = [];
+    const payload = seatedPayload(size, Math.floor(size / 2));
+
+    // Seated stand-in: every request gets the same document.
+    (globalThis as any).fetch = async () => new Response(payload, { status: 200, headers: { 'content-type': 'application/json' } });
+
+    let scraped: any[] = [];
+    results.push(await measure('parse', size, size, async () => {
+        // A fresh scraper each time, so the fingerprint never short-circuits the parse.
+        const result = await new Scraper(['bench']).scrapeTourDates();
+        scraped = result.concerts;
+    }));
+
+    const tables = new MemoryTables();
+    tables.seed('concerts', concertRows(size));
+    const database = new DatabaseService(createMemoryClient(tables));
+
+    results.push(await measure('loadIndex', size, size, () => database.loadIndex()));
+
+    let newConcerts: any[] = [];
+    results.push(await measure('diff', size, scraped.length, async () => {
+        const existing = await database.findExistingKeys(scraped);
+        const active = await database.findActiveBySource(['bench']);
+        newConcerts = diffConcerts(scraped, existing, active).added;
+    }));
+
+    // Saving into a copy each time, so every iteration inserts the same new rows.
+    results.push(await measure('save', size, newConcerts.length, async () => {
+        const target = new MemoryTables();
+        target.seed('concerts', []);
+        await new DatabaseService(createMemoryClient(target)).saveConcerts(newConcerts);
+    }));
+
+    return results;
+}
+
+function format(n: number, digits = 2): string {
+    return n >= 1000 ? Math.round(n).toLocaleString('en-US') : n.toFixed(digits);
+}
+
+async function main(): Promise<void> {
+    const args = process.argv.slice(2);
+    const sizesArg = args.find(arg => arg.startsWith('--sizes='));
+    const sizes = sizesArg ? sizesArg.split('=')[1].split(',').map(Number) : [10, 1000, 100000];
+
+    const results: StageResult[] = [];
+    for (const size of sizes) {
+        results.push(...await benchmarkSize(size));
+    }
+
+    const environment = currentEnvironment();
+    let baseline: StageResult[] = [];
+    let recordBaseline = args.includes('--save-baseline');
+    try {
+        const saved = JSON.parse(await fs.readFile(BASELINE_PATH, 'utf8'));
+        const mismatch = environmentMismatch(saved.environment ?? {}, environment);
+        if (mismatch.length === 0) {
+            baseline = saved.results;
+        } else if (!recordBaseline) {
+            console.log(`Baseline at ${BASELINE_PATH} was recorded on another machine; not comparing.`);
+            mismatch.forEach(line => console.log(`  ${line}`));
+            console.log('Run with --save-baseline to record one for this machine.');
+        }
+    } catch (error: any) {
+        if (error.code !== 'ENOENT') {
+            throw error;
+        }
+        // Without a baseline there is nothing to compare with, so this run becomes the baseline.
+        console.log(`No baseline at ${BASELINE_PATH}; recording this run as the baseline.`);
+        recordBaseline = true;
+    }
+
+    let regressions = 0;
+    const rows = results.map(result => {
+        const previous = baseline.find(b => b.stage === result.stage && b.size === result.size);
+        let delta = '';
+        if (previous) {
+            const change = (result.p50Ms - previous.p50Ms) / previous.p50Ms;
+            delta = `${change >= 0 ? '+' : ''}${(change * 100).toFixed(1)}%`;
+            if (change > REGRESSION_THRESHOLD) {
+                delta += ' REGRESSION';
+                regressions++;
+            }
+        }
+        return {
+            stage: result.stage,
+            size: result.size,
+            'p50 ms': format(result.p50Ms),
+            'p99 ms': format(result.p99Ms),
+            'items/s': format(result.itemsPerSec, 0),
+            'peak heap MB': format(result.peakHeapMb),
+            'p50 vs baseline': delta,
+        };
+    });
+    console.table(rows);
+
+    if (recordBaseline) {
+        const record = { recordedAt: new Date().toISOString(), environment, results };
+        await fs.writeFile(BASELINE_PATH, JSON.stringify(record, null, 2) + '\n');
+        console.log(`Saved baseline to ${BASELINE_PATH}`);
+    } else if (regressions > 0) {
+        console.error(`${regressions} stage(s) regressed by more than ${REGRESSION_THRESHOLD * 100}% at p50.`);
+        process.exitCode = 1;
+    }
+}
+
+main().catch(error => {
+    console.error('Benchmark failed:', error);
+    process.exit(1);
+});
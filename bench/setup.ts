@@ -0,0 +1,3 @@
+// Imported first by the benchmark entry point, before any module under src/ reads its configuration.
+process.env.LOG_LEVEL = process.env.LOG_LEVEL || 'warn';
+process.env.CONCERT_INDEX_PROBE_SECONDS = process.env.CONCERT_INDEX_PROBE_SECONDS || '86400';
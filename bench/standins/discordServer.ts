@@ -0,0 +1,163 @@
+import express, { Request, Response } from 'express';
+import { createHash } from 'crypto';
+import { FaultOptions, injectFaults } from './faults';
+import { RunningServer, listen } from './server';
+
+export interface DiscordServerOptions extends FaultOptions {
+    port?: number;
+    bucketLimit?: number; // Requests per route bucket per window; Discord allows 5 messages per 5s per channel
+    bucketWindowMs?: number;
+    globalPerSecond?: number; // Requests per second across all routes before the global limit trips
+}
+
+export interface DiscordServerStats {
+    requests: number;
+    messagesCreated: number;
+    noncesReplayed: number; // Creates answered with an earlier message because of enforce_nonce
+    messagesEdited: number;
+    rateLimited: number; // 429s from route buckets
+    globalRateLimited: number; // 429s from the global limit
+}
+
+interface Bucket {
+    remaining: number;
+    resetAt: number; // Epoch ms
+}
+
+const BOT_USER = { id: '100000000000000001', username: 'standin-bot', discriminator: '0', avatar: null, bot: true };
+
+/**
+ * Fake Discord REST API (/api/v10) for channel lookups and message create/edit.
+ * Every response carries X-RateLimit-* headers, and requests over a bucket or the
+ * global limit get a 429 with retry_after, so @discordjs/rest queues exactly as
+ * it would against Discord. Creates honour nonce with enforce_nonce. Channels are
+ * DM channels, which need no guild cache.
+ * Point a discord.js Client at it with `rest: { api: '<url>/api' }`.
+ */
+export function startDiscordServer(options: DiscordServerOptions = {}): Promise<RunningServer & { stats(): DiscordServerStats }> {
+    const bucketLimit = options.bucketLimit ?? 5;
+    const bucketWindowMs = options.bucketWindowMs ?? 5000;
+    const globalPerSecond = options.globalPerSecond ?? 50;
+
+    const buckets = new Map<string, Bucket>();
+    const global: Bucket = { remaining: globalPerSecond, resetAt: 0 };
+    const messages = new Map<string, any>();
+    const byNonce = new Map<string, string>(); // channel:nonce -> message id
+    const stats: DiscordServerStats = { requests: 0, messagesCreated: 0, noncesReplayed: 0, messagesEdited: 0, rateLimited: 0, globalRateLimited: 0 };
+    let nextId = BigInt(Date.now() - 1420070400000) << 22n; // Snowflakes, newest last
+
+    const snowflake = () => String(nextId++);
+
+    // Takes one request from a bucket, refilling it when its window has passed. Returns false when exhausted.
+    const take = (bucket: Bucket, limit: number, windowMs: number, now: number): boolean => {
+        if (now >= bucket.resetAt) {
+            bucket.remaining = limit;
+            bucket.resetAt = now + windowMs;
+        }
+        if (bucket.remaining === 0) {
+            return false;
+        }
+        bucket.remaining--;
+        return true;
+    };
+
+    // Route buckets are per major parameter (the channel), like Discord's.
+    const rateLimit = (route: string) => (req: Request, res: Response, next: express.NextFunction) => {
+        const now = Date.now();
+        stats.requests++;
+
+        if (!take(global, globalPerSecond, 1000, now)) {
+            stats.globalRateLimited++;
+            const retryAfter = (global.resetAt - now) / 1000;
+            res.status(429)
+                .set({ 'Retry-After': String(Math.ceil(retryAfter)), 'X-RateLimit-Global': 'true', 'X-RateLimit-Scope': 'global' })
+                .json({ message: 'You are being rate limited.', retry_after: retryAfter, global: true });
+            return;
+        }
+
+        const key = `${route}:${req.params.channelId}`;
+        let bucket = buckets.get(key);
+        if (!bucket) {
+            bucket = { remaining: bucketLimit, resetAt: 0 };
+            buckets.set(key, bucket);
+        }
+        const allowed = take(bucket, bucketLimit, bucketWindowMs, now);
+        const resetAfter = (bucket.resetAt - now) / 1000;
+        res.set({
+            'X-RateLimit-Limit': String(bucketLimit),
+            'X-RateLimit-Remaining': String(bucket.remaining),
+            'X-RateLimit-Reset': String(bucket.resetAt / 1000),
+            'X-RateLimit-Reset-After': resetAfter.toFixed(3),
+            'X-RateLimit-Bucket': createHash('md5').update(route).digest('hex'),
+        });
+        if (!allowed) {
+            stats.rateLimited++;
+            res.status(429)
+                .set({ 'Retry-After': String(Math.ceil(resetAfter)), 'X-RateLimit-Scope': 'user' })
+                .json({ message: 'You are being rate limited.', retry_after: resetAfter, global: false });
+            return;
+        }
+        next();
+    };
+
+    const message = (channelId: string, body: any, id = snowflake()) => ({
+        id,
+        channel_id: channelId,
+        type: 0,
+        author: BOT_USER,
+        content: body.content ?? '',
+        embeds: body.embeds ?? [],
+        attachments: [],
+        mentions: [],
+        mention_roles: [],
+        mention_everyone: false,
+        pinned: false,
+        tts: false,
+        nonce: body.nonce,
+        timestamp: new Date().toISOString(),
+        edited_timestamp: null,
+    });
+
+    const app = express();
+    app.use(injectFaults(options));
+    app.use(express.json({ limit: '10mb' }));
+
+    app.get('/api/v10/channels/:channelId', rateLimit('channel'), (req, res) => {
+        res.json({ id: req.params.channelId, type: 1, last_message_id: null, recipients: [BOT_USER] });
+    });
+
+    app.post('/api/v10/channels/:channelId/messages', rateLimit('messages'), (req, res) => {
+        // Like Discord, a repeated nonce with enforce_nonce returns the message created the first time.
+        const nonceKey = req.body.enforce_nonce && req.body.nonce ? `${req.params.channelId}:${req.body.nonce}` : null;
+        if (nonceKey && byNonce.has(nonceKey)) {
+            stats.noncesReplayed++;
+            res.json(messages.get(byNonce.get(nonceKey)!));
+            return;
+        }
+        const created = message(req.params.channelId, req.body);
+        messages.set(created.id, created);
+        if (nonceKey) {
+            byNonce.set(nonceKey, created.id);
+        }
+        stats.messagesCreated++;
+        res.json(created);
+    });
+
+    app.patch('/api/v10/channels/:channelId/messages/:messageId', rateLimit('messages'), (req, res) => {
+        const existing = messages.get(req.params.messageId);
+        if (!existing || existing.channel_id !== req.params.channelId) {
+            res.status(404).json({ message: 'Unknown Message', code: 10008 });
+            return;
+        }
+        const edited = { ...existing, ...message(existing.channel_id, { ...existing, ...req.body }, existing.id), timestamp: existing.timestamp, edited_timestamp: new Date().toISOString() };
+        messages.set(edited.id, edited);
+        stats.messagesEdited++;
+        res.json(edited);
+    });
+
+    app.get('/stats', (_req, res) => {
+        res.json(stats);
+    });
+
+    return listen(app, options.port).then(server => ({ ...server, stats: () => ({ ...stats }) }));
+}
@@ -0,0 +1,31 @@
+import { NextFunction, Request, Response } from 'express';
+
+export interface FaultOptions {
+    latencyMs?: number; // Added to every request
+    jitterMs?: number; // Up to this much more, uniformly random
+    errorRate?: number; // Fraction of requests answered with a 503, 0..1
+}
+
+export function faultsFromEnv(prefix: string): FaultOptions {
+    return {
+        latencyMs: Number(process.env[`${prefix}_LATENCY_MS`]) || 0,
+        jitterMs: Number(process.env[`${prefix}_JITTER_MS`]) || 0,
+        errorRate: Number(process.env[`${prefix}_ERROR_RATE`]) || 0,
+    };
+}
+
+/**
+ * Express middleware that delays every request and fails a share of them.
+ */
+export function injectFaults(options: FaultOptions) {
+    return (req: Request, res: Response, next: NextFunction) => {
+        const delay = (options.latencyMs ?? 0) + Math.random() * (options.jitterMs ?? 0);
+        setTimeout(() => {
+            if (Math.random() < (options.errorRate ?? 0)) {
+                res.status(503).json({ message: 'Injected failure' });
+                return;
+            }
+            next();
+        }, delay);
+    };
+}
@@ -0,0 +1,62 @@
+/**
+ * Starts the Seated, PostgREST and Discord stand-ins and prints the environment
+ * that points the bot's services at them. Runs until interrupted.
+ *
+ *   npm run standins
+ *
+ * Configuration (all optional):
+ *   STANDIN_{SEATED,SUPABASE,DISCORD}_PORT          default 4010, 4011, 4012
+ *   STANDIN_{SEATED,SUPABASE,DISCORD}_LATENCY_MS    fixed delay per request
+ *   STANDIN_{SEATED,SUPABASE,DISCORD}_JITTER_MS     extra random delay per request
+ *   STANDIN_{SEATED,SUPABASE,DISCORD}_ERROR_RATE    share of requests answered with a 503
+ *   STANDIN_SEATED_EVENTS                           tour-events per tour document, default 100
+ *   STANDIN_CONCERTS                                rows seeded into the concerts table, default 0
+ *   STANDIN_SUPABASE_MAX_ROWS                       rows per response cap, default 1000
+ *   STANDIN_DISCORD_BUCKET_LIMIT / _WINDOW_MS       per-channel message limit, default 5 per 5000ms
+ *   STANDIN_DISCORD_GLOBAL_PER_SECOND               global request limit, default 50
+ */
+import { concertRows } from '../fixtures';
+import { startDiscordServer } from './discordServer';
+import { faultsFromEnv } from './faults';
+import { MemoryTables } from './memorySupabase';
+import { startPostgrestServer } from './postgrestServer';
+import { startSeatedServer } from './seatedServer';
+
+async function main(): Promise<void> {
+    const tables = new MemoryTables();
+    tables.seed('concerts', concertRows(Number(process.env.STANDIN_CONCERTS) || 0));
+
+    const seated = await startSeatedServer({
+        ...faultsFromEnv('STANDIN_SEATED'),
+        port: Number(process.env.STANDIN_SEATED_PORT) || 4010,
+        events: Number(process.env.STANDIN_SEATED_EVENTS) || 100,
+    });
+    const supabase = await startPostgrestServer(tables, {
+        ...faultsFromEnv('STANDIN_SUPABASE'),
+        port: Number(process.env.STANDIN_SUPABASE_PORT) || 4011,
+        maxRows: Number(process.env.STANDIN_SUPABASE_MAX_ROWS) || 1000,
+    });
+    const discord = await startDiscordServer({
+        ...faultsFromEnv('STANDIN_DISCORD'),
+        port: Number(process.env.STANDIN_DISCORD_PORT) || 4012,
+        bucketLimit: Number(process.env.STANDIN_DISCORD_BUCKET_LIMIT) || 5,
+        bucketWindowMs: Number(process.env.STANDIN_DISCORD_BUCKET_WINDOW_MS) || 5000,
+        globalPerSecond: Number(process.env.STANDIN_DISCORD_GLOBAL_PER_SECOND) || 50,
+    });
+
+    console.log('Stand-ins running. Point the services at them with:');
+    console.log(`  SEATED_API_BASE=${seated.url}/api`);
+    console.log(`  SUPABASE_URL=${supabase.url}`);
+    console.log('  SUPABASE_KEY=standin');
+    console.log(`Discord REST: ${discord.url}/api (Client option rest.api), counters at ${discord.url}/stats`);
+
+    process.on('SIGINT', async () => {
+        await Promise.all([seated.close(), supabase.close(), discord.close()]);
+        process.exit(0);
+    });
+}
+
+main().catch(error => {
+    console.error('Stand-ins failed to start:', error);
+    process.exit(1);
+});
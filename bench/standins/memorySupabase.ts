@@ -0,0 +1,316 @@
+/**
+ * In-memory stand-in for the subset of the supabase-js query builder that
+ * DatabaseService uses: from().select/upsert/update/delete with eq, in, is, lt, filter, or, order,
+ * range, maybeSingle and head/count, plus rpc() for the functions in supabase/migrations. Results resolve on a microtask like a very fast
+ * network would, so awaits behave as they do against Supabase.
+ */
+
+type Row = Record<string, any>;
+type Predicate = (row: Row) => boolean;
+
+interface Result {
+    data: any;
+    error: { message: string } | null;
+    count?: number | null;
+}
+
+const PRIMARY_KEYS: Record<string, string> = {
+    scheduler_state: 'name',
+    announcement_outbox: 'concert_id',
+    announcements: 'concert_id,message_id',
+    bot_state: 'key',
+    subscriptions: 'channel_id',
+    notify_areas: 'user_id,area',
+};
+
+export class MemoryTables {
+    private tables = new Map<string, Map<string, Row>>();
+
+    table(name: string): Map<string, Row> {
+        let table = this.tables.get(name);
+        if (!table) {
+            table = new Map();
+            this.tables.set(name, table);
+        }
+        return table;
+    }
+
+    // Primary keys per table; anything else is keyed by `id`.
+    keyOf(table: string, row: Row, onConflict?: string): string {
+        const columns = (onConflict || PRIMARY_KEYS[table] || 'id').split(',');
+        return columns.map(column => String(row[column.trim()])).join('|');
+    }
+
+    seed(name: string, rows: Row[]): void {
+        const table = this.table(name);
+        rows.forEach(row => table.set(this.keyOf(name, row), { ...row }));
+    }
+}
+
+function parseValue(raw: string): string {
+    const value = raw.trim();
+    return value.startsWith('"') && value.endsWith('"') ? value.slice(1, -1).replace(/\\"/g, '"') : value;
+}
+
+// Splits on commas that are not inside parentheses or double quotes.
+function splitTopLevel(text: string): string[] {
+    const parts: string[] = [];
+    let depth = 0;
+    let quoted = false;
+    let current = '';
+    for (let i = 0; i < text.length; i++) {
+        const c = text[i];
+        if (c === '\\' && quoted) {
+            current += c + text[++i];
+            continue;
+        }
+        if (c === '"') {
+            quoted = !quoted;
+        } else if (!quoted && c === '(') {
+            depth++;
+        } else if (!quoted && c === ')') {
+            depth--;
+        }
+        if (!quoted && depth === 0 && c === ',') {
+            parts.push(current);
+            current = '';
+        } else {
+            current += c;
+        }
+    }
+    if (current) {
+        parts.push(current);
+    }
+    return parts;
+}
+
+/**
+ * Parses a PostgREST filter such as `in.("a","b")` or `eq.value` for one column.
+ */
+export function parseFilter(column: string, expression: string): Predicate {
+    const dot = expression.indexOf('.');
+    const operator = expression.slice(0, dot);
+    const operand = expression.slice(dot + 1);
+    switch (operator) {
+        case 'eq':
+            return row => String(row[column]) === parseValue(operand);
+        case 'neq':
+            return row => String(row[column]) !== parseValue(operand);
+        case 'in': {
+            const values = new Set(splitTopLevel(operand.replace(/^\(|\)$/g, '')).map(parseValue));
+            return row => values.has(String(row[column]));
+        }
+        case 'lt':
+            return row => Number(row[column]) < Number(operand);
+        case 'gt':
+            return row => Number(row[column]) > Number(operand);
+        case 'is':
+            return row => (operand === 'null' ? row[column] == null : String(row[column]) === operand);
+        default:
+            throw new Error(`Unsupported filter operator '${operator}'`);
+    }
+}
+
+/**
+ * Parses the body of an `or=(...)` filter, e.g. `id.in.("a"),date.in.("2025-01-01")`.
+ */
+export function parseOrFilter(filter: string): Predicate {
+    const predicates = splitTopLevel(filter).map(term => {
+        const dot = term.indexOf('.');
+        return parseFilter(term.slice(0, dot).trim(), term.slice(dot + 1));
+    });
+    return row => predicates.some(predicate => predicate(row));
+}
+
+export function project(row: Row, columns: string): Row {
+    if (columns.trim() === '*') {
+        return { ...row };
+    }
+    const projected: Row = {};
+    columns.split(',').map(column => column.trim()).forEach(column => {
+        projected[column] = row[column] ?? null;
+    });
+    return projected;
+}
+
+class QueryBuilder implements PromiseLike<Result> {
+    private columns = '*';
+    private predicates: Predicate[] = [];
+    private orderBy: { column: string; ascending: boolean } | null = null;
+    private window: [number, number] | null = null;
+    private single = false;
+    private head = false;
+    private countRows = false;
+    private upsertRows: Row[] | null = null;
+    private updateValues: Row | null = null;
+    private deleting = false;
+    private returning = false; // select() after a write
+    private onConflict?: string;
+
+    private readonly tables: MemoryTables;
+    private readonly name: string;
+
+    constructor(tables: MemoryTables, name: string) {
+        this.tables = tables;
+        this.name = name;
+    }
+
+    select(columns = '*', options: { count?: string; head?: boolean } = {}): this {
+        this.returning = this.deleting;
+        this.columns = columns;
+        this.countRows = !!options.count;
+        this.head = !!options.head;
+        return this;
+    }
+
+    upsert(rows: Row | Row[], options: { onConflict?: string } = {}): this {
+        this.upsertRows = Array.isArray(rows) ? rows : [rows];
+        this.onConflict = options.onConflict;
+        return this;
+    }
+
+    update(values: Row): this {
+        this.updateValues = values;
+        return this;
+    }
+
+    delete(): this {
+        this.deleting = true;
+        return this;
+    }
+
+    eq(column: string, value: unknown): this {
+        this.predicates.push(row => String(row[column]) === String(value));
+        return this;
+    }
+
+    in(column: string, values: unknown[]): this {
+        const set = new Set(values.map(String));
+        this.predicates.push(row => set.has(String(row[column])));
+        return this;
+    }
+
+    is(column: string, value: null | boolean): this {
+        this.predicates.push(parseFilter(column, `is.${value}`));
+        return this;
+    }
+
+    lt(column: string, value: number): this {
+        this.predicates.push(parseFilter(column, `lt.${value}`));
+        return this;
+    }
+
+    // Any PostgREST operator parseFilter understands, e.g. filter('id', 'in', '("a","b")').
+    filter(column: string, operator: string, value: string): this {
+        this.predicates.push(parseFilter(column, `${operator}.${value}`));
+        return this;
+    }
+
+    or(filter: string): this {
+        this.predicates.push(parseOrFilter(filter));
+        return this;
+    }
+
+    order(column: string, options: { ascending?: boolean } = {}): this {
+        this.orderBy = { column, ascending: options.ascending !== false };
+        return this;
+    }
+
+    range(from: number, to: number): this {
+        this.window = [from, to];
+        return this;
+    }
+
+    maybeSingle(): this {
+        this.single = true;
+        return this;
+    }
+
+    then<T1 = Result, T2 = never>(
+        onfulfilled?: ((value: Result) => T1 | PromiseLike<T1>) | null,
+        onrejected?: ((reason: any) => T2 | PromiseLike<T2>) | null,
+    ): Promise<T1 | T2> {
+        return Promise.resolve().then(() => this.execute()).then(onfulfilled, onrejected);
+    }
+
+    private execute(): Result {
+        const table = this.tables.table(this.name);
+
+        if (this.upsertRows) {
+            for (const row of this.upsertRows) {
+                const key = this.tables.keyOf(this.name, row, this.onConflict);
+                table.set(key, { ...table.get(key), ...row });
+            }
+            return { data: null, error: null };
+        }
+
+        if (this.updateValues) {
+            for (const [key, row] of table) {
+                if (this.predicates.every(predicate => predicate(row))) {
+                    table.set(key, { ...row, ...this.updateValues });
+                }
+            }
+            return { data: null, error: null };
+        }
+
+        if (this.deleting) {
+            const deleted: Row[] = [];
+            for (const [key, row] of table) {
+                if (this.predicates.every(predicate => predicate(row))) {
+                    table.delete(key);
+                    deleted.push(row);
+                }
+            }
+            return { data: this.returning ? deleted.map(row => project(row, this.columns)) : null, error: null };
+        }
+
+        let rows = [...table.values()].filter(row => this.predicates.every(predicate => predicate(row)));
+        const count = rows.length;
+        if (this.orderBy) {
+            const { column, ascending } = this.orderBy;
+            rows.sort((a, b) => (a[column] < b[column] ? -1 : a[column] > b[column] ? 1 : 0) * (ascending ? 1 : -1));
+        }
+        if (this.window) {
+            rows = rows.slice(this.window[0], this.window[1] + 1);
+        }
+
+        const data = this.head ? null : rows.map(row => project(row, this.columns));
+        if (this.single) {
+            return { data: data && data.length > 0 ? data[0] : null, error: null, count: this.countRows ? count : null };
+        }
+        return { data, error: null, count: this.countRows ? count : null };
+    }
+}
+
+// The Postgres functions from supabase/migrations, reimplemented over MemoryTables.
+const FUNCTIONS: Record<string, (tables: MemoryTables, args: any) => any> = {
+    save_concerts_with_outbox(tables, { concerts, announce_ids }) {
+        const table = tables.table('concerts');
+        for (const row of concerts) {
+            const key = tables.keyOf('concerts', row);
+            table.set(key, { ...table.get(key), ...row });
+        }
+        const outbox = tables.table('announcement_outbox');
+        for (const concertId of announce_ids) {
+            if (!outbox.has(concertId)) {
+                outbox.set(concertId, { concert_id: concertId, created_at: new Date().toISOString(), attempts: 0, posted_at: null, fans_notified_at: null });
+            }
+        }
+        return null;
+    },
+};
+
+/**
+ * Something DatabaseService can use in place of a SupabaseClient.
+ */
+export function createMemoryClient(tables: MemoryTables): any {
+    return {
+        from: (name: string) => new QueryBuilder(tables, name),
+        rpc: (name: string, args: any): Promise<Result> => Promise.resolve().then(() => {
+            const fn = FUNCTIONS[name];
+            return fn
+                ? { data: fn(tables, args), error: null }
+                : { data: null, error: { message: `Could not find the function ${name}` } };
+        }),
+    };
+}
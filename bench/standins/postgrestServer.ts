@@ -0,0 +1,141 @@
+import express, { Request, Response } from 'express';
+import { FaultOptions, injectFaults } from './faults';
+import { MemoryTables, createMemoryClient } from './memorySupabase';
+import { RunningServer, listen } from './server';
+
+export interface PostgrestServerOptions extends FaultOptions {
+    port?: number;
+    bodyLimit?: string; // Largest upsert body accepted, in express.json() notation
+    maxRows?: number; // Cap on rows per response, like PostgREST's db-max-rows (Supabase defaults to 1000)
+}
+
+// Query parameters that are not column filters.
+const RESERVED_PARAMS = new Set(['select', 'order', 'offset', 'limit', 'on_conflict', 'columns', 'or']);
+
+function sendError(res: Response, status: number, message: string): void {
+    res.status(status).json({ code: 'PGRST000', message, details: null, hint: null });
+}
+
+// Applies the column filters and or=(...) of a request to a query.
+function applyFilters(query: any, req: Request): void {
+    for (const [param, value] of Object.entries(req.query)) {
+        if (RESERVED_PARAMS.has(param)) {
+            continue;
+        }
+        // Repeated filters on one column arrive as an array.
+        for (const expression of ([] as unknown[]).concat(value).map(String)) {
+            const dot = expression.indexOf('.');
+            query.filter(param, expression.slice(0, dot), expression.slice(dot + 1));
+        }
+    }
+    if (req.query.or) {
+        query.or(String(req.query.or).replace(/^\(|\)$/g, ''));
+    }
+}
+
+/**
+ * HTTP front for MemoryTables that speaks enough of the PostgREST dialect for
+ * supabase-js: GET/HEAD with column filters, or=(...), select, order,
+ * offset/limit and Prefer: count=exact, POST upserts with on_conflict,
+ * filtered PATCH updates and POST /rpc/<function> calls.
+ * Point DatabaseService at it with SUPABASE_URL=<url> and any SUPABASE_KEY.
+ */
+export function startPostgrestServer(tables: MemoryTables, options: PostgrestServerOptions = {}): Promise<RunningServer> {
+    const client = createMemoryClient(tables);
+    const app = express();
+    app.use(injectFaults(options));
+    app.use(express.json({ limit: options.bodyLimit ?? '50mb' }));
+
+    const read = async (req: Request, res: Response) => {
+        const prefer = req.get('prefer') || '';
+        const head = req.method === 'HEAD';
+        const query = client.from(req.params.table).select(String(req.query.select ?? '*'), {
+            count: /count=(exact|planned|estimated)/.test(prefer) ? 'exact' : undefined,
+            head,
+        });
+
+        applyFilters(query, req);
+        if (req.query.order) {
+            const [column, direction] = String(req.query.order).split(',')[0].split('.');
+            query.order(column, { ascending: direction !== 'desc' });
+        }
+        const offset = Number(req.query.offset) || 0;
+        const limit = Math.min(req.query.limit !== undefined ? Number(req.query.limit) : Infinity, options.maxRows ?? Infinity);
+        if (offset > 0 || limit < Infinity) {
+            query.range(offset, limit < Infinity ? offset + limit - 1 : Number.MAX_SAFE_INTEGER);
+        }
+
+        const { data, count } = await query;
+        const rows = data ?? [];
+        if (count != null) {
+            res.set('Content-Range', rows.length > 0 ? `${offset}-${offset + rows.length - 1}/${count}` : `*/${count}`);
+        }
+        if (head) {
+            res.status(200).end();
+            return;
+        }
+        if ((req.get('accept') || '').includes('application/vnd.pgrst.object+json')) {
+            // .single() asks for exactly one row.
+            if (rows.length !== 1) {
+                sendError(res, 406, `JSON object requested, multiple (or no) rows returned`);
+                return;
+            }
+            res.json(rows[0]);
+            return;
+        }
+        res.json(rows);
+    };
+
+    app.get('/rest/v1/:table', (req, res, next) => read(req, res).catch(next));
+    app.head('/rest/v1/:table', (req, res, next) => read(req, res).catch(next));
+
+    app.post('/rest/v1/rpc/:fn', async (req, res, next) => {
+        try {
+            const { data, error } = await client.rpc(req.params.fn, req.body);
+            if (error) {
+                sendError(res, 404, error.message);
+                return;
+            }
+            res.status(200).json(data);
+        } catch (error) {
+            next(error);
+        }
+    });
+
+    app.post('/rest/v1/:table', async (req, res, next) => {
+        try {
+            const prefer = req.get('prefer') || '';
+            if (!prefer.includes('resolution=merge-duplicates')) {
+                sendError(res, 501, 'Only upserts (Prefer: resolution=merge-duplicates) are supported');
+                return;
+            }
+            const rows = Array.isArray(req.body) ? req.body : [req.body];
+            await client.from(req.params.table).upsert(rows, { onConflict: req.query.on_conflict as string | undefined });
+            if (prefer.includes('return=representation')) {
+                res.status(201).json(rows);
+                return;
+            }
+            res.status(201).end();
+        } catch (error) {
+            next(error);
+        }
+    });
+
+    app.patch('/rest/v1/:table', async (req, res, next) => {
+        try {
+            const query = client.from(req.params.table).update(req.body);
+            applyFilters(query, req);
+            await query;
+            res.status(204).end();
+        } catch (error) {
+            next(error);
+        }
+    });
+
+    // Unsupported filters and the like surface as PostgREST-style 400s.
+    app.use((error: any, _req: Request, res: Response, _next: express.NextFunction) => {
+        sendError(res, error.status || 400, error.message);
+    });
+
+    return listen(app, options.port);
+}
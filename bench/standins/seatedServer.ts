@@ -0,0 +1,53 @@
+import express from 'express';
+import { createHash } from 'crypto';
+import { seatedPayload } from '../fixtures';
+import { FaultOptions, injectFaults } from './faults';
+import { RunningServer, listen } from './server';
+
+export interface SeatedServerOptions extends FaultOptions {
+    events?: number; // Tour-events per tour document
+    offsetFor?: (tourId: string) => number; // Number of the first event in a tour's document
+    port?: number;
+}
+
+/**
+ * Fake Seated tour API serving GET /api/tour/:id?include=tour-events with ETag
+ * validation. Point the scraper at it with SEATED_API_BASE=<url>/api.
+ */
+export function startSeatedServer(options: SeatedServerOptions = {}): Promise<RunningServer & { setEvents(count: number): void }> {
+    let events = options.events ?? 100;
+    const documents = new Map<string, { body: string; etag: string }>();
+
+    const documentFor = (tourId: string) => {
+        let document = documents.get(tourId);
+        if (!document) {
+            // By default each tour is offset so different tours carry different events.
+            const first = options.offsetFor
+                ? options.offsetFor(tourId)
+                : [...tourId].reduce((sum, c) => sum + c.charCodeAt(0), 0) * 1000;
+            const body = seatedPayload(events, first);
+            document = { body, etag: `"${createHash('sha1').update(body).digest('hex')}"` };
+            documents.set(tourId, document);
+        }
+        return document;
+    };
+
+    const app = express();
+    app.use(injectFaults(options));
+    app.get('/api/tour/:id', (req, res) => {
+        const document = documentFor(req.params.id);
+        if (req.get('if-none-match') === document.etag) {
+            res.status(304).end();
+            return;
+        }
+        res.set('ETag', document.etag).type('application/json').send(document.body);
+    });
+
+    return listen(app, options.port).then(server => ({
+        ...server,
+        setEvents(count: number) {
+            events = count;
+            documents.clear();
+        },
+    }));
+}
@@ -0,0 +1,19 @@
+import { Express } from 'express';
+import { AddressInfo } from 'net';
+
+export interface RunningServer {
+    url: string;
+    close(): Promise<void>;
+}
+
+export function listen(app: Express, port = 0): Promise<RunningServer> {
+    return new Promise(resolve => {
+        const server = app.listen(port, '127.0.0.1', () => {
+            const { port: actual } = server.address() as AddressInfo;
+            resolve({
+                url: `http://127.0.0.1:${actual}`,
+                close: () => new Promise(done => server.close(() => done())),
+            });
+        });
+    });
+}
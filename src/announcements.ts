@@ -0,0 +1,124 @@
+// @ts-nocheck
+import { EmbedBuilder } from 'discord.js';
+import { Concert } from './scraper';
+
+// Discord limits, see https://discord.com/developers/docs/resources/message#embed-object-embed-limits
+export const MAX_EMBEDS_PER_MESSAGE = 10;
+const MAX_EMBED_CHARS_PER_MESSAGE = 6000;
+const MAX_TITLE_CHARS = 256;
+const MAX_DESCRIPTION_CHARS = 4096;
+
+export interface AnnouncementBatch {
+    content: string;
+    embeds: EmbedBuilder[];
+    concertIds: string[]; // The concert behind each embed, in order
+}
+
+// How an already posted announcement is shown after the concert changed or was cancelled.
+export interface AnnouncementState {
+    updated?: boolean; // Marked as updated
+    cancelled?: boolean; // Struck through and marked as cancelled
+}
+
+export function ticketLink(concert: Concert): string {
+    return `https://link.seated.com/${concert.id}`;
+}
+
+// Re-format the date to be more readable, e.g., "September 17, 2025"
+export function formatConcertDate(concert: Concert): string {
+    const date = new Date(`${concert.date}T12:00:00Z`); // Use noon UTC to avoid timezone issues
+    return date.toLocaleDateString('en-US', { 
+        year: 'numeric', 
+        month: 'long', 
+        day: 'numeric',
+        timeZone: 'UTC' 
+    });
+}
+
+function strike(text: string): string {
+    return `~~${text}~~`;
+}
+
+/**
+ * The plain-text announcement for a single show.
+ */
+export function renderConcertMessage(concert: Concert, state: AnnouncementState = {}): string {
+    const header = 'Goose the Organization has announced a new show!';
+    const messageParts = [
+        state.cancelled ? `**Cancelled** ${strike(header)}` : state.updated ? `**Updated** ${header}` : header,
+        '',
+    ];
+
+    const lines = [formatConcertDate(concert), `${concert.venue} | ${concert.location}`];
+    if (concert.details) {
+        lines.push(concert.details);
+    }
+    messageParts.push(...(state.cancelled ? lines.map(strike) : lines));
+
+    messageParts.push('');
+    messageParts.push(`🎫 tickets: ${ticketLink(concert)}`);
+
+    return messageParts.join('\n');
+}
+
+function truncate(text: string, max: number): string {
+    return text.length > max ? `${text.slice(0, max - 1)}…` : text;
+}
+
+export function renderConcertEmbed(concert: Concert, state: AnnouncementState = {}): EmbedBuilder {
+    let lines = [`${concert.venue} | ${concert.location}`];
+    if (concert.details) {
+        lines.push(concert.details);
+    }
+    if (state.cancelled) {
+        lines = lines.map(strike);
+    }
+    lines.push('', `🎫 tickets: ${ticketLink(concert)}`);
+
+    const title = state.cancelled
+        ? `Cancelled: ${formatConcertDate(concert)}`
+        : state.updated ? `Updated: ${formatConcertDate(concert)}` : formatConcertDate(concert);
+    return new EmbedBuilder()
+        .setTitle(truncate(title, MAX_TITLE_CHARS))
+        .setURL(ticketLink(concert))
+        .setDescription(truncate(lines.join('\n'), MAX_DESCRIPTION_CHARS));
+}
+
+function embedLength(embed: EmbedBuilder): number {
+    return (embed.data.title?.length ?? 0) + (embed.data.description?.length ?? 0);
+}
+
+/**
+ * Packs concerts into as few messages as possible, keeping their order. Each
+ * message holds at most 10 embeds and stays under the 6000-character total.
+ */
+export function buildAnnouncementBatches(concerts: Concert[]): AnnouncementBatch[] {
+    const batches: AnnouncementBatch[] = [];
+    let current: EmbedBuilder[] = [];
+    let currentIds: string[] = [];
+    let currentChars = 0;
+
+    for (const concert of concerts) {
+        const embed = renderConcertEmbed(concert);
+        const chars = embedLength(embed);
+        if (current.length === MAX_EMBEDS_PER_MESSAGE || (current.length > 0 && currentChars + chars > MAX_EMBED_CHARS_PER_MESSAGE)) {
+            batches.push({ content: '', embeds: current, concertIds: currentIds });
+            current = [];
+            currentIds = [];
+            currentChars = 0;
+        }
+        current.push(embed);
+        currentIds.push(concert.id);
+        currentChars += chars;
+    }
+    if (current.length > 0) {
+        batches.push({ content: '', embeds: current, concertIds: currentIds });
+    }
+
+    if (batches.length > 0) {
+        batches[0].content = concerts.length === 1
+            ? 'Goose the Organization has announced a new show!'
+            : `Goose the Organization has announced ${concerts.length} new shows!`;
+    }
+    return batches;
+} 
\ No newline at end of file
@@ -1,29 +1,107 @@
 // @ts-nocheck
-import { Client, GatewayIntentBits, TextChannel, Interaction, MessageFlags, GuildMember } from 'discord.js';
+import { ChatInputCommandInteraction, Client, CommandInteraction, Interaction, MessageFlags, GuildMember } from 'discord.js';
 import express from 'express';
 import { Scraper, Concert } from './scraper';
-import { DatabaseService } from './database';
-import cron from 'node-cron';
+import { AnnouncementRecord, DatabaseService, NotifyArea, Subscription } from './database';
+import { diffConcerts } from './diff';
+import { buildAnnouncementBatches, renderConcertEmbed, renderConcertMessage } from './announcements';
+import { ChannelRequests, Delivery, MessageQueue, OutboundPayload, dedupKey, hashPayload } from './messageQueue';
+import { ChannelResolver, ChannelUnavailableError } from './channelResolver';
+import { clientOptions, clientProfileFromEnv } from './clientOptions';
+import { COMMANDS, commandsMatch, hashCommands } from './commands';
+import { OutboxDispatcher, PostResult } from './outbox';
+import { describeFilters, parseFilters, subscriptionMatcher } from './subscriptions';
+import { gazetteer } from './gazetteer';
+import { DEFAULT_RADIUS_MILES, NotificationIndex, describeArea, radiusArea, regionArea } from './notifications';
+import { Job, JobScheduler } from './jobScheduler';
+import { AdaptivePollScheduler, pollOptionsFromEnv } from './pollScheduler';
+import { createLogger } from './logger';
+import { concertsSeen, discordSendDuration, interactionAckDuration, renderMetrics, tourCheckSkips, tourCheckTimeSaved } from './metrics';
+
+const log = createLogger('bot');
+const gatewayLog = createLogger('discord.gateway');
+const HEARTBEAT_LOG_SAMPLE = Number(process.env.HEARTBEAT_LOG_SAMPLE) || 100;
+// Areas one user may register with /notify.
+const NOTIFY_MAX_AREAS = Number(process.env.NOTIFY_MAX_AREAS) || 5;
+
+// One announcement message, rendered once and sent to every channel that gets the same shows.
+interface RenderedAnnouncement {
+    payload: OutboundPayload;
+    concertIds: string[];
+    contentHash: string;
+}
 
 export class Bot {
-    private client = new Client({
-        intents: [
-            GatewayIntentBits.Guilds,
-            GatewayIntentBits.GuildMessages,
-            GatewayIntentBits.MessageContent,
-        ],
-    });
+    private client = new Client(clientOptions(clientProfileFromEnv()));
 
     private scraper = new Scraper();
     private database = new DatabaseService();
+    private channels = new ChannelResolver(this.client);
+    private queue = new MessageQueue(this.client, this.channels, delivery => this.recordAnnouncement(delivery));
+    private outbox = new OutboxDispatcher(this.database, concerts => this.postConcerts(concerts), async concerts => {
+        await this.notifyFans(concerts);
+    });
+    private notifications = new NotificationIndex();
+    private notifyAreasLoaded = false;
+    private jobs = new JobScheduler();
+    private poller = new AdaptivePollScheduler(async () => {
+        const job = await this.jobs.wait(this.submitTourCheck('scheduled').id);
+        if (job.state === 'failed') {
+            throw new Error(job.error);
+        }
+    }, pollOptionsFromEnv(), {
+        load: () => this.database.getSchedulerState('tour-check'),
+        save: state => this.database.saveSchedulerState('tour-check', state),
+    });
+    // The tour check that new requests join, see submitTourCheck().
+    private activeTourCheck: { job: Job; channelIds: Set<string> } | null = null;
+
+    // 'batched' packs several shows into each message as embeds, 'single' sends one plain message per show.
+    private postMode = process.env.DISCORD_POST_MODE === 'single' ? 'single' : 'batched';
+    // Whether announcements edited for a changed show are marked "Updated". Cancellations are always struck through.
+    private updatedMarker = process.env.ANNOUNCE_UPDATED_MARKER !== 'false';
+
+    // Scope and hash of the slash commands known to be registered, see registerCommands().
+    private registeredCommands: string | null = null;
+
+    // Runs where the tour feed was unchanged and the database diff was skipped.
+    private skipStats = { notModified: 0, unchanged: 0, timeSavedMs: 0, lastDiffMs: 0 };
 
     public async initialize(): Promise<void> {
         await this.scraper.initialize();
+        await this.queue.load();
+        try {
+            await this.database.loadIndex();
+        } catch (error) {
+            // Not fatal: lookups fall back to querying Supabase until a reload succeeds.
+            log.error('Failed to load concert index at startup', { err: error });
+        }
+        if (process.env.GAZETTEER_FILE) {
+            try {
+                await gazetteer.load(process.env.GAZETTEER_FILE);
+            } catch (error) {
+                log.error(`Failed to load gazetteer ${process.env.GAZETTEER_FILE}, using the built-in places only`, { err: error });
+            }
+        }
+        try {
+            await this.loadNotifyAreas();
+        } catch (error) {
+            log.error('Failed to load notify areas, show DMs wait until they load', { err: error });
+        }
+    }
+
+    private async loadNotifyAreas(): Promise<void> {
+        this.notifications.replaceAll(await this.database.getNotifyAreas());
+        this.notifyAreasLoaded = true;
+        log.info(`Loaded ${this.notifications.size} notify areas.`);
     }
 
     public start(): void {
-        this.client.on('ready', () => {
-            console.log(`Logged in as ${this.client.user?.tag}!`);
+        // Only once: a second ready would start another HTTP server on the same port.
+        this.client.once('ready', () => {
+            log.info(`Logged in as ${this.client.user?.tag}!`);
+            this.queue.start();
+            this.outbox.start();
             this.scheduleTourCheck();
             this.registerCommands();
             this.startHttpServer();
@@ -31,15 +109,15 @@ export class Bot {
 
         this.client.on('interactionCreate', async (interaction) => {
             if (!interaction.isCommand()) return;
-            console.log(`Received interaction: ${interaction.commandName} (${interaction.id})`);
+            log.debug(() => `Received interaction: ${interaction.commandName} (${interaction.id})`);
             try {
                 await this.handleCommand(interaction);
             } catch (error: any) {
-                console.error(`Error handling interaction ${interaction.id}:`, error);
+                log.error(`Error handling interaction ${interaction.id}`, { err: error });
                 
                 // If the interaction is unknown, it has expired. No use trying to reply.
                 if (error.code === 10062) { // DiscordAPIError.Codes.UnknownInteraction
-                    console.error('Interaction likely expired. Cannot send error reply.');
+                    log.error('Interaction likely expired. Cannot send error reply.');
                     return;
                 }
 
@@ -52,15 +130,25 @@ export class Bot {
                             await interaction.reply(message);
                         }
                     } catch (e) {
-                        console.error(`Failed to send error reply for interaction ${interaction.id}:`, e);
+                        log.error(`Failed to send error reply for interaction ${interaction.id}`, { err: e });
                     }
                 }
             }
         });
 
-        this.client.on('debug', (info) => console.log(`[DEBUG] ${info}`));
-        this.client.on('warn', (info) => console.warn(`[WARN] ${info}`));
-        this.client.on('error', (error) => console.error(`[ERROR] ${error.message}`));
+        // Gateway debug output is mostly heartbeats. Only listen when it is enabled at all,
+        // and then keep one heartbeat line in HEARTBEAT_LOG_SAMPLE.
+        if (gatewayLog.isEnabled('debug')) {
+            let heartbeats = 0;
+            this.client.on('debug', (info) => {
+                if (/heartbeat/i.test(info) && heartbeats++ % HEARTBEAT_LOG_SAMPLE !== 0) {
+                    return;
+                }
+                gatewayLog.debug(info);
+            });
+        }
+        this.client.on('warn', (info) => gatewayLog.warn(info));
+        this.client.on('error', (error) => gatewayLog.error(error.message, { err: error }));
 
         const token = process.env.DISCORD_TOKEN;
         if (!token) {
@@ -71,192 +159,625 @@ export class Bot {
     }
 
     public async shutdown(): Promise<void> {
-        console.log('Shutting down bot gracefully...');
+        log.info('Shutting down bot gracefully...');
         await this.scraper.close();
+        this.poller.stop();
+        this.outbox.stop();
+        await this.queue.stop();
         this.client.destroy();
     }
 
     private scheduleTourCheck(): void {
-        // Schedule to run every 4 hours
-        cron.schedule('0 */4 * * *', () => this.checkTours('scheduled'));
-        console.log('Scheduled tour check to run every 4 hours.');
+        // Polls more often after new shows and in announcement windows, less often when quiet.
+        // Resumes the cadence saved before the last restart and catches up on a missed check.
+        this.poller.start().catch(error => log.error('Failed to start tour check scheduler', { err: error }));
+    }
+
+    /**
+     * Every tour check, whatever triggered it, runs as a job so its state can be tracked.
+     * Requests that arrive while a check is queued or running join it instead of starting
+     * another one; their channel is added to the ones that get the status message.
+     */
+    private submitTourCheck(source: 'manual' | 'scheduled', channelId?: string): Job {
+        const active = this.activeTourCheck;
+        if (active && (active.job.state === 'queued' || active.job.state === 'running')) {
+            if (channelId) {
+                active.channelIds.add(channelId);
+            }
+            log.info(`submitTourCheck: Joining ${source} request to tour check job ${active.job.id}.`);
+            return active.job;
+        }
+
+        const channelIds = new Set<string>(channelId ? [channelId] : []);
+        const job = this.jobs.submit(`${source} tour check`, () => this.checkTours(source, channelIds), channelId);
+        this.activeTourCheck = { job, channelIds };
+        return job;
     }
 
-    private async checkTours(source: 'manual' | 'scheduled', channelId?: string): Promise<void> {
-        console.log(`checkTours: Starting tour check from ${source} source.`);
+    private async checkTours(source: 'manual' | 'scheduled', channelIds: Set<string>): Promise<string> {
+        log.info(`checkTours: Starting tour check from ${source} source.`);
         let statusMessage = '';
         try {
-            const scrapedConcerts = await this.scraper.scrapeTourDates();
-            const savedConcerts = await this.database.getConcerts();
-
-            // Create a set of unique keys for existing concerts for efficient lookup.
-            // A key is a combination of venue and date (YYYY-MM-DD).
-            const existingConcertKeys = new Set(savedConcerts.map(concert => {
-                // The date from the DB might be a full timestamp. We only want the date part in UTC.
-                const date = new Date(concert.date).toISOString().split('T')[0];
-                return `${concert.venue.trim()}|${date}`;
-            }));
+            const scrapeResult = await this.scraper.scrapeTourDates();
+            if (scrapeResult.failedSources.length > 0 && scrapeResult.failedSources.length === this.scraper.sourceCount) {
+                throw new Error(`All ${scrapeResult.failedSources.length} tour source(s) failed to fetch.`);
+            }
+            if (scrapeResult.notModified || scrapeResult.unchanged) {
+                // Count the skip and credit it with what the last full diff cost.
+                if (scrapeResult.notModified) {
+                    this.skipStats.notModified++;
+                } else {
+                    this.skipStats.unchanged++;
+                }
+                this.skipStats.timeSavedMs += this.skipStats.lastDiffMs;
+                tourCheckSkips.inc({ reason: scrapeResult.notModified ? 'not_modified' : 'fingerprint' });
+                tourCheckTimeSaved.inc(undefined, this.skipStats.lastDiffMs / 1000);
+                this.scraper.acknowledge();
+                log.info(`checkTours: Tour feed unchanged (${scrapeResult.notModified ? '304' : 'fingerprint match'}). Skipping database diff. ` +
+                    `Skipped ${this.skipStats.notModified + this.skipStats.unchanged} runs so far, saving ~${this.skipStats.timeSavedMs}ms.`);
+                statusMessage = 'Scrape complete. Tour feed unchanged since the last check.';
+                return statusMessage;
+            }
 
-            const newConcerts = scrapedConcerts.filter(scrapedConcert => {
-                // The scraped date is already in YYYY-MM-DD format.
-                const key = `${scrapedConcert.venue.trim()}|${scrapedConcert.date}`;
-                return !existingConcertKeys.has(key);
-            });
+            if (scrapeResult.failedSources.length > 0) {
+                log.warn(`checkTours: ${scrapeResult.failedSources.length} tour source(s) failed: ${scrapeResult.failedSources.join(', ')}`);
+            }
 
-            // Sort new concerts by date in ascending order before processing
-            newConcerts.sort((a, b) => new Date(a.date).getTime() - new Date(b.date).getTime());
+            const scrapedConcerts = scrapeResult.concerts;
+            // A tour that comes back empty is more likely a feed glitch than every show being cancelled.
+            const nonEmptySources = new Set(scrapedConcerts.map(concert => concert.source));
+            const fullSources = scrapeResult.changedSources.filter(source => nonEmptySources.has(source));
+            if (fullSources.length < scrapeResult.changedSources.length) {
+                log.warn(`checkTours: ${scrapeResult.changedSources.length - fullSources.length} tour source(s) returned no events; not treating their shows as removed.`);
+            }
 
-            if (newConcerts.length > 0) {
-                console.log(`checkTours: Found ${newConcerts.length} new concerts.`);
-                await this.database.saveConcerts(newConcerts);
-                await this.postConcerts(newConcerts);
-                statusMessage = `Scrape complete. Found and posted ${newConcerts.length} new concerts.`;
-            } else {
-                console.log('checkTours: No new concerts found.');
+            const diffStartedAt = Date.now();
+            const existing = await this.database.findExistingKeys(scrapedConcerts);
+            const active = await this.database.findActiveBySource(fullSources);
+            const diff = diffConcerts(scrapedConcerts, existing, active);
+            this.skipStats.lastDiffMs = Date.now() - diffStartedAt;
+            concertsSeen.inc({ result: 'new' }, diff.added.length);
+            concertsSeen.inc({ result: 'changed' }, diff.changed.length);
+            concertsSeen.inc({ result: 'removed' }, diff.removed.length);
+            concertsSeen.inc({ result: 'duplicate' }, diff.unchanged + diff.rehashed.length);
+
+            for (const { concert, changes, reinstated } of diff.changed) {
+                const fields = changes.map(change => `${change.field}: ${change.before} -> ${change.after}`);
+                log.info(`checkTours: Concert ${concert.id} changed${reinstated ? ' (reinstated)' : ''}: ${fields.join('; ') || 'no field changes'}.`);
+            }
+            for (const concert of diff.removed) {
+                log.info(`checkTours: Concert ${concert.id} (${concert.venue}, ${concert.date}) was removed from tour ${concert.source}.`);
+            }
+
+            let unsaved = 0;
+            let announced = 0;
+            let changedSaved: Concert[] = [];
+            if (diff.added.length > 0 || diff.changed.length > 0 || diff.removed.length > 0) {
+                log.info(`checkTours: ${diff.added.length} new, ${diff.changed.length} changed and ${diff.removed.length} removed concerts.`);
+                this.poller.notifyChange();
+            }
+            // Saving also records field hashes, which is all that happens for rows stored before they existed.
+            // New concerts get their outbox entry in the same transaction, so a saved show is always announced.
+            const toSave = [...diff.added, ...diff.changed.map(change => change.concert), ...diff.rehashed];
+            if (toSave.length > 0) {
+                const saveResult = await this.database.saveConcerts(toSave, new Set(diff.added.map(concert => concert.id)));
+                unsaved = saveResult.failed.length;
+                // Whatever was not saved is still new next run and gets retried then.
+                const savedIds = new Set(saveResult.saved.map(concert => concert.id));
+                announced = diff.added.filter(concert => savedIds.has(concert.id)).length;
+                changedSaved = diff.changed.map(change => change.concert).filter(concert => savedIds.has(concert.id));
+            }
+            if (diff.removed.length > 0) {
+                await this.database.markCancelled(diff.removed.map(concert => concert.id));
+            }
+            // The changes are saved by now and will not show up again, so a failed edit is not worth failing the run over.
+            let edits = 0;
+            try {
+                edits = await this.editAnnouncements(changedSaved, diff.removed);
+            } catch (error) {
+                log.error('checkTours: Could not edit earlier announcements', { err: error });
+            }
+            // Anything that fails to go out here stays in the outbox for the next dispatch.
+            if (announced > 0) {
+                try {
+                    await this.outbox.dispatch();
+                } catch (error) {
+                    log.error('checkTours: Could not dispatch announcements, leaving them in the outbox', { err: error });
+                }
+            }
+
+            if (diff.added.length === 0 && diff.changed.length === 0 && diff.removed.length === 0) {
+                log.info('checkTours: No new concerts found.');
                 statusMessage = 'Scrape complete. No new concerts found.';
+            } else {
+                statusMessage = 'Scrape complete.';
+                if (diff.added.length > 0) {
+                    statusMessage += announced === diff.added.length
+                        ? ` Found ${diff.added.length} new concerts and queued their announcements.`
+                        : ` Found ${diff.added.length} new concerts and queued announcements for ${announced} of them.`;
+                }
+                if (diff.changed.length > 0) {
+                    statusMessage += ` ${diff.changed.length} concerts changed.`;
+                }
+                if (diff.removed.length > 0) {
+                    statusMessage += ` ${diff.removed.length} concerts were removed from the tour.`;
+                }
+                if (edits > 0) {
+                    statusMessage += ` Queued edits to ${edits} earlier announcements.`;
+                }
+            }
+            if (unsaved > 0) {
+                statusMessage += ` ${unsaved} concerts could not be saved and will be retried next time.`;
+            }
+            if (scrapeResult.failedSources.length > 0) {
+                statusMessage += ` (${scrapeResult.failedSources.length} tour source(s) could not be fetched and will be retried next time.)`;
+            }
+            // Leaving the feed unacknowledged makes the next run diff it again instead of skipping it as unchanged.
+            if (unsaved === 0) {
+                this.scraper.acknowledge();
             }
         } catch (error) {
-            console.error('Error checking tours:', error);
+            log.error('Error checking tours', { err: error });
             statusMessage = 'An error occurred while checking for tours. Please check the logs.';
+            throw error;
         } finally {
-            console.log('checkTours: Finished tour check.');
-            if (source === 'manual' && channelId) {
+            log.info('checkTours: Finished tour check.');
+            // Stop accepting joiners, then read the set, so every channel that joined gets its status.
+            if (this.activeTourCheck?.channelIds === channelIds) {
+                this.activeTourCheck = null;
+            }
+            await Promise.all([...channelIds].map(async channelId => {
                 try {
-                    const channel = await this.client.channels.fetch(channelId);
-                    if (channel?.isTextBased()) {
-                        await channel.send(statusMessage);
-                    }
+                    const channel = await this.channels.resolveSendable(channelId);
+                    const endSend = discordSendDuration.startTimer();
+                    await channel.send(statusMessage);
+                    endSend();
                 } catch (e) {
-                    console.error(`Failed to send status update to channel ${channelId}:`, e);
+                    log.error(`Failed to send status update to channel ${channelId}`, { err: e });
                 }
-            }
+            }));
+        }
+        return statusMessage;
+    }
+
+    // The channels that get announcements: the subscriptions, plus DISCORD_CHANNEL_ID for every show if it is set.
+    private async getAnnouncementTargets(): Promise<Subscription[]> {
+        const subscriptions = await this.database.getSubscriptions();
+        const defaultChannelId = process.env.DISCORD_CHANNEL_ID;
+        if (defaultChannelId && !subscriptions.some(subscription => subscription.channelId === defaultChannelId)) {
+            subscriptions.push({ guildId: '', channelId: defaultChannelId, filters: {} });
         }
+        return subscriptions;
+    }
+
+    private renderAnnouncements(concerts: Concert[]): RenderedAnnouncement[] {
+        const messages = this.postMode === 'batched'
+            ? buildAnnouncementBatches(concerts).map(batch => ({
+                payload: { content: batch.content || undefined, embeds: batch.embeds.map(embed => embed.toJSON()) },
+                concertIds: batch.concertIds,
+            }))
+            : concerts.map(concert => ({ payload: { content: renderConcertMessage(concert) }, concertIds: [concert.id] }));
+        return messages.map(message => ({ ...message, contentHash: hashPayload(message.payload) }));
     }
 
-    private async postConcerts(concerts: Concert[]): Promise<void> {
-        console.log(`postConcerts: Attempting to post ${concerts.length} concerts.`);
-        const channelId = process.env.DISCORD_CHANNEL_ID;
-        if (!channelId) {
-            throw new Error('DISCORD_CHANNEL_ID is not defined in the environment variables.');
+    /**
+     * Queues announcements of `concerts` in every subscribed channel, each getting
+     * the shows its filters match, except where a show was already posted or is
+     * still waiting in the send queue. Messages are rendered once per distinct set
+     * of shows and shared by all channels that get that set; the queue then sends
+     * to the channels in parallel within its per-channel and global budgets.
+     * Channels the bot can no longer post in are skipped.
+     */
+    private async postConcerts(concerts: Concert[]): Promise<PostResult> {
+        log.info(`postConcerts: Queueing ${concerts.length} concerts for posting.`);
+        const targets = await this.getAnnouncementTargets();
+        if (targets.length === 0) {
+            // Nothing will ever report these delivered, so close their outbox entries. The DMs go out regardless.
+            log.warn('postConcerts: No channels are subscribed to announcements. Use /subscribe or set DISCORD_CHANNEL_ID.');
+            return { queued: [], complete: concerts.map(concert => concert.id) };
         }
 
-        const channel = await this.client.channels.fetch(channelId);
-        if (!channel || !(channel instanceof TextChannel)) {
-            throw new Error(`Could not find channel with ID ${channelId}, or it is not a text channel.`);
+        // Resolve every channel before queueing anything. Only channels that are gone for
+        // good are skipped; any other failure is thrown so the whole post is retried.
+        const usable = (await Promise.all(targets.map(async target => {
+            try {
+                await this.channels.resolveSendable(target.channelId);
+                return target;
+            } catch (error) {
+                if (!(error instanceof ChannelUnavailableError)) {
+                    throw error;
+                }
+                log.warn(`postConcerts: Skipping channel ${target.channelId}${target.guildId ? ` of guild ${target.guildId}` : ''}`, { err: error });
+                return null;
+            }
+        }))).filter((target): target is Subscription => target !== null);
+        if (usable.length === 0) {
+            throw new Error(`None of the ${targets.length} subscribed channels can be posted in.`);
         }
 
-        for (const concert of concerts) {
-            // Re-format the date to be more readable, e.g., "September 17, 2025"
-            const date = new Date(`${concert.date}T12:00:00Z`); // Use noon UTC to avoid timezone issues
-            const formattedDate = date.toLocaleDateString('en-US', { 
-                year: 'numeric', 
-                month: 'long', 
-                day: 'numeric',
-                timeZone: 'UTC' 
+        // The channels each show already has, posted or waiting in the queue.
+        const covered = this.queue.getQueuedAnnouncements();
+        const queuedIds = new Set(covered.keys());
+        for (const record of await this.database.getAnnouncementsForConcerts(concerts.map(concert => concert.id))) {
+            let channels = covered.get(record.concertId);
+            if (!channels) {
+                channels = new Set();
+                covered.set(record.concertId, channels);
+            }
+            channels.add(record.channelId);
+        }
+
+        // Every message carries a dedup key, so retries, overlapping runs and reposts cannot post it twice.
+        const rendered = new Map<string, RenderedAnnouncement[]>(); // By the ids of the shows they announce
+        const deliveries: ChannelRequests[] = [];
+        const queued = new Set<string>();
+        let messageCount = 0;
+        let showDeliveries = 0; // Messages one post per show and channel would have taken
+        for (const target of usable) {
+            const shows = concerts
+                .filter(subscriptionMatcher(target.filters))
+                .filter(concert => !covered.get(concert.id)?.has(target.channelId));
+            if (shows.length === 0) {
+                continue;
+            }
+            const key = shows.map(concert => concert.id).join(',');
+            let messages = rendered.get(key);
+            if (!messages) {
+                messages = this.renderAnnouncements(shows);
+                rendered.set(key, messages);
+            }
+            shows.forEach(concert => queued.add(concert.id));
+            messageCount += messages.length;
+            showDeliveries += shows.length;
+            deliveries.push({
+                channelId: target.channelId,
+                requests: messages.map(message => ({
+                    payload: message.payload,
+                    concertIds: message.concertIds,
+                    dedupKey: dedupKey(target.channelId, message.concertIds, message.payload, message.contentHash),
+                })),
             });
+        }
+        await this.queue.enqueueAll(deliveries);
 
-            const messageParts = [
-                'Goose the Organization has announced a new show!',
-                '',
-                formattedDate,
-                `${concert.venue} | ${concert.location}`
-            ];
+        // Shows that no channel is still waiting for are done, including those no channel asked for.
+        const complete = concerts
+            .filter(concert => !queued.has(concert.id) && !queuedIds.has(concert.id))
+            .map(concert => concert.id);
+
+        log.info(`postConcerts: Queued ${messageCount} messages for ${queued.size} concerts in ${deliveries.length} channels, `
+            + `saving ${showDeliveries - messageCount} API calls; rendered ${rendered.size} times; ${complete.length} concerts have nothing left to send.`);
+        return { queued: [...queued], complete };
+    }
 
-            if (concert.details) {
-                messageParts.push(concert.details);
+    /**
+     * DMs the fans whose /notify areas contain each new show. A show's message is
+     * rendered once and sent to every matching fan through the message queue, so
+     * DMs are paced by its global budget. They carry no concert ids, so delivering
+     * them records no announcements. The outbox calls this once per show, apart
+     * from the channel posts; a failure is thrown so it tries again later.
+     */
+    private async notifyFans(concerts: Concert[]): Promise<number> {
+        if (!this.notifyAreasLoaded) {
+            await this.loadNotifyAreas();
+        }
+        if (this.notifications.size === 0) {
+            return 0;
+        }
+        const deliveries = new Map<string, ChannelRequests>(); // By DM channel
+        for (const concert of concerts) {
+            const fans = this.notifications.match(gazetteer.parseLocation(concert.location));
+            if (fans.size === 0) {
+                continue;
             }
+            const payload = {
+                content: `📍 A new show near you!\n\n${renderConcertMessage(concert)}\n\nUse /notify off to stop these messages.`,
+            };
+            const contentHash = hashPayload(payload);
+            for (const area of fans.values()) {
+                let delivery = deliveries.get(area.dmChannelId);
+                if (!delivery) {
+                    delivery = { channelId: area.dmChannelId, requests: [] };
+                    deliveries.set(area.dmChannelId, delivery);
+                }
+                delivery.requests.push({ payload, dedupKey: dedupKey(area.dmChannelId, [concert.id], payload, contentHash) });
+            }
+        }
+        await this.queue.enqueueAll([...deliveries.values()]);
+        const dms = [...deliveries.values()].reduce((sum, delivery) => sum + delivery.requests.length, 0);
+        log.info(`notifyFans: Queued ${dms} DMs to ${deliveries.size} fans for ${concerts.length} concerts.`);
+        return dms;
+    }
+
+    // Remembers where concerts were announced, so editAnnouncements() can find the posts later
+    // and the outbox knows which channels have them.
+    private async recordAnnouncement(delivery: Delivery): Promise<void> {
+        if (delivery.edited) {
+            return;
+        }
+        await this.database.saveAnnouncements(delivery.concertIds.map((concertId, i) => ({
+            concertId,
+            channelId: delivery.channelId,
+            messageId: delivery.messageId,
+            embedIndex: delivery.embedded ? i : null,
+            updatedAt: null,
+        })));
+    }
 
-            messageParts.push('');
-            messageParts.push(`🎫 tickets: https://link.seated.com/${concert.id}`);
+    /**
+     * Edits the posts that announced changed or cancelled concerts, re-rendering
+     * each affected message whole from the stored concerts. Returns the number of
+     * edits queued. Concerts announced before posts were recorded are skipped.
+     */
+    private async editAnnouncements(changed: Concert[], cancelled: Concert[]): Promise<number> {
+        if (changed.length === 0 && cancelled.length === 0) {
+            return 0;
+        }
+        const affected = await this.database.getAnnouncementsForConcerts([...changed, ...cancelled].map(concert => concert.id));
+        if (affected.length === 0) {
+            return 0;
+        }
+
+        // Mark the changed concerts' posts as updated before rendering, so the marker sticks on later edits.
+        const changedIds = new Set(changed.map(concert => concert.id));
+        const now = new Date().toISOString();
+        const updated = affected.filter(record => changedIds.has(record.concertId)).map(record => ({ ...record, updatedAt: now }));
+        if (updated.length > 0) {
+            await this.database.saveAnnouncements(updated);
+        }
+
+        const records = await this.database.getAnnouncementsForMessages([...new Set(affected.map(record => record.messageId))]);
+        const concerts = new Map((await this.database.getConcertsByIds([...new Set(records.map(record => record.concertId))]))
+            .map(concert => [concert.id, concert]));
+
+        const byMessage = new Map<string, AnnouncementRecord[]>();
+        for (const record of records) {
+            byMessage.set(record.messageId, [...(byMessage.get(record.messageId) ?? []), record]);
+        }
+
+        // The same shows announced in several channels are re-rendered once.
+        const rendered = new Map<string, OutboundPayload>();
+        const edits: ChannelRequests[] = [];
+        for (const [messageId, messageRecords] of byMessage) {
+            if (messageRecords.some(record => !concerts.has(record.concertId))) {
+                log.warn(`editAnnouncements: Message ${messageId} announces concerts that are no longer stored; leaving it as is.`);
+                continue;
+            }
+            const stateOf = (record: AnnouncementRecord) => ({
+                updated: this.updatedMarker && !!record.updatedAt,
+                cancelled: !!concerts.get(record.concertId)!.cancelledAt,
+            });
 
-            const message = messageParts.join('\n');
+            // The header text of a batch is left alone; only the embeds are replaced.
+            const embedded = messageRecords[0].embedIndex !== null;
+            messageRecords.sort((a, b) => (a.embedIndex ?? 0) - (b.embedIndex ?? 0));
+            const renderKey = `${embedded}|${messageRecords.map(record => {
+                const state = stateOf(record);
+                return `${record.concertId}:${state.updated}:${state.cancelled}`;
+            }).join(',')}`;
+            let payload = rendered.get(renderKey);
+            if (!payload) {
+                payload = embedded
+                    ? { embeds: messageRecords.map(record => renderConcertEmbed(concerts.get(record.concertId)!, stateOf(record)).toJSON()) }
+                    : { content: renderConcertMessage(concerts.get(messageRecords[0].concertId)!, stateOf(messageRecords[0])) };
+                rendered.set(renderKey, payload);
+            }
 
-            await channel.send(message);
-            console.log(`postConcerts: Successfully posted announcement for ${concert.venue}.`);
+            edits.push({
+                channelId: messageRecords[0].channelId,
+                requests: [{ payload, editMessageId: messageId, concertIds: messageRecords.map(record => record.concertId) }],
+            });
         }
+        await this.queue.enqueueAll(edits);
+        log.info(`editAnnouncements: Queued ${edits.length} edits for ${changed.length} changed and ${cancelled.length} cancelled concerts.`);
+        return edits.length;
     }
 
+    /**
+     * Syncs the slash commands with Discord, but only when they changed. `ready`
+     * fires again after reconnects, and a bulk overwrite on every one of them
+     * spends a tightly rate-limited endpoint for nothing. Skips outright when the
+     * stored hash matches the current definitions; otherwise compares with what
+     * Discord has registered before overwriting. With DISCORD_COMMANDS_GUILD_ID
+     * the commands are registered in that guild only, where updates show up at once.
+     * Deleting the commands-hash row from bot_state forces a fresh comparison.
+     */
     private async registerCommands(): Promise<void> {
-        const commands = [
-            {
-                name: 'scrape',
-                description: 'Manually trigger a search for new tour dates.',
-            },
-            {
-                name: 'status',
-                description: 'Check the status of the bot.',
-            },
-            {
-                name: 'postbydate',
-                description: 'Post concerts from the database for a specific date (Admin only).',
-                options: [
-                    {
-                        name: 'date',
-                        type: 3, // String
-                        description: 'The date of the concerts to post (YYYY-MM-DD).',
-                        required: true,
-                    },
-                ],
-            },
-        ];
+        const application = this.client.application;
+        if (!application) {
+            return;
+        }
+        const guildId = process.env.DISCORD_COMMANDS_GUILD_ID || undefined;
+        const scope = guildId ? `guild ${guildId}` : 'global';
+        const stateKey = `commands-hash:${guildId ?? 'global'}`;
+        const hash = hashCommands(COMMANDS);
 
         try {
-            console.log('Registering slash commands...');
-            await this.client.application?.commands.set(commands);
-            console.log('Slash commands registered successfully.');
+            if (this.registeredCommands === `${stateKey}=${hash}` || await this.database.getBotState(stateKey) === hash) {
+                this.registeredCommands = `${stateKey}=${hash}`;
+                log.debug(() => `Slash commands (${scope}) unchanged, skipping registration.`);
+                return;
+            }
+
+            const registered = await application.commands.fetch(guildId ? { guildId } : undefined);
+            if (commandsMatch(registered, COMMANDS)) {
+                log.info(`Slash commands (${scope}) already up to date.`);
+            } else {
+                log.info(`Registering slash commands (${scope})...`);
+                await application.commands.set(COMMANDS, guildId);
+                log.info('Slash commands registered successfully.');
+            }
+            await this.database.setBotState(stateKey, hash);
+            this.registeredCommands = `${stateKey}=${hash}`;
         } catch (error) {
-            console.error('Failed to register slash commands:', error);
+            log.error('Failed to register slash commands', { err: error });
         }
     }
 
+    // The first reply to an interaction, timed from when Discord created it.
+    private async ack(interaction: CommandInteraction, options: Parameters<CommandInteraction['reply']>[0]): Promise<void> {
+        await interaction.reply(options);
+        interactionAckDuration.observe((Date.now() - interaction.createdTimestamp) / 1000, { command: interaction.commandName });
+    }
+
     private async handleCommand(interaction: Interaction): Promise<void> {
         if (!interaction.isCommand()) return;
 
         const { commandName } = interaction;
-        console.log(`handleCommand: Processing command '${commandName}'.`);
+        log.debug(() => `handleCommand: Processing command '${commandName}'.`);
 
         if (commandName === 'scrape') {
-            await interaction.reply({ content: '✅ Scrape job received. I will post the results here shortly.', flags: [MessageFlags.Ephemeral] });
-            
-            fetch(`http://localhost:${process.env.PORT || 8080}/scrape-job`, {
-                method: 'POST',
-                headers: { 'Content-Type': 'application/json' },
-                body: JSON.stringify({ channelId: interaction.channelId }),
-            }).catch(e => console.error('Failed to dispatch scrape job to internal server:', e));
+            const job = this.submitTourCheck('manual', interaction.channelId);
+            await this.ack(interaction, { content: `✅ Scrape job \`${job.id}\` received. I will post the results here shortly.`, flags: [MessageFlags.Ephemeral] });
 
         } else if (commandName === 'status') {
-            await interaction.reply({ content: 'Bot is running and operational.', flags: [MessageFlags.Ephemeral] });
+            const checkpoint = this.scraper.getCheckpoint();
+            const skipped = this.skipStats.notModified + this.skipStats.unchanged;
+            const indexStats = this.database.getIndexStats();
+            const lines = [
+                'Bot is running and operational.',
+                `Last successful tour check: ${checkpoint ? checkpoint.checkedAt.toISOString() : 'never'}`,
+                `Unchanged feed skips: ${skipped} (~${Math.round(this.skipStats.timeSavedMs / 1000)}s of database work saved)`,
+                `Concert index: ${indexStats.size} concerts, ${indexStats.hits} hits / ${indexStats.misses} misses`,
+                `Outbound queue: ${this.queue.getStats().pending} messages pending`,
+                `Announcement outbox: ${this.outbox.getBacklog() ?? 'unknown'} announcements not yet posted as of the last dispatch`,
+            ];
+            const polling = this.poller.getState();
+            lines.push(`Polling every ~${Math.round(polling.intervalMs / 60000)} minutes, next check ${polling.nextRunAt ? polling.nextRunAt.toISOString() : 'not scheduled'}` +
+                (polling.overdueMs > 0 ? ` (overdue by ${Math.round(polling.overdueMs / 1000)}s)` : ''));
+            lines.push(`Last successful scheduled check: ${polling.lastSuccessAt ? polling.lastSuccessAt.toISOString() : 'never'}`);
+            const current = this.jobs.current();
+            lines.push(current
+                ? `Current job: ${current.kind} (${current.id}), running since ${current.startedAt!.toISOString()}, ${this.jobs.queued().length} queued`
+                : 'Current job: none');
+            for (const job of this.jobs.recent(3)) {
+                lines.push(`- ${job.kind} ${job.state} at ${job.finishedAt!.toISOString()}${job.error ? `: ${job.error}` : ''}`);
+            }
+            await this.ack(interaction, { content: lines.join('\n'), flags: [MessageFlags.Ephemeral] });
         } else if (commandName === 'postbydate') {
             const adminRoleId = '680100291806363673';
             const member = interaction.member as GuildMember;
 
             if (!member.roles.cache.has(adminRoleId)) {
-                return interaction.reply({ content: 'You do not have permission to use this command.', flags: [MessageFlags.Ephemeral] });
+                return this.ack(interaction, { content: 'You do not have permission to use this command.', flags: [MessageFlags.Ephemeral] });
             }
 
             const date = interaction.options.getString('date', true);
             
             if (!/^\d{4}-\d{2}-\d{2}$/.test(date)) {
-                return interaction.reply({ content: 'Please provide the date in YYYY-MM-DD format.', flags: [MessageFlags.Ephemeral] });
+                return this.ack(interaction, { content: 'Please provide the date in YYYY-MM-DD format.', flags: [MessageFlags.Ephemeral] });
             }
 
-            await interaction.reply({ content: `Searching for concerts on ${date}...`, flags: [MessageFlags.Ephemeral] });
+            await this.ack(interaction, { content: `Searching for concerts on ${date}...`, flags: [MessageFlags.Ephemeral] });
 
             try {
                 const concertsToPost = await this.database.getConcertsByDate(date);
 
                 if (concertsToPost.length > 0) {
-                    await this.postConcerts(concertsToPost);
-                    await interaction.followUp({ content: `Found and posted ${concertsToPost.length} concerts for ${date}.`, flags: [MessageFlags.Ephemeral] });
+                    const channelCount = await this.postConcerts(concertsToPost);
+                    await interaction.followUp({ content: `Found ${concertsToPost.length} concerts for ${date} and queued them for ${channelCount} channels.`, flags: [MessageFlags.Ephemeral] });
                 } else {
                     await interaction.followUp({ content: `No concerts found in the database for ${date}.`, flags: [MessageFlags.Ephemeral] });
                 }
             } catch (error) {
-                console.error(`Error handling postbydate command for date ${date}:`, error);
+                log.error(`Error handling postbydate command for date ${date}`, { err: error });
                 await interaction.followUp({ content: 'An error occurred while fetching concerts from the database.', flags: [MessageFlags.Ephemeral] });
             }
+        } else if (commandName === 'subscribe' || commandName === 'unsubscribe' || commandName === 'subscriptions') {
+            await this.handleSubscriptionCommand(interaction);
+        } else if (commandName === 'notify') {
+            await this.handleNotifyCommand(interaction);
+        }
+        log.debug(() => `handleCommand: Finished processing command '${commandName}'.`);
+    }
+
+    // /subscribe, /unsubscribe and /subscriptions, for the server the command is used in.
+    private async handleSubscriptionCommand(interaction: ChatInputCommandInteraction): Promise<void> {
+        const guildId = interaction.guildId;
+        if (!guildId) {
+            return this.ack(interaction, { content: 'Subscriptions can only be managed in a server.', flags: [MessageFlags.Ephemeral] });
+        }
+
+        if (interaction.commandName === 'subscriptions') {
+            const subscriptions = await this.database.getSubscriptions(guildId);
+            const content = subscriptions.length > 0
+                ? ['New tour dates are posted in:', ...subscriptions.map(subscription => `- <#${subscription.channelId}>: ${describeFilters(subscription.filters)}`)].join('\n')
+                : 'No channels in this server get new tour dates. Use /subscribe to add one.';
+            return this.ack(interaction, { content, flags: [MessageFlags.Ephemeral] });
+        }
+
+        const channelId = interaction.options.getChannel('channel')?.id ?? interaction.channelId;
+        if (interaction.commandName === 'unsubscribe') {
+            const removed = await this.database.deleteSubscription(guildId, channelId);
+            return this.ack(interaction, {
+                content: removed ? `✅ New tour dates will no longer be posted in <#${channelId}>.` : `<#${channelId}> is not subscribed.`,
+                flags: [MessageFlags.Ephemeral],
+            });
+        }
+
+        try {
+            await this.channels.resolveSendable(channelId);
+        } catch (error) {
+            log.warn(`Cannot subscribe channel ${channelId} of guild ${guildId}`, { err: error });
+            return this.ack(interaction, {
+                content: `I cannot post in <#${channelId}>. I need the View Channel, Send Messages and Embed Links permissions there.`,
+                flags: [MessageFlags.Ephemeral],
+            });
+        }
+        const filters = parseFilters(interaction.options.getString('locations'));
+        await this.database.saveSubscription({ guildId, channelId, filters, createdBy: interaction.user.id });
+        log.info(`Channel ${channelId} of guild ${guildId} subscribed to ${describeFilters(filters)}.`);
+        await this.ack(interaction, { content: `✅ New tour dates will be posted in <#${channelId}>: ${describeFilters(filters)}.`, flags: [MessageFlags.Ephemeral] });
+    }
+
+    // /notify near, region, list and off. Areas are per user and work from any server or a DM.
+    private async handleNotifyCommand(interaction: ChatInputCommandInteraction): Promise<void> {
+        const userId = interaction.user.id;
+        const subcommand = interaction.options.getSubcommand();
+
+        if (subcommand === 'list') {
+            const areas = await this.database.getNotifyAreas(userId);
+            const content = areas.length > 0
+                ? ['I DM you about new shows:', ...areas.map(area => `- ${describeArea(area)}`)].join('\n')
+                : 'You get no DMs about new shows. Use /notify near or /notify region to start.';
+            return this.ack(interaction, { content, flags: [MessageFlags.Ephemeral] });
+        }
+
+        if (subcommand === 'off') {
+            const removed = await this.database.deleteNotifyAreas(userId);
+            this.notifications.removeUser(userId);
+            return this.ack(interaction, {
+                content: removed > 0 ? `✅ Removed your ${removed} notify areas. No more DMs about new shows.` : 'You had no notify areas.',
+                flags: [MessageFlags.Ephemeral],
+            });
+        }
+
+        const request = subcommand === 'near'
+            ? radiusArea(gazetteer, userId, interaction.options.getString('place', true), interaction.options.getInteger('miles') ?? DEFAULT_RADIUS_MILES)
+            : regionArea(gazetteer, userId, interaction.options.getString('name', true));
+        if (!request) {
+            return this.ack(interaction, {
+                content: subcommand === 'near'
+                    ? 'I could not find that place. Try a city with its state or province, e.g. "Denver, CO".'
+                    : 'I could not find that region. Try a US state, a Canadian province or a country, e.g. "CO", "Ontario" or "Canada".',
+                flags: [MessageFlags.Ephemeral],
+            });
+        }
+
+        const existing = await this.database.getNotifyAreas(userId);
+        if (existing.length >= NOTIFY_MAX_AREAS && !existing.some(area => area.area === request.area)) {
+            return this.ack(interaction, { content: `You can have up to ${NOTIFY_MAX_AREAS} notify areas. Use /notify off to start over.`, flags: [MessageFlags.Ephemeral] });
         }
-        console.log(`handleCommand: Finished processing command '${commandName}'.`);
+
+        const dmChannel = await interaction.user.createDM();
+        const area: NotifyArea = { ...request, dmChannelId: dmChannel.id };
+        await this.database.saveNotifyArea(area);
+        this.notifications.add(area);
+        log.info(`User ${userId} will be notified about shows ${describeArea(area)}.`);
+        await this.ack(interaction, {
+            content: `✅ I will DM you when a new show is announced ${describeArea(area)}. Make sure you accept DMs from me.`,
+            flags: [MessageFlags.Ephemeral],
+        });
     }
 
     private startHttpServer(): void {
@@ -268,24 +789,50 @@ export class Bot {
         app.post('/scrape-job', (req, res) => {
             const { channelId } = req.body;
             if (!channelId) {
-                console.error('HTTP /scrape-job received without a channelId.');
+                log.error('HTTP /scrape-job received without a channelId.');
                 return res.status(400).send({ error: 'channelId is required' });
             }
             
-            console.log(`HTTP /scrape-job received for channel ${channelId}. Kicking off background scrape.`);
-            res.status(202).send({ message: 'Scrape job accepted.' });
+            const job = this.submitTourCheck('manual', channelId);
+            log.info(`HTTP /scrape-job received for channel ${channelId}. Submitted job ${job.id}.`);
+            res.status(202).send({ message: 'Scrape job accepted.', jobId: job.id });
+        });
 
-            this.checkTours('manual', channelId).catch(error => {
-                console.error('Error during background scrape initiated via HTTP:', error);
-            });
+        app.get('/scrape-job/:id', (req, res) => {
+            const job = this.jobs.get(req.params.id);
+            if (!job) {
+                return res.status(404).send({ error: 'Unknown job id' });
+            }
+            res.status(200).send(job);
+        });
+
+        app.get('/metrics', (req, res) => {
+            res.set('Content-Type', 'text/plain; version=0.0.4').status(200).send(renderMetrics());
         });
 
         app.get('/health', (req, res) => {
-            res.status(200).send({ status: 'ok' });
+            const checkpoint = this.scraper.getCheckpoint();
+            res.status(200).send({
+                status: 'ok',
+                lastCheckAt: checkpoint ? checkpoint.checkedAt.toISOString() : null,
+                feedFingerprint: checkpoint ? checkpoint.fingerprint : null,
+                skippedChecks: {
+                    notModified: this.skipStats.notModified,
+                    unchanged: this.skipStats.unchanged,
+                    timeSavedMs: this.skipStats.timeSavedMs,
+                },
+                concertIndex: this.database.getIndexStats(),
+                outboundQueue: this.queue.getStats(),
+                outbox: { ...this.outbox.getStats(), backlog: this.outbox.getBacklog() },
+                notifyAreas: this.notifications.size,
+                channelCache: this.channels.getStats(),
+                polling: this.poller.getState(),
+                jobs: { current: this.jobs.current(), queued: this.jobs.queued().length, recent: this.jobs.recent() },
+            });
         });
 
         app.listen(port, () => {
-            console.log(`Internal HTTP server listening on port ${port}`);
+            log.info(`Internal HTTP server listening on port ${port}`);
         });
     }
 } 
\ No newline at end of file
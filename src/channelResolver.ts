@@ -0,0 +1,117 @@
+// @ts-nocheck
+import { Client, PermissionFlagsBits, TextBasedChannel } from 'discord.js';
+
+export interface ResolvedChannel {
+    channel: TextBasedChannel;
+    canSend: boolean; // Whether the bot may view the channel, send messages and embed links in it
+}
+
+// Raised when a channel is missing, not text based, or the bot cannot post there. Retrying will not help.
+export class ChannelUnavailableError extends Error {}
+
+const REQUIRED_PERMISSIONS = [
+    PermissionFlagsBits.ViewChannel,
+    PermissionFlagsBits.SendMessages,
+    PermissionFlagsBits.EmbedLinks,
+];
+
+// How long a resolved channel and its permissions are trusted. The bot's own role
+// changes are not delivered with the Guilds intent alone, so they show up only here,
+// or sooner when a send fails for missing access (see MessageQueue).
+const CHANNEL_CACHE_TTL_MS = (Number(process.env.CHANNEL_CACHE_TTL_SECONDS) || 600) * 1000;
+
+interface CacheEntry {
+    resolved: Promise<ResolvedChannel>;
+    expiresAt: number;
+}
+
+/**
+ * Resolves channel ids to text channels and remembers the result together with
+ * the bot's send permissions for CHANNEL_CACHE_TTL_MS. Entries are dropped
+ * earlier when Discord tells us the channel, its guild or one of its roles
+ * changed, or when a send is refused.
+ */
+export class ChannelResolver {
+    private readonly client: Client;
+    private cache = new Map<string, CacheEntry>();
+    private stats = { hits: 0, misses: 0, invalidations: 0 };
+
+    constructor(client: Client) {
+        this.client = client;
+
+        this.client.on('channelDelete', channel => this.invalidate(channel.id));
+        this.client.on('channelUpdate', (_, channel) => this.invalidate(channel.id));
+        this.client.on('threadDelete', thread => this.invalidate(thread.id));
+        this.client.on('guildDelete', guild => this.invalidateGuild(guild.id));
+        this.client.on('roleUpdate', (_, role) => this.invalidateGuild(role.guild.id));
+        this.client.on('roleDelete', role => this.invalidateGuild(role.guild.id));
+    }
+
+    async resolve(channelId: string): Promise<ResolvedChannel> {
+        const cached = this.cache.get(channelId);
+        if (cached && cached.expiresAt > Date.now()) {
+            this.stats.hits++;
+            return cached.resolved;
+        }
+
+        this.stats.misses++;
+        const entry = { resolved: this.lookup(channelId), expiresAt: Date.now() + CHANNEL_CACHE_TTL_MS };
+        this.cache.set(channelId, entry);
+        // Failed lookups are not cached so the next call tries again.
+        entry.resolved.catch(() => {
+            if (this.cache.get(channelId) === entry) {
+                this.cache.delete(channelId);
+            }
+        });
+        return entry.resolved;
+    }
+
+    /**
+     * Like resolve(), but throws ChannelUnavailableError unless the bot can post in the channel.
+     */
+    async resolveSendable(channelId: string): Promise<TextBasedChannel> {
+        const { channel, canSend } = await this.resolve(channelId);
+        if (!canSend) {
+            throw new ChannelUnavailableError(`Missing permission to post in channel ${channelId}.`);
+        }
+        return channel;
+    }
+
+    invalidate(channelId: string): void {
+        if (this.cache.delete(channelId)) {
+            this.stats.invalidations++;
+        }
+    }
+
+    invalidateGuild(guildId: string): void {
+        for (const [channelId, entry] of this.cache) {
+            entry.resolved.then(({ channel }) => {
+                if ('guildId' in channel && channel.guildId === guildId) {
+                    this.invalidate(channelId);
+                }
+            }).catch(() => undefined);
+        }
+    }
+
+    getStats(): { size: number; hits: number; misses: number; invalidations: number } {
+        return { size: this.cache.size, ...this.stats };
+    }
+
+    private async lookup(channelId: string): Promise<ResolvedChannel> {
+        const channel = await this.client.channels.fetch(channelId).catch(() => null);
+        if (!channel || !channel.isTextBased()) {
+            throw new ChannelUnavailableError(`Could not find channel with ID ${channelId}, or it is not a text channel.`);
+        }
+
+        let canSend = true;
+        if ('permissionsFor' in channel && this.client.user) {
+            // Refetch the bot's member, as its cached roles are not kept up to date without member events.
+            const me = 'guild' in channel
+                ? await channel.guild.members.fetchMe({ force: true }).catch(() => channel.guild.members.me)
+                : null;
+            const permissions = channel.permissionsFor(me ?? this.client.user);
+            canSend = !!permissions && permissions.has(REQUIRED_PERMISSIONS);
+        }
+        return { channel, canSend };
+    }
+} 
\ No newline at end of file
@@ -0,0 +1,75 @@
+// @ts-nocheck
+import { ClientOptions, GatewayIntentBits, Options, Sweepers } from 'discord.js';
+
+// 'lean' keeps only what the bot uses, 'default' is discord.js's defaults with the old intents (see bench/clientMemory.ts).
+export type ClientProfile = 'lean' | 'default';
+
+const MESSAGE_CACHE_SIZE = Number(process.env.DISCORD_MESSAGE_CACHE_SIZE) || 0;
+const MEMBER_CACHE_SIZE = Number(process.env.DISCORD_MEMBER_CACHE_SIZE) || 0;
+const USER_CACHE_SIZE = Number(process.env.DISCORD_USER_CACHE_SIZE) || 100;
+const SWEEP_INTERVAL_SECONDS = Number(process.env.DISCORD_SWEEP_INTERVAL_SECONDS) || 3600;
+const MESSAGE_LIFETIME_SECONDS = Number(process.env.DISCORD_MESSAGE_LIFETIME_SECONDS) || 1800;
+
+// The bot's own member and user are never evicted: permission checks in ChannelResolver need them.
+function isSelf(entity: { id: string; client: { user: { id: string } | null } }): boolean {
+    return entity.id === entity.client.user?.id;
+}
+
+export function clientProfileFromEnv(): ClientProfile {
+    return process.env.DISCORD_CLIENT_PROFILE === 'default' ? 'default' : 'lean';
+}
+
+/**
+ * Options for the Discord client. The bot only handles slash commands, which are
+ * delivered without any intent, so the lean profile subscribes to Guilds alone
+ * (channels, roles and permissions) and caps the caches it never reads: messages
+ * are sent and edited over REST, and interaction members come with the payload.
+ * Sweepers clear whatever does get cached, e.g. users from interactions.
+ */
+export function clientOptions(profile: ClientProfile = 'lean'): ClientOptions {
+    if (profile === 'default') {
+        return {
+            intents: [
+                GatewayIntentBits.Guilds,
+                GatewayIntentBits.GuildMessages,
+                GatewayIntentBits.MessageContent,
+            ],
+        };
+    }
+
+    return {
+        intents: [GatewayIntentBits.Guilds],
+        makeCache: Options.cacheWithLimits({
+            ...Options.DefaultMakeCacheSettings,
+            MessageManager: MESSAGE_CACHE_SIZE,
+            GuildMemberManager: { maxSize: MEMBER_CACHE_SIZE, keepOverLimit: isSelf },
+            UserManager: { maxSize: USER_CACHE_SIZE, keepOverLimit: isSelf },
+            PresenceManager: 0,
+            ReactionManager: 0,
+            ReactionUserManager: 0,
+            ThreadMemberManager: 0,
+            VoiceStateManager: 0,
+            GuildEmojiManager: 0,
+            GuildStickerManager: 0,
+            GuildScheduledEventManager: 0,
+            GuildInviteManager: 0,
+            GuildBanManager: 0,
+            StageInstanceManager: 0,
+            AutoModerationRuleManager: 0,
+        }),
+        sweepers: {
+            ...Options.DefaultSweeperSettings,
+            messages: {
+                interval: SWEEP_INTERVAL_SECONDS,
+                filter: Sweepers.filterByLifetime({
+                    lifetime: MESSAGE_LIFETIME_SECONDS,
+                    getComparisonTimestamp: message => message.editedTimestamp ?? message.createdTimestamp,
+                }),
+            },
+            users: {
+                interval: SWEEP_INTERVAL_SECONDS,
+                filter: () => user => !isSelf(user),
+            },
+        },
+    };
+} 
\ No newline at end of file
@@ -0,0 +1,158 @@
+// @ts-nocheck
+import { createHash } from 'crypto';
+import { ApplicationCommand, ApplicationCommandData, ChannelType, Collection, PermissionFlagsBits } from 'discord.js';
+import { DEFAULT_RADIUS_MILES, MAX_RADIUS_MILES } from './notifications';
+
+// The bot's slash commands, as sent to Discord.
+export const COMMANDS: ApplicationCommandData[] = [
+    {
+        name: 'scrape',
+        description: 'Manually trigger a search for new tour dates.',
+    },
+    {
+        name: 'status',
+        description: 'Check the status of the bot.',
+    },
+    {
+        name: 'postbydate',
+        description: 'Post concerts from the database for a specific date (Admin only).',
+        options: [
+            {
+                name: 'date',
+                type: 3, // String
+                description: 'The date of the concerts to post (YYYY-MM-DD).',
+                required: true,
+            },
+        ],
+    },
+    {
+        name: 'subscribe',
+        description: 'Post new tour dates in a channel of this server.',
+        defaultMemberPermissions: PermissionFlagsBits.ManageGuild,
+        dmPermission: false,
+        options: [
+            {
+                name: 'channel',
+                type: 7, // Channel
+                description: 'The channel to post in (defaults to this one).',
+                channelTypes: [ChannelType.GuildText, ChannelType.GuildAnnouncement],
+                required: false,
+            },
+            {
+                name: 'locations',
+                type: 3, // String
+                description: 'Only shows in these places, comma separated, e.g. "CO, Salt Lake City, Canada".',
+                required: false,
+            },
+        ],
+    },
+    {
+        name: 'unsubscribe',
+        description: 'Stop posting new tour dates in a channel of this server.',
+        defaultMemberPermissions: PermissionFlagsBits.ManageGuild,
+        dmPermission: false,
+        options: [
+            {
+                name: 'channel',
+                type: 7, // Channel
+                description: 'The channel to stop posting in (defaults to this one).',
+                channelTypes: [ChannelType.GuildText, ChannelType.GuildAnnouncement],
+                required: false,
+            },
+        ],
+    },
+    {
+        name: 'subscriptions',
+        description: 'List the channels of this server that get new tour dates.',
+        defaultMemberPermissions: PermissionFlagsBits.ManageGuild,
+        dmPermission: false,
+    },
+    {
+        name: 'notify',
+        description: 'Get a DM when a new show is announced near you.',
+        options: [
+            {
+                name: 'near',
+                type: 1, // Subcommand
+                description: 'Shows within a distance of a place.',
+                options: [
+                    {
+                        name: 'place',
+                        type: 3, // String
+                        description: 'A city, e.g. "Denver, CO".',
+                        required: true,
+                    },
+                    {
+                        name: 'miles',
+                        type: 4, // Integer
+                        description: `How far from the place, up to ${MAX_RADIUS_MILES} (default ${DEFAULT_RADIUS_MILES}).`,
+                        minValue: 10,
+                        maxValue: MAX_RADIUS_MILES,
+                        required: false,
+                    },
+                ],
+            },
+            {
+                name: 'region',
+                type: 1, // Subcommand
+                description: 'Shows in a state, province or country.',
+                options: [
+                    {
+                        name: 'name',
+                        type: 3, // String
+                        description: 'E.g. "CO", "Ontario" or "Canada".',
+                        required: true,
+                    },
+                ],
+            },
+            {
+                name: 'list',
+                type: 1, // Subcommand
+                description: 'List the areas you get DMs for.',
+            },
+            {
+                name: 'off',
+                type: 1, // Subcommand
+                description: 'Stop all new show DMs.',
+            },
+        ],
+    },
+];
+
+function stableStringify(value: unknown): string {
+    if (typeof value === 'bigint') {
+        return JSON.stringify(value.toString()); // Permission flags
+    }
+    if (Array.isArray(value)) {
+        return `[${value.map(stableStringify).join(',')}]`;
+    }
+    if (value && typeof value === 'object') {
+        const entries = Object.keys(value as Record<string, unknown>)
+            .filter(key => (value as Record<string, unknown>)[key] !== undefined)
+            .sort()
+            .map(key => `${JSON.stringify(key)}:${stableStringify((value as Record<string, unknown>)[key])}`);
+        return `{${entries.join(',')}}`;
+    }
+    return JSON.stringify(value);
+}
+
+/**
+ * Hash of command definitions, independent of key and command order.
+ */
+export function hashCommands(commands: ApplicationCommandData[]): string {
+    const sorted = [...commands].sort((a, b) => a.name.localeCompare(b.name));
+    return createHash('sha256').update(stableStringify(sorted)).digest('hex');
+}
+
+/**
+ * Whether the commands registered with Discord are exactly `commands`.
+ */
+export function commandsMatch(registered: Collection<string, ApplicationCommand>, commands: ApplicationCommandData[]): boolean {
+    if (registered.size !== commands.length) {
+        return false;
+    }
+    return commands.every(command => {
+        const existing = registered.find(candidate => candidate.name === command.name);
+        return !!existing && existing.equals(command);
+    });
+} 
\ No newline at end of file
@@ -0,0 +1,29 @@
+// @ts-nocheck
+
+/**
+ * Runs `worker` over `items` with at most `limit` calls in flight at once.
+ * Results come back in input order and a failing item never stops the others.
+ */
+export async function mapWithConcurrency<T, R>(
+    items: T[],
+    limit: number,
+    worker: (item: T, index: number) => Promise<R>,
+): Promise<PromiseSettledResult<R>[]> {
+    const results: PromiseSettledResult<R>[] = new Array(items.length);
+    let next = 0;
+
+    const runWorker = async () => {
+        while (next < items.length) {
+            const index = next++;
+            try {
+                results[index] = { status: 'fulfilled', value: await worker(items[index], index) };
+            } catch (reason) {
+                results[index] = { status: 'rejected', reason };
+            }
+        }
+    };
+
+    const workers = Array.from({ length: Math.max(1, Math.min(limit, items.length)) }, runWorker);
+    await Promise.all(workers);
+    return results;
+} 
\ No newline at end of file
@@ -1,11 +1,246 @@
 // @ts-nocheck
+import { createHash } from 'crypto';
 import { createClient, SupabaseClient } from '@supabase/supabase-js';
 import { Concert } from './scraper';
+import { mapWithConcurrency } from './concurrency';
+import { gazetteer } from './gazetteer';
+import { createLogger } from './logger';
+import { supabaseQueryDuration } from './metrics';
+
+const log = createLogger('database');
+
+// How many scraped concerts are looked up per request in findExistingKeys.
+const DIFF_PAGE_SIZE = Number(process.env.DB_DIFF_PAGE_SIZE) || 100;
+
+// How long the in-memory concert index is trusted before a full reload.
+const INDEX_TTL_MS = (Number(process.env.CONCERT_INDEX_TTL_MINUTES) || 60) * 60 * 1000;
+// How often a cheap row-count probe checks for writes made outside this process.
+const INDEX_PROBE_MS = (Number(process.env.CONCERT_INDEX_PROBE_SECONDS) || 300) * 1000;
+// Rows fetched per request when loading the index (PostgREST caps responses at 1000 by default).
+const INDEX_LOAD_PAGE_SIZE = 1000;
+
+// Rows per upsert request in saveConcerts, and how many of those requests run at once.
+const SAVE_CHUNK_SIZE = Number(process.env.DB_SAVE_CHUNK_SIZE) || 500;
+const SAVE_CONCURRENCY = Number(process.env.DB_SAVE_CONCURRENCY) || 4;
+// Attempts per chunk before it is reported as failed, backing off exponentially from SAVE_RETRY_BASE_MS.
+const SAVE_MAX_ATTEMPTS = Number(process.env.DB_SAVE_MAX_ATTEMPTS) || 3;
+const SAVE_RETRY_BASE_MS = 500;
+// Rows per request when reading subscriptions and notify areas.
+const SUBSCRIPTION_PAGE_SIZE = 1000;
+
+export interface SchedulerState {
+    lastSuccessAt: Date | null;
+    nextDueAt: Date | null;
+    intervalMs: number;
+    lastChangeAt: Date | null;
+}
+
+export interface SaveResult {
+    saved: Concert[];
+    failed: Concert[]; // Concerts in chunks that still failed after retrying
+    errors: string[]; // One per failed chunk
+}
+
+// The concert fields whose changes are tracked, each hashed separately.
+export const TRACKED_FIELDS = ['venue', 'location', 'date', 'details'] as const;
+export type TrackedField = typeof TRACKED_FIELDS[number];
+export type FieldHashes = Record<TrackedField, string>;
+
+// A concert as stored, with the columns used by the tour diff.
+export interface StoredConcert extends Concert {
+    fieldHashes: FieldHashes | null; // Null for rows saved before field hashes were introduced
+    cancelledAt: string | null;
+}
+
+// A Discord message announcing a concert, see the announcements table.
+export interface AnnouncementRecord {
+    concertId: string;
+    channelId: string;
+    messageId: string;
+    embedIndex: number | null; // Position of the concert's embed in the message, null for a plain-text post
+    updatedAt: string | null; // Set once the post was edited for a change to the concert
+}
+
+// A concert whose announcement has not been confirmed yet, see the announcement_outbox table.
+export interface OutboxEntry {
+    concertId: string;
+    attempts: number; // Times it was handed to the send queue
+    createdAt: string;
+}
+
+// Which shows a subscribed channel gets. Empty filters match every show.
+export interface SubscriptionFilters {
+    locations?: string[]; // Places matched against the concert location, see subscriptionMatcher()
+}
+
+// A channel that gets announcements, see the subscriptions table.
+export interface Subscription {
+    guildId: string;
+    channelId: string;
+    filters: SubscriptionFilters;
+    createdBy?: string;
+}
+
+// An area a fan gets DMs for, see the notify_areas table and notifications.ts.
+export interface NotifyArea {
+    userId: string;
+    area: string; // Normalized key, see regionArea() and radiusArea()
+    label: string;
+    dmChannelId: string;
+    country: string | null;
+    region: string | null; // Null for a whole country
+    latitude: number | null; // Center of a radius area
+    longitude: number | null;
+    radiusKm: number | null; // Null for a region area
+}
+
+export interface ExistingConcertKeys {
+    ids: Set<string>;
+    keys: Set<string>; // venue|date keys, see concertKey()
+    stored: Map<string, StoredConcert>; // Stored records of the scraped concerts, by id
+}
+
+/**
+ * Builds the venue|date key used to decide whether a concert is already known.
+ * The date from the DB might be a full timestamp, so only the UTC date part is used.
+ */
+export function concertKey(concert: Pick<Concert, 'venue' | 'date'>): string {
+    return `${concert.venue.trim()}|${dateOnly(concert.date)}`;
+}
+
+/**
+ * Hashes each tracked field of a concert. Values are normalized first, so only
+ * changes that would show in an announcement count.
+ */
+export function hashFields(concert: Concert): FieldHashes {
+    const hashes = {} as FieldHashes;
+    for (const field of TRACKED_FIELDS) {
+        const value = field === 'date' ? dateOnly(concert.date) : (concert[field] ?? '').trim();
+        hashes[field] = createHash('sha1').update(value).digest('hex').slice(0, 16);
+    }
+    return hashes;
+}
+
+// Columns read back for StoredConcert.
+const STORED_COLUMNS = 'id, venue, location, date, details, source, field_hashes, cancelled_at';
+
+function fromRow(row: any): StoredConcert {
+    return {
+        id: row.id,
+        venue: row.venue,
+        location: row.location,
+        date: row.date,
+        details: row.details ?? undefined,
+        source: row.source ?? undefined,
+        fieldHashes: row.field_hashes ?? null,
+        cancelledAt: row.cancelled_at ?? null,
+    };
+}
+
+// Postgres data exceptions (22), constraint violations (23) and syntax or schema errors (42)
+// come from the rows themselves, so sending the same chunk again cannot help.
+function isPermanentError(error: { code?: string }): boolean {
+    return /^(22|23|42)/.test(error.code || '');
+}
+
+// An unparseable date is kept as is rather than thrown on, so one bad row cannot break a whole diff.
+function dateOnly(date: string): string {
+    const parsed = new Date(date);
+    return Number.isNaN(parsed.getTime()) ? String(date).trim() : parsed.toISOString().split('T')[0];
+}
+
+/**
+ * In-memory index of every stored concert, by id, by venue|date key, by date and by source.
+ */
+class ConcertIndex {
+    private byId = new Map<string, StoredConcert>();
+    private byKey = new Map<string, Set<string>>(); // venue|date -> ids
+    private byDate = new Map<string, Set<string>>(); // YYYY-MM-DD -> ids
+    private bySource = new Map<string, Set<string>>(); // Seated tour id -> ids
+
+    get size(): number {
+        return this.byId.size;
+    }
+
+    replaceAll(concerts: StoredConcert[]): void {
+        this.byId.clear();
+        this.byKey.clear();
+        this.byDate.clear();
+        this.bySource.clear();
+        concerts.forEach(concert => this.upsert(concert));
+    }
+
+    upsert(concert: StoredConcert): void {
+        const previous = this.byId.get(concert.id);
+        if (previous) {
+            this.removeFrom(this.byKey, concertKey(previous), previous.id);
+            this.removeFrom(this.byDate, dateOnly(previous.date), previous.id);
+            if (previous.source) {
+                this.removeFrom(this.bySource, previous.source, previous.id);
+            }
+        }
+        this.byId.set(concert.id, concert);
+        this.addTo(this.byKey, concertKey(concert), concert.id);
+        this.addTo(this.byDate, dateOnly(concert.date), concert.id);
+        if (concert.source) {
+            this.addTo(this.bySource, concert.source, concert.id);
+        }
+    }
+
+    get(id: string): StoredConcert | undefined {
+        return this.byId.get(id);
+    }
+
+    hasKey(key: string): boolean {
+        return this.byKey.has(key);
+    }
+
+    getByDate(date: string): StoredConcert[] {
+        const ids = this.byDate.get(date);
+        return ids ? [...ids].map(id => this.byId.get(id)!) : [];
+    }
+
+    getActiveBySource(source: string): StoredConcert[] {
+        const ids = this.bySource.get(source);
+        return ids ? [...ids].map(id => this.byId.get(id)!).filter(concert => !concert.cancelledAt) : [];
+    }
+
+    private addTo(map: Map<string, Set<string>>, key: string, id: string): void {
+        let ids = map.get(key);
+        if (!ids) {
+            ids = new Set();
+            map.set(key, ids);
+        }
+        ids.add(id);
+    }
+
+    private removeFrom(map: Map<string, Set<string>>, key: string, id: string): void {
+        const ids = map.get(key);
+        if (ids) {
+            ids.delete(id);
+            if (ids.size === 0) {
+                map.delete(key);
+            }
+        }
+    }
+}
 
 export class DatabaseService {
     private client: SupabaseClient;
 
-    constructor() {
+    private index = new ConcertIndex();
+    private indexLoadedAt = 0; // 0 until the first successful load
+    private indexProbedAt = 0;
+    private indexLoading: Promise<void> | null = null;
+    private indexStats = { hits: 0, misses: 0, reloads: 0 };
+
+    // A client can be passed in to run against a stand-in, e.g. in benchmarks.
+    constructor(client?: SupabaseClient) {
+        if (client) {
+            this.client = client;
+            return;
+        }
+
         const supabaseUrl = process.env.SUPABASE_URL;
         const supabaseKey = process.env.SUPABASE_KEY;
 
@@ -16,56 +251,709 @@ export class DatabaseService {
         this.client = createClient(supabaseUrl, supabaseKey);
     }
 
-    async getConcerts(): Promise<Concert[]> {
-        console.log('Database: Fetching concerts.');
-        const { data, error } = await this.client
-            .from('concerts')
-            .select('*');
+    // Records the latency of a Supabase query under the DatabaseService method that issued it.
+    private async timed<T>(method: string, query: PromiseLike<T>): Promise<T> {
+        const end = supabaseQueryDuration.startTimer({ method });
+        try {
+            return await query;
+        } finally {
+            end();
+        }
+    }
 
-        if (error) {
-            console.error('Error fetching concerts:', error);
+    /**
+     * Loads every stored concert into the in-memory index. Called once at startup;
+     * afterwards the index is kept current by saveConcerts and reloaded when its
+     * TTL expires or a write from outside this process is detected.
+     */
+    async loadIndex(): Promise<void> {
+        if (this.indexLoading) {
+            return this.indexLoading;
+        }
+
+        this.indexLoading = (async () => {
+            log.info('Loading concert index.');
+            const concerts: StoredConcert[] = [];
+            for (let from = 0; ; from += INDEX_LOAD_PAGE_SIZE) {
+                const { data, error } = await this.timed('loadIndex', this.client
+                    .from('concerts')
+                    .select(STORED_COLUMNS)
+                    .order('id')
+                    .range(from, from + INDEX_LOAD_PAGE_SIZE - 1));
+
+                if (error) {
+                    throw new Error(`Failed to load concert index: ${error.message}`);
+                }
+                concerts.push(...data.map(fromRow));
+                if (data.length < INDEX_LOAD_PAGE_SIZE) {
+                    break;
+                }
+            }
+
+            this.index.replaceAll(concerts);
+            this.indexLoadedAt = this.indexProbedAt = Date.now();
+            this.indexStats.reloads++;
+            log.info(`Concert index loaded with ${this.index.size} concerts.`);
+        })().finally(() => {
+            this.indexLoading = null;
+        });
+
+        return this.indexLoading;
+    }
+
+    getIndexStats(): { hits: number; misses: number; reloads: number; size: number; loadedAt: Date | null } {
+        return {
+            ...this.indexStats,
+            size: this.index.size,
+            loadedAt: this.indexLoadedAt ? new Date(this.indexLoadedAt) : null,
+        };
+    }
+
+    /**
+     * Makes sure the index can be trusted, reloading it when the TTL has expired or
+     * the table's row count no longer matches. Returns false if it is unavailable,
+     * in which case callers fall back to querying the database.
+     */
+    private async ensureIndex(): Promise<boolean> {
+        const now = Date.now();
+        try {
+            if (!this.indexLoadedAt || now - this.indexLoadedAt > INDEX_TTL_MS) {
+                await this.loadIndex();
+            } else if (now - this.indexProbedAt > INDEX_PROBE_MS) {
+                this.indexProbedAt = now;
+                const { count, error } = await this.timed('probeIndex', this.client
+                    .from('concerts')
+                    .select('id', { count: 'exact', head: true }));
+
+                if (error) {
+                    throw new Error(error.message);
+                }
+                if (count !== this.index.size) {
+                    log.info(`Detected external write (${count} rows, ${this.index.size} indexed). Reloading index.`);
+                    await this.loadIndex();
+                }
+            }
+            return true;
+        } catch (error) {
+            log.error('Concert index unavailable, falling back to queries', { err: error });
+            this.indexLoadedAt = 0;
+            return false;
+        }
+    }
+
+    /**
+     * Returns which of the scraped concerts are already stored, by id and by
+     * venue|date key, along with their stored records. Answered from the
+     * in-memory index when it is available.
+     */
+    async findExistingKeys(scraped: Concert[]): Promise<ExistingConcertKeys> {
+        if (await this.ensureIndex()) {
+            this.indexStats.hits++;
+            const existing: ExistingConcertKeys = { ids: new Set(), keys: new Set(), stored: new Map() };
+            for (const concert of scraped) {
+                const stored = this.index.get(concert.id);
+                if (stored) {
+                    existing.ids.add(concert.id);
+                    existing.stored.set(concert.id, stored);
+                }
+                const key = concertKey(concert);
+                if (this.index.hasKey(key)) {
+                    existing.keys.add(key);
+                }
+            }
+            return existing;
+        }
+
+        this.indexStats.misses++;
+        return this.queryExistingKeys(scraped);
+    }
+
+    /**
+     * Looks up which of the scraped concerts are already stored, matching either
+     * their id or their date. Only the key columns are selected and the input is
+     * paged, so the cost follows the size of the feed rather than the table.
+     */
+    private async queryExistingKeys(scraped: Concert[]): Promise<ExistingConcertKeys> {
+        log.debug(() => `Looking up existing keys for ${scraped.length} scraped concerts.`);
+        const existing: ExistingConcertKeys = { ids: new Set(), keys: new Set(), stored: new Map() };
+        const quote = (value: string) => `"${value.replace(/"/g, '\\"')}"`;
+
+        for (let offset = 0; offset < scraped.length; offset += DIFF_PAGE_SIZE) {
+            const page = scraped.slice(offset, offset + DIFF_PAGE_SIZE);
+            const ids = [...new Set(page.map(c => c.id))].map(quote).join(',');
+            const dates = [...new Set(page.map(c => c.date))].map(quote).join(',');
+
+            const { data, error } = await this.timed('findExistingKeys', this.client
+                .from('concerts')
+                .select(STORED_COLUMNS)
+                .or(`id.in.(${ids}),date.in.(${dates})`));
+
+            if (error) {
+                log.error('Error looking up existing concerts', { err: error });
+                throw new Error(`Failed to look up existing concerts: ${error.message}`);
+            }
+
+            for (const row of data) {
+                existing.ids.add(row.id);
+                existing.keys.add(concertKey(row));
+                existing.stored.set(row.id, fromRow(row));
+            }
+        }
+
+        log.debug(() => `${existing.ids.size} of the scraped concerts' ids or dates are already stored.`);
+        return existing;
+    }
+
+    /**
+     * The stored concerts of the given tours that are not cancelled, i.e. the
+     * ones a fresh copy of those tours is expected to contain.
+     */
+    async findActiveBySource(sources: string[]): Promise<StoredConcert[]> {
+        if (sources.length === 0) {
             return [];
         }
+        if (await this.ensureIndex()) {
+            this.indexStats.hits++;
+            return sources.flatMap(source => this.index.getActiveBySource(source));
+        }
 
-        console.log(`Database: Found ${data.length} concerts.`);
-        return data;
+        this.indexStats.misses++;
+        const active: StoredConcert[] = [];
+        for (let from = 0; ; from += INDEX_LOAD_PAGE_SIZE) {
+            const { data, error } = await this.timed('findActiveBySource', this.client
+                .from('concerts')
+                .select(STORED_COLUMNS)
+                .in('source', sources)
+                .is('cancelled_at', null)
+                .order('id')
+                .range(from, from + INDEX_LOAD_PAGE_SIZE - 1));
+
+            if (error) {
+                log.error('Error looking up active concerts', { err: error });
+                throw new Error(`Failed to look up active concerts: ${error.message}`);
+            }
+            active.push(...data.map(fromRow));
+            if (data.length < INDEX_LOAD_PAGE_SIZE) {
+                return active;
+            }
+        }
     }
 
-    async saveConcerts(concerts: Concert[]): Promise<void> {
-        console.log(`Database: Saving ${concerts.length} new concerts.`);
-        const records = concerts.map(c => ({
-            id: c.id,
-            venue: c.venue,
-            location: c.location,
-            date: c.date,
-            details: c.details,
-        }));
-        
-        const { error } = await this.client
-            .from('concerts')
-            .upsert(records, { onConflict: 'id' });
+    /**
+     * Marks concerts as cancelled, i.e. gone from their tour.
+     */
+    async markCancelled(ids: string[]): Promise<void> {
+        const cancelledAt = new Date().toISOString();
+        for (let offset = 0; offset < ids.length; offset += DIFF_PAGE_SIZE) {
+            const page = ids.slice(offset, offset + DIFF_PAGE_SIZE);
+            const { error } = await this.timed('markCancelled', this.client
+                .from('concerts')
+                .update({ cancelled_at: cancelledAt })
+                .in('id', page));
 
-        if (error) {
-            console.error('Error saving concerts:', error);
-            throw new Error(`Failed to save concerts: ${error.message}`);
+            if (error) {
+                log.error('Error marking concerts cancelled', { err: error });
+                throw new Error(`Failed to mark concerts cancelled: ${error.message}`);
+            }
+
+            if (this.indexLoadedAt) {
+                page.forEach(id => {
+                    const stored = this.index.get(id);
+                    if (stored) {
+                        this.index.upsert({ ...stored, cancelledAt });
+                    }
+                });
+            }
+        }
+        log.info(`Marked ${ids.length} concerts as cancelled.`);
+    }
+
+    /**
+     * Upserts concerts in chunks of DB_SAVE_CHUNK_SIZE, at most DB_SAVE_CONCURRENCY
+     * chunks at a time. Each chunk is retried on its own, so a bad row or a timeout
+     * only fails its chunk; the result says which concerts made it and which did not.
+     * Concerts in `announce` get a pending announcement_outbox row, written in the
+     * same transaction as the concert itself.
+     */
+    async saveConcerts(concerts: Concert[], announce: Set<string> = new Set()): Promise<SaveResult> {
+        const chunks: Concert[][] = [];
+        for (let i = 0; i < concerts.length; i += SAVE_CHUNK_SIZE) {
+            chunks.push(concerts.slice(i, i + SAVE_CHUNK_SIZE));
+        }
+        log.info(`Saving ${concerts.length} new concerts in ${chunks.length} chunk(s).`);
+
+        const settled = await mapWithConcurrency(chunks, SAVE_CONCURRENCY, (chunk, i) => this.saveChunk(chunk, i, announce));
+
+        const result: SaveResult = { saved: [], failed: [], errors: [] };
+        const savedRecords: Record<string, unknown>[] = [];
+        settled.forEach((outcome, i) => {
+            if (outcome.status === 'fulfilled') {
+                result.saved.push(...chunks[i]);
+                savedRecords.push(...outcome.value);
+            } else {
+                log.error(`Failed to save chunk ${i + 1}/${chunks.length} (${chunks[i].length} concerts)`, { err: outcome.reason });
+                result.failed.push(...chunks[i]);
+                result.errors.push(outcome.reason.message);
+            }
+        });
+
+        if (result.failed.length > 0) {
+            log.warn(`Saved ${result.saved.length} of ${concerts.length} concerts; ${result.errors.length} chunk(s) failed.`);
         } else {
-            console.log('Database: Successfully saved concerts.');
+            log.info('Successfully saved concerts.');
+        }
+
+        // Write-through: keep the index current without another round trip, from the records already built.
+        if (this.indexLoadedAt) {
+            savedRecords.forEach(record => this.index.upsert(fromRow(record)));
+        }
+        return result;
+    }
+
+    // Resolves with the records written, for the index.
+    private async saveChunk(chunk: Concert[], index: number, announce: Set<string>): Promise<Record<string, unknown>[]> {
+        const records = chunk.map(DatabaseService.toRecord);
+        const announceIds = chunk.filter(concert => announce.has(concert.id)).map(concert => concert.id);
+        for (let attempt = 1; ; attempt++) {
+            let error: { message: string; code?: string };
+            try {
+                ({ error } = await this.timed('saveConcerts', announceIds.length > 0
+                    ? this.client.rpc('save_concerts_with_outbox', { concerts: records, announce_ids: announceIds })
+                    : this.client.from('concerts').upsert(records, { onConflict: 'id' })));
+            } catch (e: any) {
+                error = { message: e.message }; // Network failures and the like, always worth retrying
+            }
+            if (!error) {
+                return records;
+            }
+            if (isPermanentError(error) || attempt >= SAVE_MAX_ATTEMPTS) {
+                throw new Error(`Chunk ${index + 1} failed after ${attempt} attempt(s): ${error.message}`);
+            }
+            const delay = SAVE_RETRY_BASE_MS * 2 ** (attempt - 1);
+            log.warn(`Saving chunk ${index + 1} failed (${error.message}), retrying in ${delay}ms.`);
+            await new Promise(resolve => setTimeout(resolve, delay));
         }
     }
 
+    // Saving a concert also records its field hashes and clears any cancellation.
+    private static toRecord(concert: Concert): Record<string, unknown> {
+        const place = gazetteer.parseLocation(concert.location);
+        const located = place.precision === 'city';
+        return {
+            id: concert.id,
+            venue: concert.venue,
+            location: concert.location,
+            date: concert.date,
+            details: concert.details,
+            source: concert.source,
+            field_hashes: hashFields(concert),
+            cancelled_at: null,
+            city: place.city,
+            region: place.region,
+            country: place.country,
+            // Coordinates of the city only; a region center would pass for a venue location.
+            latitude: located ? place.latitude : null,
+            longitude: located ? place.longitude : null,
+        };
+    }
+
     async getConcertsByDate(date: string): Promise<Concert[]> {
-        console.log(`Database: Fetching concerts for date: ${date}.`);
-        const { data, error } = await this.client
+        if (await this.ensureIndex()) {
+            this.indexStats.hits++;
+            const concerts = this.index.getByDate(date).filter(concert => !concert.cancelledAt);
+            log.debug(() => `Found ${concerts.length} concerts for date ${date} in the index.`);
+            return concerts;
+        }
+
+        this.indexStats.misses++;
+        log.debug(() => `Fetching concerts for date: ${date}.`);
+        const { data, error } = await this.timed('getConcertsByDate', this.client
             .from('concerts')
             .select('*')
-            .eq('date', date);
+            .eq('date', date)
+            .is('cancelled_at', null));
 
         if (error) {
-            console.error('Error fetching concerts by date:', error);
+            log.error('Error fetching concerts by date', { err: error });
             return [];
         }
 
-        console.log(`Database: Found ${data.length} concerts for date ${date}.`);
+        log.info(`Found ${data.length} concerts for date ${date}.`);
         return data as Concert[];
     }
+
+    /**
+     * The stored concerts with the given ids, from the index when it is available.
+     */
+    async getConcertsByIds(ids: string[]): Promise<StoredConcert[]> {
+        if (await this.ensureIndex()) {
+            this.indexStats.hits++;
+            return ids.map(id => this.index.get(id)).filter(Boolean);
+        }
+
+        this.indexStats.misses++;
+        const concerts: StoredConcert[] = [];
+        for (let offset = 0; offset < ids.length; offset += DIFF_PAGE_SIZE) {
+            const { data, error } = await this.timed('getConcertsByIds', this.client
+                .from('concerts')
+                .select(STORED_COLUMNS)
+                .in('id', ids.slice(offset, offset + DIFF_PAGE_SIZE)));
+
+            if (error) {
+                log.error('Error fetching concerts by id', { err: error });
+                throw new Error(`Failed to fetch concerts: ${error.message}`);
+            }
+            concerts.push(...data.map(fromRow));
+        }
+        return concerts;
+    }
+
+    async saveAnnouncements(records: AnnouncementRecord[]): Promise<void> {
+        const { error } = await this.timed('saveAnnouncements', this.client
+            .from('announcements')
+            .upsert(records.map(record => ({
+                concert_id: record.concertId,
+                channel_id: record.channelId,
+                message_id: record.messageId,
+                embed_index: record.embedIndex,
+                updated_at: record.updatedAt,
+            })), { onConflict: 'concert_id,message_id' }));
+
+        if (error) {
+            log.error('Error saving announcements', { err: error });
+            throw new Error(`Failed to save announcements: ${error.message}`);
+        }
+    }
+
+    // Every message that announced one of these concerts.
+    async getAnnouncementsForConcerts(concertIds: string[]): Promise<AnnouncementRecord[]> {
+        return this.getAnnouncements('concert_id', concertIds);
+    }
+
+    // Everything announced in these messages, to re-render them whole.
+    async getAnnouncementsForMessages(messageIds: string[]): Promise<AnnouncementRecord[]> {
+        return this.getAnnouncements('message_id', messageIds);
+    }
+
+    private async getAnnouncements(column: 'concert_id' | 'message_id', values: string[]): Promise<AnnouncementRecord[]> {
+        const records: AnnouncementRecord[] = [];
+        for (let offset = 0; offset < values.length; offset += DIFF_PAGE_SIZE) {
+            const { data, error } = await this.timed('getAnnouncements', this.client
+                .from('announcements')
+                .select('concert_id, channel_id, message_id, embed_index, updated_at')
+                .in(column, values.slice(offset, offset + DIFF_PAGE_SIZE)));
+
+            if (error) {
+                log.error('Error fetching announcements', { err: error });
+                throw new Error(`Failed to fetch announcements: ${error.message}`);
+            }
+            records.push(...data.map(row => ({
+                concertId: row.concert_id,
+                channelId: row.channel_id,
+                messageId: row.message_id,
+                embedIndex: row.embed_index ?? null,
+                updatedAt: row.updated_at ?? null,
+            })));
+        }
+        return records;
+    }
+
+    /**
+     * The oldest unposted outbox entries that have been tried fewer than maxAttempts times.
+     */
+    async getPendingOutbox(limit: number, maxAttempts: number): Promise<OutboxEntry[]> {
+        const { data, error } = await this.timed('getPendingOutbox', this.client
+            .from('announcement_outbox')
+            .select('concert_id, attempts, created_at')
+            .is('posted_at', null)
+            .lt('attempts', maxAttempts)
+            .order('created_at')
+            .range(0, limit - 1));
+
+        if (error) {
+            log.error('Error fetching pending announcements', { err: error });
+            throw new Error(`Failed to fetch pending announcements: ${error.message}`);
+        }
+        return data.map(row => ({ concertId: row.concert_id, attempts: row.attempts, createdAt: row.created_at }));
+    }
+
+    // Unposted outbox entries, including ones that ran out of attempts.
+    async countPendingOutbox(): Promise<number> {
+        const { count, error } = await this.timed('countPendingOutbox', this.client
+            .from('announcement_outbox')
+            .select('concert_id', { count: 'exact', head: true })
+            .is('posted_at', null));
+
+        if (error) {
+            throw new Error(`Failed to count pending announcements: ${error.message}`);
+        }
+        return count ?? 0;
+    }
+
+    // Counts one more hand-off to the send queue for each entry.
+    async recordOutboxAttempts(entries: OutboxEntry[]): Promise<void> {
+        const byAttempts = new Map<number, string[]>();
+        for (const entry of entries) {
+            byAttempts.set(entry.attempts, [...(byAttempts.get(entry.attempts) ?? []), entry.concertId]);
+        }
+        for (const [attempts, concertIds] of byAttempts) {
+            const { error } = await this.timed('recordOutboxAttempts', this.client
+                .from('announcement_outbox')
+                .update({ attempts: attempts + 1 })
+                .in('concert_id', concertIds));
+
+            if (error) {
+                throw new Error(`Failed to update announcement attempts: ${error.message}`);
+            }
+        }
+    }
+
+    // The oldest outbox entries whose fan DMs have not been queued yet.
+    async getUnnotifiedOutbox(limit: number): Promise<OutboxEntry[]> {
+        const { data, error } = await this.timed('getUnnotifiedOutbox', this.client
+            .from('announcement_outbox')
+            .select('concert_id, attempts, created_at')
+            .is('fans_notified_at', null)
+            .order('created_at')
+            .range(0, limit - 1));
+
+        if (error) {
+            log.error('Error fetching announcements without fan DMs', { err: error });
+            throw new Error(`Failed to fetch announcements without fan DMs: ${error.message}`);
+        }
+        return data.map(row => ({ concertId: row.concert_id, attempts: row.attempts, createdAt: row.created_at }));
+    }
+
+    async markOutboxNotified(concertIds: string[]): Promise<void> {
+        const notifiedAt = new Date().toISOString();
+        for (let offset = 0; offset < concertIds.length; offset += DIFF_PAGE_SIZE) {
+            const { error } = await this.timed('markOutboxNotified', this.client
+                .from('announcement_outbox')
+                .update({ fans_notified_at: notifiedAt })
+                .in('concert_id', concertIds.slice(offset, offset + DIFF_PAGE_SIZE))
+                .is('fans_notified_at', null));
+
+            if (error) {
+                log.error('Error marking fan DMs queued', { err: error });
+                throw new Error(`Failed to mark fan DMs queued: ${error.message}`);
+            }
+        }
+    }
+
+    async markOutboxPosted(concertIds: string[]): Promise<void> {
+        const postedAt = new Date().toISOString();
+        for (let offset = 0; offset < concertIds.length; offset += DIFF_PAGE_SIZE) {
+            const { error } = await this.timed('markOutboxPosted', this.client
+                .from('announcement_outbox')
+                .update({ posted_at: postedAt })
+                .in('concert_id', concertIds.slice(offset, offset + DIFF_PAGE_SIZE))
+                .is('posted_at', null));
+
+            if (error) {
+                log.error('Error marking announcements posted', { err: error });
+                throw new Error(`Failed to mark announcements posted: ${error.message}`);
+            }
+        }
+    }
+
+    // All subscriptions, or those of one guild.
+    async getSubscriptions(guildId?: string): Promise<Subscription[]> {
+        const subscriptions: Subscription[] = [];
+        for (let offset = 0; ; offset += SUBSCRIPTION_PAGE_SIZE) {
+            let query = this.client
+                .from('subscriptions')
+                .select('guild_id, channel_id, filters, created_by');
+            if (guildId) {
+                query = query.eq('guild_id', guildId);
+            }
+            const { data, error } = await this.timed('getSubscriptions', query
+                .order('channel_id')
+                .range(offset, offset + SUBSCRIPTION_PAGE_SIZE - 1));
+
+            if (error) {
+                log.error('Error fetching subscriptions', { err: error });
+                throw new Error(`Failed to fetch subscriptions: ${error.message}`);
+            }
+            subscriptions.push(...data.map(row => ({
+                guildId: row.guild_id,
+                channelId: row.channel_id,
+                filters: row.filters ?? {},
+                createdBy: row.created_by ?? undefined,
+            })));
+            if (data.length < SUBSCRIPTION_PAGE_SIZE) {
+                return subscriptions;
+            }
+        }
+    }
+
+    // Adds a subscription, or replaces the filters of an existing one for the channel.
+    async saveSubscription(subscription: Subscription): Promise<void> {
+        const { error } = await this.timed('saveSubscription', this.client
+            .from('subscriptions')
+            .upsert({
+                channel_id: subscription.channelId,
+                guild_id: subscription.guildId,
+                filters: subscription.filters,
+                created_by: subscription.createdBy ?? null,
+                updated_at: new Date().toISOString(),
+            }, { onConflict: 'channel_id' }));
+
+        if (error) {
+            log.error(`Error saving subscription for channel ${subscription.channelId}`, { err: error });
+            throw new Error(`Failed to save subscription: ${error.message}`);
+        }
+    }
+
+    // Returns whether the channel was subscribed.
+    async deleteSubscription(guildId: string, channelId: string): Promise<boolean> {
+        const { data, error } = await this.timed('deleteSubscription', this.client
+            .from('subscriptions')
+            .delete()
+            .eq('guild_id', guildId)
+            .eq('channel_id', channelId)
+            .select('channel_id'));
+
+        if (error) {
+            log.error(`Error deleting subscription for channel ${channelId}`, { err: error });
+            throw new Error(`Failed to delete subscription: ${error.message}`);
+        }
+        return data.length > 0;
+    }
+
+    // All notify areas, or those of one user.
+    async getNotifyAreas(userId?: string): Promise<NotifyArea[]> {
+        const areas: NotifyArea[] = [];
+        for (let offset = 0; ; offset += SUBSCRIPTION_PAGE_SIZE) {
+            let query = this.client
+                .from('notify_areas')
+                .select('user_id, area, label, dm_channel_id, country, region, latitude, longitude, radius_km');
+            if (userId) {
+                query = query.eq('user_id', userId);
+            }
+            const { data, error } = await this.timed('getNotifyAreas', query
+                .order('user_id')
+                .order('area')
+                .range(offset, offset + SUBSCRIPTION_PAGE_SIZE - 1));
+
+            if (error) {
+                log.error('Error fetching notify areas', { err: error });
+                throw new Error(`Failed to fetch notify areas: ${error.message}`);
+            }
+            areas.push(...data.map(row => ({
+                userId: row.user_id,
+                area: row.area,
+                label: row.label,
+                dmChannelId: row.dm_channel_id,
+                country: row.country ?? null,
+                region: row.region ?? null,
+                latitude: row.latitude ?? null,
+                longitude: row.longitude ?? null,
+                radiusKm: row.radius_km ?? null,
+            })));
+            if (data.length < SUBSCRIPTION_PAGE_SIZE) {
+                return areas;
+            }
+        }
+    }
+
+    async saveNotifyArea(area: NotifyArea): Promise<void> {
+        const { error } = await this.timed('saveNotifyArea', this.client
+            .from('notify_areas')
+            .upsert({
+                user_id: area.userId,
+                area: area.area,
+                label: area.label,
+                dm_channel_id: area.dmChannelId,
+                country: area.country,
+                region: area.region,
+                latitude: area.latitude,
+                longitude: area.longitude,
+                radius_km: area.radiusKm,
+            }, { onConflict: 'user_id,area' }));
+
+        if (error) {
+            log.error(`Error saving notify area for user ${area.userId}`, { err: error });
+            throw new Error(`Failed to save notify area: ${error.message}`);
+        }
+    }
+
+    // Removes all of a user's areas and returns how many there were.
+    async deleteNotifyAreas(userId: string): Promise<number> {
+        const { data, error } = await this.timed('deleteNotifyAreas', this.client
+            .from('notify_areas')
+            .delete()
+            .eq('user_id', userId)
+            .select('area'));
+
+        if (error) {
+            log.error(`Error deleting notify areas for user ${userId}`, { err: error });
+            throw new Error(`Failed to delete notify areas: ${error.message}`);
+        }
+        return data.length;
+    }
+
+    async getSchedulerState(name: string): Promise<SchedulerState | null> {
+        const { data, error } = await this.timed('getSchedulerState', this.client
+            .from('scheduler_state')
+            .select('last_success_at, next_due_at, interval_ms, last_change_at')
+            .eq('name', name)
+            .maybeSingle());
+
+        if (error) {
+            log.error(`Error fetching scheduler state '${name}':`, { err: error });
+            return null;
+        }
+        if (!data) {
+            return null;
+        }
+
+        const toDate = (value: string | null) => (value ? new Date(value) : null);
+        return {
+            lastSuccessAt: toDate(data.last_success_at),
+            nextDueAt: toDate(data.next_due_at),
+            intervalMs: data.interval_ms,
+            lastChangeAt: toDate(data.last_change_at),
+        };
+    }
+
+    async saveSchedulerState(name: string, state: SchedulerState): Promise<void> {
+        const { error } = await this.timed('saveSchedulerState', this.client
+            .from('scheduler_state')
+            .upsert({
+                name,
+                last_success_at: state.lastSuccessAt?.toISOString() ?? null,
+                next_due_at: state.nextDueAt?.toISOString() ?? null,
+                interval_ms: Math.round(state.intervalMs),
+                last_change_at: state.lastChangeAt?.toISOString() ?? null,
+                updated_at: new Date().toISOString(),
+            }, { onConflict: 'name' }));
+
+        if (error) {
+            log.error(`Error saving scheduler state '${name}':`, { err: error });
+        }
+    }
+
+    async getBotState(key: string): Promise<string | null> {
+        const { data, error } = await this.timed('getBotState', this.client
+            .from('bot_state')
+            .select('value')
+            .eq('key', key)
+            .maybeSingle());
+
+        if (error) {
+            log.error(`Error fetching bot state '${key}':`, { err: error });
+            return null;
+        }
+        return data?.value ?? null;
+    }
+
+    async setBotState(key: string, value: string): Promise<void> {
+        const { error } = await this.timed('setBotState', this.client
+            .from('bot_state')
+            .upsert({ key, value, updated_at: new Date().toISOString() }, { onConflict: 'key' }));
+
+        if (error) {
+            log.error(`Error saving bot state '${key}':`, { err: error });
+        }
+    }
 } 
\ No newline at end of file
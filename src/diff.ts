@@ -0,0 +1,78 @@
+// @ts-nocheck
+import { Concert } from './scraper';
+import { ExistingConcertKeys, StoredConcert, TRACKED_FIELDS, TrackedField, concertKey, hashFields } from './database';
+
+export interface FieldChange {
+    field: TrackedField;
+    before: string | null; // As stored
+    after: string | null; // As scraped
+}
+
+export interface ConcertChange {
+    concert: Concert; // The scraped version
+    changes: FieldChange[]; // Empty when only the cancellation was lifted
+    reinstated: boolean; // True when the concert was cancelled and is back in its tour
+}
+
+export interface TourDiff {
+    added: Concert[]; // Sorted by date, see findNewConcerts()
+    changed: ConcertChange[];
+    removed: StoredConcert[]; // Active concerts missing from a tour that was fetched in full
+    rehashed: Concert[]; // Stored without field hashes yet; saved to record them, not reported
+    unchanged: number;
+}
+
+/**
+ * The scraped concerts whose venue|date key is not stored yet, sorted by date
+ * in ascending order so they are announced chronologically.
+ */
+export function findNewConcerts(scraped: Concert[], existing: ExistingConcertKeys): Concert[] {
+    const newConcerts = scraped.filter(concert => !existing.keys.has(concertKey(concert)));
+    newConcerts.sort((a, b) => new Date(a.date).getTime() - new Date(b.date).getTime());
+    return newConcerts;
+}
+
+/**
+ * Three-way diff of a scrape against the stored concerts, keyed on the Seated
+ * event id. Stored concerts are compared by their field hashes, so only the
+ * fields that differ are looked at in full. `active` holds the stored,
+ * uncancelled concerts of the tours in this scrape; any of them the scrape does
+ * not contain, by id or by venue|date, counts as removed.
+ */
+export function diffConcerts(scraped: Concert[], existing: ExistingConcertKeys, active: StoredConcert[]): TourDiff {
+    const diff: TourDiff = { added: [], changed: [], removed: [], rehashed: [], unchanged: 0 };
+
+    const unknown: Concert[] = [];
+    for (const concert of scraped) {
+        const stored = existing.stored.get(concert.id);
+        if (!stored) {
+            unknown.push(concert);
+            continue;
+        }
+
+        const hashes = hashFields(concert);
+        if (!stored.fieldHashes) {
+            diff.rehashed.push(concert);
+            continue;
+        }
+        const changes = TRACKED_FIELDS
+            .filter(field => hashes[field] !== stored.fieldHashes[field])
+            .map(field => ({ field, before: stored[field] ?? null, after: concert[field] ?? null }));
+        if (changes.length > 0 || stored.cancelledAt) {
+            diff.changed.push({ concert, changes, reinstated: !!stored.cancelledAt });
+        } else {
+            diff.unchanged++;
+        }
+    }
+
+    // Concerts with a new id are still matched on venue|date, as before event ids were tracked.
+    diff.added = findNewConcerts(unknown, existing);
+    diff.unchanged += unknown.length - diff.added.length;
+
+    // Seated sometimes re-issues a show under a new event id. The new id matched on venue|date
+    // above, so the stored row under the old id is still the same show and not removed.
+    const scrapedIds = new Set(scraped.map(concert => concert.id));
+    const scrapedKeys = new Set(scraped.map(concertKey));
+    diff.removed = active.filter(concert => !scrapedIds.has(concert.id) && !scrapedKeys.has(concertKey(concert)));
+    return diff;
+} 
\ No newline at end of file
@@ -0,0 +1,186 @@
+// @ts-nocheck
+import { promises as fs } from 'fs';
+import { CA_ADMIN1_CODES, CA_PROVINCES, CITIES, COUNTRY_ALIASES, RegionRow, US_STATES } from './gazetteerData';
+import { createLogger } from './logger';
+
+const log = createLogger('gazetteer');
+
+// A concert location split into normalized parts, see Gazetteer.parseLocation().
+export interface ParsedLocation {
+    city: string | null;
+    region: string | null; // State or province code, e.g. 'CO' or 'ON'
+    country: string | null; // ISO 3166-1 alpha-2 code, e.g. 'US'
+    latitude: number | null; // Of the city, or of the region's center when the city is unknown
+    longitude: number | null;
+    precision: 'city' | 'region' | null; // What the coordinates are of; a region center says little about the venue
+}
+
+interface Place {
+    name: string;
+    region: string;
+    country: string;
+    latitude: number;
+    longitude: number;
+    population: number;
+}
+
+interface Region {
+    code: string;
+    name: string;
+    country: string;
+    latitude: number;
+    longitude: number;
+}
+
+// A trailing US ZIP or Canadian postal code, e.g. 'CO 80204' or 'ON M5V 2T6'.
+const TRAILING_POSTAL_CODE = /\s+(\d{5}(-\d{4})?|[A-Z]\d[A-Z] ?\d[A-Z]\d)$/i;
+// A leading or trailing European postal code, e.g. '1017 PT Amsterdam' or 'Paris 75011'.
+const CITY_POSTAL_CODE = /^\d{4,5}(\s?[A-Z]{2})?\s+|\s+\d{4,5}$/g;
+
+// Lower case, no accents or dots, 'Saint' as 'st', so 'Saint Louis' and 'St. Louis' meet.
+function normalize(text: string): string {
+    return text
+        .normalize('NFKD')
+        .replace(/[\u0300-\u036f]/g, '')
+        .toLowerCase()
+        .replace(/\./g, '')
+        .replace(/\s+/g, ' ')
+        .trim()
+        .replace(/^saint /, 'st ');
+}
+
+/**
+ * Offline place lookup for concert locations (Seated's `formatted-address`,
+ * e.g. "1000 Chopper Cir, Denver, CO 80204, USA") and for the places fans
+ * give /notify. Starts with the built-in table in gazetteerData.ts; load() adds
+ * a GeoNames cities file (e.g. cities15000.txt from download.geonames.org).
+ */
+export class Gazetteer {
+    private cities = new Map<string, Place[]>(); // By normalized name, most populous first
+    private regions = new Map<string, Region[]>(); // By normalized code and name, US first
+
+    constructor() {
+        const addRegions = (rows: RegionRow[], country: string) => {
+            for (const [code, name, latitude, longitude] of rows) {
+                const region = { code, name, country, latitude, longitude };
+                for (const key of [normalize(code), normalize(name)]) {
+                    this.regions.set(key, [...(this.regions.get(key) ?? []), region]);
+                }
+            }
+        };
+        addRegions(US_STATES, 'US');
+        addRegions(CA_PROVINCES, 'CA');
+        for (const [name, region, country, latitude, longitude] of CITIES) {
+            // The built-in cities win over same-named GeoNames entries.
+            this.addCity({ name, region, country, latitude, longitude, population: Infinity });
+        }
+    }
+
+    get size(): number {
+        return this.cities.size;
+    }
+
+    /**
+     * Adds the cities of a GeoNames dump (tab separated: geonameid, name,
+     * asciiname, alternatenames, latitude, longitude, feature class, feature
+     * code, country code, cc2, admin1 code, ..., population). Regions are kept
+     * for the US and Canada only.
+     */
+    async load(filePath: string): Promise<number> {
+        const text = await fs.readFile(filePath, 'utf8');
+        let added = 0;
+        for (const line of text.split('\n')) {
+            const fields = line.split('\t');
+            if (fields.length < 15) {
+                continue;
+            }
+            const country = fields[8];
+            const region = country === 'US' ? fields[10] : country === 'CA' ? CA_ADMIN1_CODES[fields[10]] ?? '' : '';
+            const place = {
+                name: fields[1],
+                region,
+                country,
+                latitude: Number(fields[4]),
+                longitude: Number(fields[5]),
+                population: Number(fields[14]) || 0,
+            };
+            this.addCity(place);
+            if (fields[2] && normalize(fields[2]) !== normalize(fields[1])) {
+                this.addCity(place, fields[2]);
+            }
+            added++;
+        }
+        for (const places of this.cities.values()) {
+            places.sort((a, b) => b.population - a.population);
+        }
+        log.info(`Loaded ${added} places from ${filePath}.`);
+        return added;
+    }
+
+    /**
+     * Splits an address into city, region and country and geocodes it: the city
+     * if it is known, otherwise the center of the region. Unknown parts are null.
+     */
+    parseLocation(location: string): ParsedLocation {
+        const parts = location.split(',').map(part => part.trim()).filter(Boolean);
+        let country: string | null = null;
+        let region: Region | null = null;
+        let city: string | null = null;
+
+        // A trailing 'CA' is California rather than Canada, as US addresses often end in the state.
+        const last = parts[parts.length - 1];
+        if (last && !(last.length === 2 && this.findRegion(last, 'US')) && COUNTRY_ALIASES[last.toLowerCase()]) {
+            country = COUNTRY_ALIASES[last.toLowerCase()];
+            parts.pop();
+        }
+
+        if (parts.length > 0) {
+            region = this.findRegion(parts[parts.length - 1].replace(TRAILING_POSTAL_CODE, ''), country);
+            if (region) {
+                parts.pop();
+                country = region.country;
+            }
+        }
+        if (parts.length > 0 && (region || country || parts.length === 1)) {
+            city = parts[parts.length - 1].replace(CITY_POSTAL_CODE, '').trim() || null;
+        }
+
+        const place = city ? this.findCity(city, region?.code ?? null, country) : null;
+        if (place && !country) {
+            country = place.country;
+            region = region ?? (place.region ? this.findRegion(place.region, place.country) : null);
+        }
+        return {
+            city: place?.name ?? city,
+            region: region?.code ?? null,
+            country,
+            latitude: place?.latitude ?? region?.latitude ?? null,
+            longitude: place?.longitude ?? region?.longitude ?? null,
+            precision: place ? 'city' : region ? 'region' : null,
+        };
+    }
+
+    // A state or province by code or name, e.g. 'CO' or 'Colorado', in `country` if given.
+    findRegion(text: string, country: string | null = null): Region | null {
+        const candidates = this.regions.get(normalize(text)) ?? [];
+        return candidates.find(candidate => !country || candidate.country === country) ?? null;
+    }
+
+    // The full name of a region code, e.g. 'Colorado' for 'CO'.
+    regionName(code: string, country: string): string {
+        return this.findRegion(code, country)?.name ?? code;
+    }
+
+    private findCity(name: string, region: string | null, country: string | null): Place | null {
+        const candidates = this.cities.get(normalize(name)) ?? [];
+        return candidates.find(candidate => (!country || candidate.country === country) && (!region || candidate.region === region)) ?? null;
+    }
+
+    private addCity(place: Place, name = place.name): void {
+        const key = normalize(name);
+        this.cities.set(key, [...(this.cities.get(key) ?? []), place]);
+    }
+}
+
+// Shared by the save path and the /notify command.
+export const gazetteer = new Gazetteer(); 
\ No newline at end of file
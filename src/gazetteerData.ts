@@ -0,0 +1,132 @@
+// @ts-nocheck
+// Built-in gazetteer: states, provinces and the cities shows are usually in, with
+// approximate coordinates. GAZETTEER_FILE can add a GeoNames cities file, see gazetteer.ts.
+
+// [code, name, latitude, longitude]; coordinates are rough geographic centers.
+export type RegionRow = [string, string, number, number];
+// [name, region code or '', country code, latitude, longitude]
+export type CityRow = [string, string, string, number, number];
+
+export const US_STATES: RegionRow[] = [
+    ['AL', 'Alabama', 32.8, -86.8], ['AK', 'Alaska', 64.2, -149.5], ['AZ', 'Arizona', 34.3, -111.7],
+    ['AR', 'Arkansas', 34.9, -92.4], ['CA', 'California', 37.2, -119.5], ['CO', 'Colorado', 39.0, -105.5],
+    ['CT', 'Connecticut', 41.6, -72.7], ['DE', 'Delaware', 39.0, -75.5], ['DC', 'District of Columbia', 38.9, -77.0],
+    ['FL', 'Florida', 28.6, -82.4], ['GA', 'Georgia', 32.7, -83.4], ['HI', 'Hawaii', 20.8, -156.3],
+    ['ID', 'Idaho', 44.4, -114.6], ['IL', 'Illinois', 40.0, -89.2], ['IN', 'Indiana', 39.9, -86.3],
+    ['IA', 'Iowa', 42.1, -93.5], ['KS', 'Kansas', 38.5, -98.4], ['KY', 'Kentucky', 37.5, -85.3],
+    ['LA', 'Louisiana', 31.1, -92.0], ['ME', 'Maine', 45.4, -69.2], ['MD', 'Maryland', 39.0, -76.8],
+    ['MA', 'Massachusetts', 42.3, -71.8], ['MI', 'Michigan', 44.3, -85.4], ['MN', 'Minnesota', 46.3, -94.3],
+    ['MS', 'Mississippi', 32.7, -89.7], ['MO', 'Missouri', 38.4, -92.5], ['MT', 'Montana', 47.0, -109.6],
+    ['NE', 'Nebraska', 41.5, -99.8], ['NV', 'Nevada', 39.3, -116.6], ['NH', 'New Hampshire', 43.7, -71.6],
+    ['NJ', 'New Jersey', 40.2, -74.7], ['NM', 'New Mexico', 34.4, -106.1], ['NY', 'New York', 42.9, -75.5],
+    ['NC', 'North Carolina', 35.6, -79.4], ['ND', 'North Dakota', 47.5, -100.5], ['OH', 'Ohio', 40.3, -82.8],
+    ['OK', 'Oklahoma', 35.6, -97.5], ['OR', 'Oregon', 43.9, -120.6], ['PA', 'Pennsylvania', 40.9, -77.8],
+    ['RI', 'Rhode Island', 41.7, -71.5], ['SC', 'South Carolina', 33.9, -80.9], ['SD', 'South Dakota', 44.4, -100.2],
+    ['TN', 'Tennessee', 35.9, -86.4], ['TX', 'Texas', 31.5, -99.3], ['UT', 'Utah', 39.3, -111.7],
+    ['VT', 'Vermont', 44.1, -72.7], ['VA', 'Virginia', 37.5, -78.9], ['WA', 'Washington', 47.4, -120.5],
+    ['WV', 'West Virginia', 38.6, -80.6], ['WI', 'Wisconsin', 44.6, -89.9], ['WY', 'Wyoming', 43.0, -107.6],
+];
+
+export const CA_PROVINCES: RegionRow[] = [
+    ['AB', 'Alberta', 55.0, -115.0], ['BC', 'British Columbia', 53.7, -127.6], ['MB', 'Manitoba', 55.0, -97.0],
+    ['NB', 'New Brunswick', 46.5, -66.2], ['NL', 'Newfoundland and Labrador', 53.1, -57.7], ['NS', 'Nova Scotia', 45.0, -63.0],
+    ['ON', 'Ontario', 50.0, -85.0], ['PE', 'Prince Edward Island', 46.4, -63.2], ['QC', 'Quebec', 52.9, -73.5],
+    ['SK', 'Saskatchewan', 55.0, -106.0], ['YT', 'Yukon', 64.3, -135.0], ['NT', 'Northwest Territories', 64.8, -124.8],
+    ['NU', 'Nunavut', 70.3, -83.1],
+];
+
+// GeoNames admin1 codes of the Canadian provinces, for GAZETTEER_FILE.
+export const CA_ADMIN1_CODES: Record<string, string> = {
+    '01': 'AB', '02': 'BC', '03': 'MB', '04': 'NB', '05': 'NL', '07': 'NS', '08': 'ON',
+    '09': 'PE', '10': 'QC', '11': 'SK', '12': 'YT', '13': 'NT', '14': 'NU',
+};
+
+// Lower-case name -> ISO 3166-1 alpha-2 code.
+export const COUNTRY_ALIASES: Record<string, string> = {
+    'us': 'US', 'usa': 'US', 'u.s.': 'US', 'u.s.a.': 'US', 'united states': 'US', 'united states of america': 'US',
+    'ca': 'CA', 'canada': 'CA',
+    'mx': 'MX', 'mexico': 'MX', 'méxico': 'MX',
+    'uk': 'GB', 'u.k.': 'GB', 'gb': 'GB', 'united kingdom': 'GB', 'great britain': 'GB',
+    'england': 'GB', 'scotland': 'GB', 'wales': 'GB', 'northern ireland': 'GB',
+    'ie': 'IE', 'ireland': 'IE',
+    'nl': 'NL', 'netherlands': 'NL', 'the netherlands': 'NL', 'holland': 'NL',
+    'fr': 'FR', 'france': 'FR',
+    'de': 'DE', 'germany': 'DE', 'deutschland': 'DE',
+    'be': 'BE', 'belgium': 'BE',
+    'dk': 'DK', 'denmark': 'DK',
+    'se': 'SE', 'sweden': 'SE',
+    'no': 'NO', 'norway': 'NO',
+    'es': 'ES', 'spain': 'ES',
+    'it': 'IT', 'italy': 'IT',
+    'au': 'AU', 'australia': 'AU',
+    'jp': 'JP', 'japan': 'JP',
+};
+
+export const CITIES: CityRow[] = [
+    // Northeast
+    ['New York', 'NY', 'US', 40.71, -74.01], ['Brooklyn', 'NY', 'US', 40.68, -73.94], ['Queens', 'NY', 'US', 40.73, -73.79],
+    ['Forest Hills', 'NY', 'US', 40.72, -73.84], ['Port Chester', 'NY', 'US', 41.00, -73.67], ['Albany', 'NY', 'US', 42.65, -73.76],
+    ['Saratoga Springs', 'NY', 'US', 43.08, -73.78], ['Syracuse', 'NY', 'US', 43.05, -76.15], ['Ithaca', 'NY', 'US', 42.44, -76.50],
+    ['Rochester', 'NY', 'US', 43.16, -77.61], ['Canandaigua', 'NY', 'US', 42.89, -77.28], ['Buffalo', 'NY', 'US', 42.89, -78.88],
+    ['Boston', 'MA', 'US', 42.36, -71.06], ['Mansfield', 'MA', 'US', 42.03, -71.22], ['Worcester', 'MA', 'US', 42.26, -71.80],
+    ['Northampton', 'MA', 'US', 42.33, -72.64], ['Providence', 'RI', 'US', 41.82, -71.41], ['Newport', 'RI', 'US', 41.49, -71.31],
+    ['New Haven', 'CT', 'US', 41.31, -72.92], ['Hartford', 'CT', 'US', 41.77, -72.67], ['Bridgeport', 'CT', 'US', 41.19, -73.20],
+    ['Wallingford', 'CT', 'US', 41.46, -72.82], ['Portland', 'ME', 'US', 43.66, -70.26], ['Burlington', 'VT', 'US', 44.48, -73.21],
+    ['Manchester', 'NH', 'US', 42.99, -71.46], ['Philadelphia', 'PA', 'US', 39.95, -75.17], ['Pittsburgh', 'PA', 'US', 40.44, -79.99],
+    ['Camden', 'NJ', 'US', 39.93, -75.12], ['Asbury Park', 'NJ', 'US', 40.22, -74.01], ['Newark', 'NJ', 'US', 40.74, -74.17],
+    ['Atlantic City', 'NJ', 'US', 39.36, -74.42],
+    // Mid-Atlantic and South
+    ['Washington', 'DC', 'US', 38.91, -77.04], ['Baltimore', 'MD', 'US', 39.29, -76.61], ['Columbia', 'MD', 'US', 39.20, -76.86],
+    ['Richmond', 'VA', 'US', 37.54, -77.44], ['Charlottesville', 'VA', 'US', 38.03, -78.48], ['Vienna', 'VA', 'US', 38.90, -77.27],
+    ['Virginia Beach', 'VA', 'US', 36.85, -75.98], ['Charlotte', 'NC', 'US', 35.23, -80.84], ['Raleigh', 'NC', 'US', 35.78, -78.64],
+    ['Durham', 'NC', 'US', 35.99, -78.90], ['Asheville', 'NC', 'US', 35.60, -82.55], ['Wilmington', 'NC', 'US', 34.23, -77.94],
+    ['Charleston', 'SC', 'US', 32.78, -79.93], ['Columbia', 'SC', 'US', 34.00, -81.03], ['Greenville', 'SC', 'US', 34.85, -82.40],
+    ['Atlanta', 'GA', 'US', 33.75, -84.39], ['Athens', 'GA', 'US', 33.96, -83.38], ['Savannah', 'GA', 'US', 32.08, -81.09],
+    ['Nashville', 'TN', 'US', 36.16, -86.78], ['Knoxville', 'TN', 'US', 35.96, -83.92], ['Chattanooga', 'TN', 'US', 35.05, -85.31],
+    ['Memphis', 'TN', 'US', 35.15, -90.05], ['Louisville', 'KY', 'US', 38.25, -85.76], ['Lexington', 'KY', 'US', 38.04, -84.50],
+    ['Birmingham', 'AL', 'US', 33.52, -86.80], ['Huntsville', 'AL', 'US', 34.73, -86.59], ['Jackson', 'MS', 'US', 32.30, -90.18],
+    ['New Orleans', 'LA', 'US', 29.95, -90.07], ['Miami', 'FL', 'US', 25.76, -80.19], ['Orlando', 'FL', 'US', 28.54, -81.38],
+    ['Tampa', 'FL', 'US', 27.95, -82.46], ['St. Petersburg', 'FL', 'US', 27.77, -82.64], ['Jacksonville', 'FL', 'US', 30.33, -81.66],
+    ['St. Augustine', 'FL', 'US', 29.90, -81.31], ['Tallahassee', 'FL', 'US', 30.44, -84.28], ['Live Oak', 'FL', 'US', 30.29, -82.98],
+    // Midwest
+    ['Chicago', 'IL', 'US', 41.88, -87.63], ['Champaign', 'IL', 'US', 40.12, -88.24], ['Detroit', 'MI', 'US', 42.33, -83.05],
+    ['Sterling Heights', 'MI', 'US', 42.58, -83.03], ['Ann Arbor', 'MI', 'US', 42.28, -83.74], ['Grand Rapids', 'MI', 'US', 42.96, -85.67],
+    ['Milwaukee', 'WI', 'US', 43.04, -87.91], ['Madison', 'WI', 'US', 43.07, -89.40], ['Minneapolis', 'MN', 'US', 44.98, -93.27],
+    ['St. Paul', 'MN', 'US', 44.95, -93.09], ['Cleveland', 'OH', 'US', 41.50, -81.69], ['Columbus', 'OH', 'US', 39.96, -83.00],
+    ['Cincinnati', 'OH', 'US', 39.10, -84.51], ['Indianapolis', 'IN', 'US', 39.77, -86.16], ['Noblesville', 'IN', 'US', 40.05, -86.01],
+    ['Bloomington', 'IN', 'US', 39.17, -86.53], ['St. Louis', 'MO', 'US', 38.63, -90.20], ['Kansas City', 'MO', 'US', 39.10, -94.58],
+    ['Omaha', 'NE', 'US', 41.26, -95.93], ['Lincoln', 'NE', 'US', 40.81, -96.70], ['Des Moines', 'IA', 'US', 41.59, -93.62],
+    ['Fargo', 'ND', 'US', 46.88, -96.79], ['Sioux Falls', 'SD', 'US', 43.55, -96.73],
+    // Mountain West and Southwest
+    ['Denver', 'CO', 'US', 39.74, -104.99], ['Morrison', 'CO', 'US', 39.65, -105.19], ['Englewood', 'CO', 'US', 39.65, -104.99],
+    ['Boulder', 'CO', 'US', 40.01, -105.27], ['Fort Collins', 'CO', 'US', 40.59, -105.08], ['Colorado Springs', 'CO', 'US', 38.83, -104.82],
+    ['Telluride', 'CO', 'US', 37.94, -107.81], ['Salt Lake City', 'UT', 'US', 40.76, -111.89], ['Park City', 'UT', 'US', 40.65, -111.50],
+    ['Boise', 'ID', 'US', 43.62, -116.20], ['Missoula', 'MT', 'US', 46.87, -113.99], ['Bozeman', 'MT', 'US', 45.68, -111.04],
+    ['Jackson', 'WY', 'US', 43.48, -110.76], ['Albuquerque', 'NM', 'US', 35.08, -106.65], ['Santa Fe', 'NM', 'US', 35.69, -105.94],
+    ['Phoenix', 'AZ', 'US', 33.45, -112.07], ['Tucson', 'AZ', 'US', 32.22, -110.97], ['Flagstaff', 'AZ', 'US', 35.20, -111.65],
+    ['Las Vegas', 'NV', 'US', 36.17, -115.14], ['Reno', 'NV', 'US', 39.53, -119.81], ['Stateline', 'NV', 'US', 38.96, -119.94],
+    ['Austin', 'TX', 'US', 30.27, -97.74], ['Dallas', 'TX', 'US', 32.78, -96.80], ['Fort Worth', 'TX', 'US', 32.76, -97.33],
+    ['Houston', 'TX', 'US', 29.76, -95.37], ['San Antonio', 'TX', 'US', 29.42, -98.49], ['El Paso', 'TX', 'US', 31.76, -106.49],
+    ['Oklahoma City', 'OK', 'US', 35.47, -97.52], ['Tulsa', 'OK', 'US', 36.15, -95.99], ['Little Rock', 'AR', 'US', 34.75, -92.29],
+    ['Fayetteville', 'AR', 'US', 36.06, -94.16],
+    // West Coast, Alaska and Hawaii
+    ['Los Angeles', 'CA', 'US', 34.05, -118.24], ['Anaheim', 'CA', 'US', 33.84, -117.91], ['San Diego', 'CA', 'US', 32.72, -117.16],
+    ['Santa Barbara', 'CA', 'US', 34.42, -119.70], ['Ventura', 'CA', 'US', 34.27, -119.23], ['San Francisco', 'CA', 'US', 37.77, -122.42],
+    ['Oakland', 'CA', 'US', 37.80, -122.27], ['Berkeley', 'CA', 'US', 37.87, -122.27], ['San Jose', 'CA', 'US', 37.34, -121.89],
+    ['Santa Cruz', 'CA', 'US', 36.97, -122.03], ['Napa', 'CA', 'US', 38.30, -122.29], ['Sacramento', 'CA', 'US', 38.58, -121.49],
+    ['Arcata', 'CA', 'US', 40.87, -124.08], ['Portland', 'OR', 'US', 45.52, -122.68], ['Eugene', 'OR', 'US', 44.05, -123.09],
+    ['Bend', 'OR', 'US', 44.06, -121.32], ['Seattle', 'WA', 'US', 47.61, -122.33], ['Spokane', 'WA', 'US', 47.66, -117.43],
+    ['George', 'WA', 'US', 47.08, -119.86], ['Anchorage', 'AK', 'US', 61.22, -149.90], ['Honolulu', 'HI', 'US', 21.31, -157.86],
+    // Canada
+    ['Toronto', 'ON', 'CA', 43.65, -79.38], ['Ottawa', 'ON', 'CA', 45.42, -75.70], ['Montreal', 'QC', 'CA', 45.50, -73.57],
+    ['Quebec City', 'QC', 'CA', 46.81, -71.21], ['Halifax', 'NS', 'CA', 44.65, -63.57], ['Winnipeg', 'MB', 'CA', 49.90, -97.14],
+    ['Calgary', 'AB', 'CA', 51.05, -114.07], ['Edmonton', 'AB', 'CA', 53.55, -113.49], ['Vancouver', 'BC', 'CA', 49.28, -123.12],
+    ['Victoria', 'BC', 'CA', 48.43, -123.37],
+    // Mexico and Europe
+    ['Mexico City', '', 'MX', 19.43, -99.13], ['Cancún', '', 'MX', 21.16, -86.85], ['Playa del Carmen', '', 'MX', 20.63, -87.08],
+    ['London', '', 'GB', 51.51, -0.13], ['Manchester', '', 'GB', 53.48, -2.24], ['Glasgow', '', 'GB', 55.86, -4.25],
+    ['Dublin', '', 'IE', 53.35, -6.26], ['Amsterdam', '', 'NL', 52.37, 4.90], ['Brussels', '', 'BE', 50.85, 4.35],
+    ['Paris', '', 'FR', 48.86, 2.35], ['Berlin', '', 'DE', 52.52, 13.40], ['Cologne', '', 'DE', 50.94, 6.96],
+    ['Hamburg', '', 'DE', 53.55, 9.99], ['Copenhagen', '', 'DK', 55.68, 12.57], ['Stockholm', '', 'SE', 59.33, 18.07],
+    ['Oslo', '', 'NO', 59.91, 10.75], ['Barcelona', '', 'ES', 41.39, 2.17], ['Madrid', '', 'ES', 40.42, -3.70],
+]; 
\ No newline at end of file
@@ -0,0 +1,88 @@
+// @ts-nocheck
+
+const GEOHASH_ALPHABET = '0123456789bcdefghjkmnpqrstuvwxyz';
+const EARTH_RADIUS_KM = 6371;
+const KM_PER_DEGREE_LATITUDE = 111.32;
+
+export const KM_PER_MILE = 1.609344;
+
+/**
+ * Geohash of a point, e.g. geohash(39.74, -104.99, 5) === '9xj64'.
+ */
+export function geohash(latitude: number, longitude: number, precision: number): string {
+    let latRange = [-90, 90];
+    let lonRange = [-180, 180];
+    let hash = '';
+    let bits = 0;
+    let value = 0;
+    let evenBit = true; // Bits alternate longitude, latitude, starting with longitude
+    while (hash.length < precision) {
+        const range = evenBit ? lonRange : latRange;
+        const coordinate = evenBit ? longitude : latitude;
+        const mid = (range[0] + range[1]) / 2;
+        value <<= 1;
+        if (coordinate >= mid) {
+            value |= 1;
+            range[0] = mid;
+        } else {
+            range[1] = mid;
+        }
+        evenBit = !evenBit;
+        if (++bits === 5) {
+            hash += GEOHASH_ALPHABET[value];
+            bits = 0;
+            value = 0;
+        }
+    }
+    return hash;
+}
+
+// Width and height in degrees of a geohash cell of the given precision.
+function cellSize(precision: number): { lat: number; lon: number } {
+    const totalBits = precision * 5;
+    const lonBits = Math.ceil(totalBits / 2);
+    return { lat: 180 / 2 ** (totalBits - lonBits), lon: 360 / 2 ** lonBits };
+}
+
+/**
+ * The geohash cells of the given precision that a circle touches, from its
+ * bounding box. Sampling the box at steps no larger than a cell hits every
+ * cell it overlaps, including across the antimeridian.
+ */
+export function coveringCells(latitude: number, longitude: number, radiusKm: number, precision: number): string[] {
+    const size = cellSize(precision);
+    const latDelta = radiusKm / KM_PER_DEGREE_LATITUDE;
+    const minLat = Math.max(-90, latitude - latDelta);
+    const maxLat = Math.min(90, latitude + latDelta);
+    // Degrees of longitude shrink towards the poles; use the widest latitude in the box.
+    const widest = Math.max(Math.abs(minLat), Math.abs(maxLat));
+    const cosine = Math.cos((Math.min(widest, 89.9) * Math.PI) / 180);
+    const lonDelta = Math.min(180, radiusKm / (KM_PER_DEGREE_LATITUDE * cosine));
+
+    const steps = (from: number, to: number, step: number) => {
+        const values: number[] = [];
+        for (let value = from; value < to; value += step) {
+            values.push(value);
+        }
+        values.push(to);
+        return values;
+    };
+
+    const cells = new Set<string>();
+    for (const lat of steps(minLat, maxLat, size.lat)) {
+        for (const lon of steps(longitude - lonDelta, longitude + lonDelta, size.lon)) {
+            const wrapped = ((((lon + 180) % 360) + 360) % 360) - 180;
+            cells.add(geohash(Math.min(lat, 89.999999), wrapped, precision));
+        }
+    }
+    return [...cells];
+}
+
+// Great-circle distance between two points.
+export function distanceKm(lat1: number, lon1: number, lat2: number, lon2: number): number {
+    const toRadians = (degrees: number) => (degrees * Math.PI) / 180;
+    const dLat = toRadians(lat2 - lat1);
+    const dLon = toRadians(lon2 - lon1);
+    const a = Math.sin(dLat / 2) ** 2 + Math.cos(toRadians(lat1)) * Math.cos(toRadians(lat2)) * Math.sin(dLon / 2) ** 2;
+    return 2 * EARTH_RADIUS_KM * Math.asin(Math.min(1, Math.sqrt(a)));
+} 
\ No newline at end of file
@@ -1,12 +1,15 @@
 import 'dotenv/config';
 import { Bot } from './bot';
+import { createLogger } from './logger';
+
+const log = createLogger('main');
 
 async function main() {
-    console.log('Bot is starting...');
+    log.info('Bot is starting...');
     const bot = new Bot();
 
     const shutdown = async (signal: string) => {
-        console.log(`Received ${signal}. Shutting down...`);
+        log.info(`Received ${signal}. Shutting down...`);
         await bot.shutdown();
         process.exit(0);
     };
@@ -18,21 +21,21 @@ async function main() {
         await bot.initialize();
         bot.start();
     } catch (error) {
-        console.error('Error during bot startup:', error);
+        log.error('Error during bot startup', { err: error });
         process.exit(1);
     }
 }
 
 main().catch(error => {
-    console.error('Unhandled error in main function:', error);
+    log.error('Unhandled error in main function', { err: error });
     process.exit(1);
 });
 
 process.on('unhandledRejection', error => {
-    console.error('Unhandled promise rejection:', error);
+    log.error('Unhandled promise rejection', { err: error });
 });
 
 process.on('uncaughtException', error => {
-    console.error('Uncaught exception:', error);
+    log.error('Uncaught exception', { err: error });
     process.exit(1);
 }); 
\ No newline at end of file
@@ -0,0 +1,106 @@
+// @ts-nocheck
+import { randomUUID } from 'crypto';
+import { createLogger } from './logger';
+
+const log = createLogger('jobs');
+
+export type JobState = 'queued' | 'running' | 'done' | 'failed';
+
+export interface Job {
+    id: string;
+    kind: string;
+    state: JobState;
+    requestedBy?: string; // e.g. the channel a manual scrape was requested from
+    createdAt: Date;
+    startedAt?: Date;
+    finishedAt?: Date;
+    result?: string;
+    error?: string;
+}
+
+const HISTORY_SIZE = 20;
+
+/**
+ * Runs submitted jobs one at a time, in order, inside this process, and keeps
+ * their state so callers can poll it and /status can report on it.
+ */
+export class JobScheduler {
+    private queue: { job: Job; run: () => Promise<string | void> }[] = [];
+    private active: Job | null = null;
+    private history: Job[] = []; // Finished jobs, newest first
+    private waiters = new Map<string, ((job: Job) => void)[]>();
+
+    submit(kind: string, run: () => Promise<string | void>, requestedBy?: string): Job {
+        const job: Job = { id: randomUUID(), kind, state: 'queued', requestedBy, createdAt: new Date() };
+        this.queue.push({ job, run });
+        log.debug(() => `Queued ${kind} job ${job.id}${requestedBy ? ` for ${requestedBy}` : ''}.`);
+        this.runNext();
+        return job;
+    }
+
+    get(id: string): Job | undefined {
+        if (this.active?.id === id) {
+            return this.active;
+        }
+        return this.queue.find(entry => entry.job.id === id)?.job ?? this.history.find(job => job.id === id);
+    }
+
+    /**
+     * Resolves with the job once it has finished, whether it succeeded or failed.
+     */
+    wait(id: string): Promise<Job> {
+        const job = this.get(id);
+        if (!job) {
+            return Promise.reject(new Error(`Unknown job ${id}`));
+        }
+        if (job.state === 'done' || job.state === 'failed') {
+            return Promise.resolve(job);
+        }
+        return new Promise(resolve => {
+            this.waiters.set(id, [...(this.waiters.get(id) ?? []), resolve]);
+        });
+    }
+
+    current(): Job | null {
+        return this.active;
+    }
+
+    queued(): Job[] {
+        return this.queue.map(entry => entry.job);
+    }
+
+    recent(limit = 5): Job[] {
+        return this.history.slice(0, limit);
+    }
+
+    private async runNext(): Promise<void> {
+        if (this.active) {
+            return;
+        }
+        const next = this.queue.shift();
+        if (!next) {
+            return;
+        }
+
+        const { job, run } = next;
+        this.active = job;
+        job.state = 'running';
+        job.startedAt = new Date();
+        try {
+            job.result = (await run()) || undefined;
+            job.state = 'done';
+        } catch (error: any) {
+            job.state = 'failed';
+            job.error = error?.message ?? String(error);
+            log.error(`${job.kind} job ${job.id} failed`, { err: error });
+        } finally {
+            job.finishedAt = new Date();
+            this.active = null;
+            this.history.unshift(job);
+            this.history.length = Math.min(this.history.length, HISTORY_SIZE);
+            this.waiters.get(job.id)?.forEach(resolve => resolve(job));
+            this.waiters.delete(job.id);
+            this.runNext();
+        }
+    }
+} 
\ No newline at end of file
@@ -0,0 +1,134 @@
+// @ts-nocheck
+
+export type LogLevel = 'debug' | 'info' | 'warn' | 'error';
+
+export type LogFields = Record<string, unknown>;
+
+const LEVELS: Record<LogLevel, number> = { debug: 10, info: 20, warn: 30, error: 40 };
+
+// Flush once this many lines are buffered, otherwise on the next turn of the event loop.
+const MAX_BUFFERED_LINES = 256;
+
+/**
+ * Resolves the level for a namespace from LOG_LEVEL (default "info") and
+ * LOG_LEVELS, a comma-separated list of overrides such as
+ * "scraper=debug,discord.gateway=warn". The longest matching prefix wins.
+ */
+function levelFor(namespace: string): number {
+    let level = (process.env.LOG_LEVEL || 'info').toLowerCase() as LogLevel;
+    let matched = -1;
+    for (const entry of (process.env.LOG_LEVELS || '').split(',')) {
+        const [prefix, value] = entry.split('=').map(part => part.trim());
+        if (prefix && value && (namespace === prefix || namespace.startsWith(`${prefix}.`)) && prefix.length > matched) {
+            level = value.toLowerCase() as LogLevel;
+            matched = prefix.length;
+        }
+    }
+    return LEVELS[level] ?? LEVELS.info;
+}
+
+function serialize(value: unknown): unknown {
+    if (value instanceof Error) {
+        const serialized: Record<string, unknown> = { name: value.name, message: value.message, stack: value.stack };
+        if ((value as any).code !== undefined) {
+            serialized.code = (value as any).code;
+        }
+        return serialized;
+    }
+    return value;
+}
+
+// Lines waiting to be written. Writes happen off the hot path, in one batch per tick.
+let buffer: string[] = [];
+let flushScheduled = false;
+
+function write(line: string): void {
+    buffer.push(line);
+    if (buffer.length >= MAX_BUFFERED_LINES) {
+        flushLogs();
+    } else if (!flushScheduled) {
+        flushScheduled = true;
+        setImmediate(flushLogs);
+    }
+}
+
+/**
+ * Writes out everything buffered. Called automatically; call it directly before exiting.
+ */
+export function flushLogs(): void {
+    flushScheduled = false;
+    if (buffer.length === 0) {
+        return;
+    }
+    const chunk = buffer.join('\n') + '\n';
+    buffer = [];
+    process.stdout.write(chunk);
+}
+
+process.on('exit', flushLogs);
+
+/**
+ * Structured JSON logger for one namespace. Messages below the namespace's level
+ * return before anything is formatted; pass a function as the message to defer
+ * building an expensive one until it is known to be needed.
+ */
+export class Logger {
+    readonly namespace: string;
+    private readonly threshold: number;
+
+    constructor(namespace: string) {
+        this.namespace = namespace;
+        this.threshold = levelFor(namespace);
+    }
+
+    child(name: string): Logger {
+        return new Logger(`${this.namespace}.${name}`);
+    }
+
+    isEnabled(level: LogLevel): boolean {
+        return LEVELS[level] >= this.threshold;
+    }
+
+    debug(message: string | (() => string), fields?: LogFields): void {
+        if (LEVELS.debug >= this.threshold) {
+            this.emit('debug', message, fields);
+        }
+    }
+
+    info(message: string | (() => string), fields?: LogFields): void {
+        if (LEVELS.info >= this.threshold) {
+            this.emit('info', message, fields);
+        }
+    }
+
+    warn(message: string | (() => string), fields?: LogFields): void {
+        if (LEVELS.warn >= this.threshold) {
+            this.emit('warn', message, fields);
+        }
+    }
+
+    error(message: string | (() => string), fields?: LogFields): void {
+        if (LEVELS.error >= this.threshold) {
+            this.emit('error', message, fields);
+        }
+    }
+
+    private emit(level: LogLevel, message: string | (() => string), fields?: LogFields): void {
+        const entry: Record<string, unknown> = {
+            time: new Date().toISOString(),
+            level,
+            ns: this.namespace,
+            msg: typeof message === 'function' ? message() : message,
+        };
+        if (fields) {
+            for (const key of Object.keys(fields)) {
+                entry[key] = serialize(fields[key]);
+            }
+        }
+        write(JSON.stringify(entry));
+    }
+}
+
+export function createLogger(namespace: string): Logger {
+    return new Logger(namespace);
+} 
\ No newline at end of file
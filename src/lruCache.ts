@@ -0,0 +1,45 @@
+// @ts-nocheck
+
+/**
+ * A size-bounded map that evicts the least recently used entry. Entries can
+ * also expire after maxAgeMs, checked when they are read.
+ */
+export class LruCache<K, V> {
+    private readonly capacity: number;
+    private readonly maxAgeMs: number;
+    private entries = new Map<K, { value: V; storedAt: number }>(); // Oldest first
+
+    constructor(capacity: number, maxAgeMs = Infinity) {
+        this.capacity = capacity;
+        this.maxAgeMs = maxAgeMs;
+    }
+
+    get size(): number {
+        return this.entries.size;
+    }
+
+    get(key: K): V | undefined {
+        const entry = this.entries.get(key);
+        if (!entry) {
+            return undefined;
+        }
+        this.entries.delete(key);
+        if (Date.now() - entry.storedAt > this.maxAgeMs) {
+            return undefined;
+        }
+        this.entries.set(key, entry); // Now the most recently used
+        return entry.value;
+    }
+
+    has(key: K): boolean {
+        return this.get(key) !== undefined;
+    }
+
+    set(key: K, value: V): void {
+        this.entries.delete(key);
+        this.entries.set(key, { value, storedAt: Date.now() });
+        if (this.entries.size > this.capacity) {
+            this.entries.delete(this.entries.keys().next().value);
+        }
+    }
+} 
\ No newline at end of file
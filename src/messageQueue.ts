@@ -0,0 +1,399 @@
+// @ts-nocheck
+import { Client, DiscordAPIError, RateLimitData } from 'discord.js';
+import { createHash, randomUUID } from 'crypto';
+import { promises as fs } from 'fs';
+import path from 'path';
+import { ChannelResolver, ChannelUnavailableError } from './channelResolver';
+import { LruCache } from './lruCache';
+import { RateBudget } from './rateBudget';
+import { createLogger } from './logger';
+import { discordSendDuration, outboundQueueDepth, rateLimitHits } from './metrics';
+
+const log = createLogger('queue');
+
+// A JSON-serializable message body, i.e. what channel.send() accepts minus builders.
+export interface OutboundPayload {
+    content?: string;
+    embeds?: object[];
+}
+
+// What to deliver to a channel: a new message, or an edit of one sent earlier.
+export interface OutboundRequest {
+    payload: OutboundPayload;
+    editMessageId?: string; // Edit this message instead of sending a new one
+    concertIds?: string[]; // The concerts the message announces, reported back on delivery
+    dedupKey?: string; // See dedupKey(); a second message with the same key is dropped
+}
+
+// A successful send or edit, as reported to the delivery listener.
+export interface Delivery {
+    channelId: string;
+    messageId: string;
+    concertIds: string[];
+    embedded: boolean; // Whether the concerts are embeds (in concertIds order) rather than the message text
+    edited: boolean;
+}
+
+interface OutboundMessage extends OutboundRequest {
+    id: string;
+    channelId: string;
+    attempts: number;
+    notBefore: number; // Epoch ms before which the message must not be retried
+    enqueuedAt: number;
+}
+
+const MAX_ATTEMPTS = Number(process.env.MESSAGE_QUEUE_MAX_ATTEMPTS) || 8;
+const BASE_BACKOFF_MS = 1000;
+const MAX_BACKOFF_MS = 5 * 60 * 1000;
+
+// Errors that will not go away by retrying, e.g. Unknown Channel, Missing Access, Missing Permissions,
+// and Cannot Send Messages To This User for a DM to someone who does not accept them.
+const PERMANENT_ERROR_CODES = new Set([10003, 50001, 50007, 50013]);
+// Unknown Message: the message to edit was deleted.
+const UNKNOWN_MESSAGE = 10008;
+
+// How many dedup keys of sent messages are remembered, and for how long.
+const DEDUP_CACHE_SIZE = Number(process.env.MESSAGE_DEDUP_CACHE_SIZE) || 1000;
+const DEDUP_WINDOW_MS = (Number(process.env.MESSAGE_DEDUP_WINDOW_MINUTES) || 60) * 60 * 1000;
+
+// Sends started per channel and window, in line with Discord's 5 messages per 5 seconds per channel.
+const CHANNEL_BUDGET = Number(process.env.MESSAGE_QUEUE_CHANNEL_BUDGET) || 5;
+const CHANNEL_WINDOW_MS = (Number(process.env.MESSAGE_QUEUE_CHANNEL_WINDOW_SECONDS) || 5) * 1000;
+// Sends started per second across all channels, kept under Discord's global limit of 50 requests per second.
+const GLOBAL_BUDGET = Number(process.env.MESSAGE_QUEUE_GLOBAL_BUDGET) || 40;
+const GLOBAL_WINDOW_MS = 1000;
+// How long progress from sends is collected before the queue file is rewritten. A crash in
+// between resends those messages, and the nonce on each send keeps Discord from posting them twice.
+const PERSIST_DELAY_MS = Number(process.env.MESSAGE_QUEUE_PERSIST_DELAY_MS) || 250;
+
+// The same message for several channels, see MessageQueue.enqueueAll().
+export interface ChannelRequests {
+    channelId: string;
+    requests: OutboundRequest[];
+}
+
+export function hashPayload(payload: OutboundPayload): string {
+    return createHash('sha256').update(JSON.stringify(payload)).digest('hex');
+}
+
+/**
+ * A deterministic key for a message announcing `concertIds` in a channel, from
+ * the concerts, the channel and a hash of the content. It doubles as the
+ * Discord nonce, so it is cut to the 25 characters Discord allows. Pass
+ * `contentHash` when the same payload goes to several channels.
+ */
+export function dedupKey(channelId: string, concertIds: string[], payload: OutboundPayload, contentHash = hashPayload(payload)): string {
+    return createHash('sha256')
+        .update(`${[...concertIds].sort().join(',')}|${channelId}|${contentHash}`)
+        .digest('hex')
+        .slice(0, 25);
+}
+
+/**
+ * Persistent outbound queue for channel messages. Messages are written to disk
+ * before they are sent, delivered in order per channel and retried with
+ * exponential backoff, so one failed send never loses the messages behind it.
+ * Channels are served in parallel, paced by per-channel and global send budgets
+ * and by discord.js rateLimited signals. Edits of earlier messages go through
+ * the same queue.
+ */
+export class MessageQueue {
+    private readonly client: Client;
+    private readonly channels: ChannelResolver;
+    private readonly onDelivered?: (delivery: Delivery) => Promise<void>;
+    private readonly filePath = process.env.MESSAGE_QUEUE_FILE || path.join('data', 'outbound-queue.json');
+
+    private messages: OutboundMessage[] = [];
+    private inFlight = new Set<string>(); // Channel ids with a send in progress
+    private pausedUntil = new Map<string, number>(); // Channel id -> epoch ms
+    private globalPausedUntil = 0;
+    private channelBudgets = new Map<string, RateBudget>();
+    private globalBudget = new RateBudget(GLOBAL_BUDGET, GLOBAL_WINDOW_MS);
+    private timer: NodeJS.Timeout | null = null;
+    private running = false;
+    private writing: Promise<void> = Promise.resolve(); // The last write, settled or not
+    private nextWrite: Promise<void> | null = null; // Queued behind `writing` and not started yet
+    private persistTimer: NodeJS.Timeout | null = null; // See persistSoon()
+    private recentlySent = new LruCache<string, true>(DEDUP_CACHE_SIZE, DEDUP_WINDOW_MS); // Dedup keys
+    private stats = { sent: 0, edited: 0, retried: 0, dropped: 0, deduplicated: 0, rateLimited: 0 };
+
+    // onDelivered is told about every delivered message that carries concertIds.
+    constructor(client: Client, channels: ChannelResolver, onDelivered?: (delivery: Delivery) => Promise<void>) {
+        this.client = client;
+        this.channels = channels;
+        this.onDelivered = onDelivered;
+        this.client.rest.on('rateLimited', (info: RateLimitData) => this.onRateLimited(info));
+    }
+
+    async load(): Promise<void> {
+        try {
+            const raw = await fs.readFile(this.filePath, 'utf8');
+            this.messages = JSON.parse(raw);
+            log.info(`Restored ${this.messages.length} pending messages from ${this.filePath}.`);
+        } catch (error: any) {
+            if (error.code !== 'ENOENT') {
+                log.error(`Could not read ${this.filePath}, starting empty`, { err: error });
+            }
+            this.messages = [];
+        }
+    }
+
+    start(): void {
+        this.running = true;
+        this.drain();
+    }
+
+    async stop(): Promise<void> {
+        this.running = false;
+        if (this.timer) {
+            clearTimeout(this.timer);
+            this.timer = null;
+        }
+        if (this.persistTimer) {
+            clearTimeout(this.persistTimer);
+            this.persistTimer = null;
+            await this.persist().catch(() => undefined);
+        }
+        await this.writing;
+    }
+
+    /**
+     * Appends messages for a channel and resolves once they are persisted.
+     * Messages whose dedup key was sent recently or is already queued are dropped.
+     */
+    async enqueue(channelId: string, requests: OutboundRequest[]): Promise<void> {
+        return this.enqueueAll([{ channelId, requests }]);
+    }
+
+    // Like enqueue(), for several channels at once with a single write.
+    async enqueueAll(deliveries: ChannelRequests[]): Promise<void> {
+        const now = Date.now();
+        const queuedKeys = new Set(this.messages.map(message => message.dedupKey).filter(Boolean));
+        for (const { channelId, requests } of deliveries) {
+            for (const request of requests) {
+                if (request.dedupKey && (queuedKeys.has(request.dedupKey) || this.recentlySent.has(request.dedupKey))) {
+                    log.debug(() => `Dropping duplicate message ${request.dedupKey} for channel ${channelId}.`);
+                    this.stats.deduplicated++;
+                    continue;
+                }
+                if (request.dedupKey) {
+                    queuedKeys.add(request.dedupKey);
+                }
+                this.messages.push({ ...request, id: randomUUID(), channelId, attempts: 0, notBefore: now, enqueuedAt: now });
+            }
+        }
+        // A failed write rejects, so the caller knows the messages are not durable yet and can retry;
+        // the copies in memory still go out, and their dedup keys keep a retry from posting them twice.
+        try {
+            await this.persist();
+        } finally {
+            this.drain();
+        }
+    }
+
+    getStats(): { pending: number; sent: number; edited: number; retried: number; dropped: number; deduplicated: number; rateLimited: number } {
+        return { pending: this.messages.length, ...this.stats };
+    }
+
+    // The channels each concert has a new announcement waiting to be sent to, by concert id.
+    getQueuedAnnouncements(): Map<string, Set<string>> {
+        const queued = new Map<string, Set<string>>();
+        for (const message of this.messages) {
+            if (message.editMessageId) {
+                continue;
+            }
+            for (const concertId of message.concertIds ?? []) {
+                let channels = queued.get(concertId);
+                if (!channels) {
+                    channels = new Set();
+                    queued.set(concertId, channels);
+                }
+                channels.add(message.channelId);
+            }
+        }
+        return queued;
+    }
+
+    private onRateLimited(info: RateLimitData): void {
+        this.stats.rateLimited++;
+        rateLimitHits.inc({ global: String(!!info.global) });
+        const until = Date.now() + info.timeToReset;
+        if (info.global) {
+            this.globalPausedUntil = Math.max(this.globalPausedUntil, until);
+        } else if (info.majorParameter) {
+            this.pausedUntil.set(info.majorParameter, Math.max(this.pausedUntil.get(info.majorParameter) ?? 0, until));
+        }
+        log.warn(`Rate limited on ${info.route} for ${info.timeToReset}ms${info.global ? ' (global)' : ''}.`);
+    }
+
+    // Starts a send for the head of every channel that is ready, and sets a timer for the earliest one that is not.
+    private drain(): void {
+        if (!this.running) {
+            return;
+        }
+        if (this.timer) {
+            clearTimeout(this.timer);
+            this.timer = null;
+        }
+
+        const now = Date.now();
+        for (const [channelId, budget] of this.channelBudgets) {
+            if (budget.isIdle(now)) {
+                this.channelBudgets.delete(channelId);
+            }
+        }
+
+        let wakeAt = Infinity;
+        const seen = new Set<string>();
+        for (const message of this.messages) {
+            if (seen.has(message.channelId)) {
+                continue; // Only the head of each channel may be sent, to keep order.
+            }
+            seen.add(message.channelId);
+            if (this.inFlight.has(message.channelId)) {
+                continue;
+            }
+
+            let channelBudget = this.channelBudgets.get(message.channelId);
+            if (!channelBudget) {
+                channelBudget = new RateBudget(CHANNEL_BUDGET, CHANNEL_WINDOW_MS);
+                this.channelBudgets.set(message.channelId, channelBudget);
+            }
+            const readyAt = Math.max(
+                message.notBefore,
+                this.pausedUntil.get(message.channelId) ?? 0,
+                this.globalPausedUntil,
+                channelBudget.availableAt(now),
+                this.globalBudget.availableAt(now),
+            );
+            if (readyAt > now) {
+                wakeAt = Math.min(wakeAt, readyAt);
+                continue;
+            }
+
+            channelBudget.take(now);
+            this.globalBudget.take(now);
+            this.inFlight.add(message.channelId);
+            this.deliver(message).finally(() => {
+                this.inFlight.delete(message.channelId);
+                this.drain();
+            });
+        }
+
+        if (wakeAt !== Infinity) {
+            this.timer = setTimeout(() => this.drain(), wakeAt - now);
+        }
+    }
+
+    private async deliver(message: OutboundMessage): Promise<void> {
+        try {
+            const channel = await this.channels.resolveSendable(message.channelId);
+            const endSend = discordSendDuration.startTimer();
+            // With an enforced nonce Discord returns the earlier message instead of posting a
+            // second one, e.g. when a retry follows a send whose response was lost.
+            const sent = message.editMessageId
+                ? await channel.messages.edit(message.editMessageId, message.payload)
+                : await channel.send(message.dedupKey ? { ...message.payload, nonce: message.dedupKey, enforceNonce: true } : message.payload);
+            endSend();
+            if (message.editMessageId) {
+                this.stats.edited++;
+            } else {
+                this.stats.sent++;
+            }
+            if (message.dedupKey) {
+                this.recentlySent.set(message.dedupKey, true);
+            }
+            this.remove(message);
+            if (message.concertIds && this.onDelivered) {
+                await this.report(message, sent.id);
+            }
+        } catch (error) {
+            message.attempts++;
+            const permanent = error instanceof ChannelUnavailableError
+                || (error instanceof DiscordAPIError && (PERMANENT_ERROR_CODES.has(error.code as number) || error.code === UNKNOWN_MESSAGE));
+            if (error instanceof DiscordAPIError && PERMANENT_ERROR_CODES.has(error.code as number)) {
+                // Our cached view of the channel was stale.
+                this.channels.invalidate(message.channelId);
+            }
+            if (permanent || message.attempts >= MAX_ATTEMPTS) {
+                log.error(`Dropping message ${message.id} for channel ${message.channelId} after ${message.attempts} attempts`, { err: error });
+                this.stats.dropped++;
+                this.remove(message);
+            } else {
+                const backoff = Math.min(MAX_BACKOFF_MS, BASE_BACKOFF_MS * 2 ** (message.attempts - 1));
+                message.notBefore = Date.now() + backoff;
+                this.stats.retried++;
+                log.warn(`Send to channel ${message.channelId} failed (attempt ${message.attempts}), retrying in ${backoff}ms`, { err: error });
+            }
+        }
+        this.persistSoon();
+    }
+
+    // The message is out either way, so a failing listener is only logged.
+    private async report(message: OutboundMessage, messageId: string): Promise<void> {
+        try {
+            await this.onDelivered!({
+                channelId: message.channelId,
+                messageId,
+                concertIds: message.concertIds!,
+                embedded: (message.payload.embeds?.length ?? 0) > 0,
+                edited: !!message.editMessageId,
+            });
+        } catch (error) {
+            log.error(`Delivery listener failed for message ${messageId} in channel ${message.channelId}`, { err: error });
+        }
+    }
+
+    private remove(message: OutboundMessage): void {
+        const index = this.messages.indexOf(message);
+        if (index !== -1) {
+            this.messages.splice(index, 1);
+        }
+    }
+
+    /**
+     * Writes the queue to disk. Writes run one at a time and go through a temp file,
+     * so a crash cannot leave a torn file. Calls made while a write is running share
+     * the single write queued behind it, which saves the state as of when it starts,
+     * so a burst of changes costs two writes rather than one each. A failed write
+     * rejects its callers only; later writes still run.
+     */
+    private persist(): Promise<void> {
+        outboundQueueDepth.set(this.messages.length);
+        if (!this.nextWrite) {
+            const write = this.writing.then(() => {
+                this.nextWrite = null;
+                return this.writeFile();
+            });
+            this.nextWrite = write;
+            this.writing = write.catch(() => undefined);
+        }
+        return this.nextWrite;
+    }
+
+    // Persists within PERSIST_DELAY_MS, for changes that nobody waits on, i.e. finished sends.
+    private persistSoon(): void {
+        outboundQueueDepth.set(this.messages.length);
+        if (this.persistTimer) {
+            return;
+        }
+        this.persistTimer = setTimeout(() => {
+            this.persistTimer = null;
+            // Already logged, and the next write saves the current state anyway.
+            this.persist().catch(() => undefined);
+        }, PERSIST_DELAY_MS);
+    }
+
+    private async writeFile(): Promise<void> {
+        const data = JSON.stringify(this.messages);
+        const tmpPath = `${this.filePath}.tmp`;
+        try {
+            await fs.mkdir(path.dirname(this.filePath), { recursive: true });
+            await fs.writeFile(tmpPath, data);
+            await fs.rename(tmpPath, this.filePath);
+        } catch (error) {
+            log.error(`Failed to persist queue to ${this.filePath}`, { err: error });
+            throw error;
+        }
+    }
+} 
\ No newline at end of file
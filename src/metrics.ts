@@ -0,0 +1,145 @@
+// @ts-nocheck
+
+type Labels = Record<string, string>;
+
+// Latency buckets in seconds, from a fast cache hit to a stalled upstream.
+export const LATENCY_BUCKETS = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30];
+// Payload size buckets in bytes, 1 KiB to 16 MiB.
+export const SIZE_BUCKETS = [1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216];
+
+function labelKey(labels: Labels = {}): string {
+    return Object.keys(labels).sort().map(key => `${key}="${String(labels[key]).replace(/\\/g, '\\\\').replace(/"/g, '\\"').replace(/\n/g, '\\n')}"`).join(',');
+}
+
+function withLabels(name: string, key: string, extra?: string): string {
+    const parts = [key, extra].filter(Boolean).join(',');
+    return parts ? `${name}{${parts}}` : name;
+}
+
+interface Metric {
+    render(): string;
+}
+
+export class Counter implements Metric {
+    private values = new Map<string, number>();
+
+    readonly name: string;
+    readonly help: string;
+
+    constructor(name: string, help: string) {
+        this.name = name;
+        this.help = help;
+        registry.push(this);
+    }
+
+    inc(labels?: Labels, value = 1): void {
+        const key = labelKey(labels);
+        this.values.set(key, (this.values.get(key) ?? 0) + value);
+    }
+
+    render(): string {
+        const lines = [`# HELP ${this.name} ${this.help}`, `# TYPE ${this.name} counter`];
+        this.values.forEach((value, key) => lines.push(`${withLabels(this.name, key)} ${value}`));
+        return lines.join('\n');
+    }
+}
+
+export class Gauge implements Metric {
+    private values = new Map<string, number>();
+
+    readonly name: string;
+    readonly help: string;
+
+    constructor(name: string, help: string) {
+        this.name = name;
+        this.help = help;
+        registry.push(this);
+    }
+
+    set(value: number, labels?: Labels): void {
+        this.values.set(labelKey(labels), value);
+    }
+
+    render(): string {
+        const lines = [`# HELP ${this.name} ${this.help}`, `# TYPE ${this.name} gauge`];
+        this.values.forEach((value, key) => lines.push(`${withLabels(this.name, key)} ${value}`));
+        return lines.join('\n');
+    }
+}
+
+export class Histogram implements Metric {
+    private series = new Map<string, { counts: number[]; sum: number; count: number }>();
+
+    readonly name: string;
+    readonly help: string;
+    readonly buckets: number[];
+
+    constructor(name: string, help: string, buckets: number[] = LATENCY_BUCKETS) {
+        this.name = name;
+        this.help = help;
+        this.buckets = buckets;
+        registry.push(this);
+    }
+
+    observe(value: number, labels?: Labels): void {
+        const key = labelKey(labels);
+        let series = this.series.get(key);
+        if (!series) {
+            series = { counts: new Array(this.buckets.length).fill(0), sum: 0, count: 0 };
+            this.series.set(key, series);
+        }
+        for (let i = 0; i < this.buckets.length; i++) {
+            if (value <= this.buckets[i]) {
+                series.counts[i]++;
+            }
+        }
+        series.sum += value;
+        series.count++;
+    }
+
+    /**
+     * Starts timing; call the returned function to record the elapsed seconds.
+     */
+    startTimer(labels?: Labels): () => number {
+        const start = process.hrtime.bigint();
+        return () => {
+            const seconds = Number(process.hrtime.bigint() - start) / 1e9;
+            this.observe(seconds, labels);
+            return seconds;
+        };
+    }
+
+    render(): string {
+        const lines = [`# HELP ${this.name} ${this.help}`, `# TYPE ${this.name} histogram`];
+        this.series.forEach((series, key) => {
+            this.buckets.forEach((bucket, i) => {
+                lines.push(`${withLabels(`${this.name}_bucket`, key, `le="${bucket}"`)} ${series.counts[i]}`);
+            });
+            lines.push(`${withLabels(`${this.name}_bucket`, key, 'le="+Inf"')} ${series.count}`);
+            lines.push(`${withLabels(`${this.name}_sum`, key)} ${series.sum}`);
+            lines.push(`${withLabels(`${this.name}_count`, key)} ${series.count}`);
+        });
+        return lines.join('\n');
+    }
+}
+
+const registry: Metric[] = [];
+
+/**
+ * All registered metrics in the Prometheus text exposition format.
+ */
+export function renderMetrics(): string {
+    return registry.map(metric => metric.render()).join('\n\n') + '\n';
+}
+
+export const seatedFetchDuration = new Histogram('seated_fetch_duration_seconds', 'Time to fetch one Seated tour document, including the body.');
+export const seatedPayloadBytes = new Histogram('seated_payload_bytes', 'Size of Seated tour documents.', SIZE_BUCKETS);
+export const seatedParseDuration = new Histogram('seated_parse_duration_seconds', 'Time to parse and normalize one Seated tour document.');
+export const supabaseQueryDuration = new Histogram('supabase_query_duration_seconds', 'Supabase query latency by DatabaseService method.');
+export const discordSendDuration = new Histogram('discord_send_duration_seconds', 'Latency of channel.send calls.');
+export const interactionAckDuration = new Histogram('discord_interaction_ack_seconds', 'Time from interaction creation to the first reply, by command.');
+export const concertsSeen = new Counter('concerts_seen_total', 'Scraped concerts by diff result (new, changed, removed or duplicate).');
+export const rateLimitHits = new Counter('discord_rate_limited_total', 'Rate limit events reported by discord.js.');
+export const tourCheckSkips = new Counter('tour_check_skipped_total', 'Tour checks that skipped the database diff, by reason.');
+export const tourCheckTimeSaved = new Counter('tour_check_time_saved_seconds_total', 'Estimated database diff time saved by skipped tour checks.');
+export const outboundQueueDepth = new Gauge('outbound_queue_depth', 'Messages waiting in the outbound queue.'); 
\ No newline at end of file
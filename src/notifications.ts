@@ -0,0 +1,162 @@
+// @ts-nocheck
+import { NotifyArea } from './database';
+import { Gazetteer, ParsedLocation } from './gazetteer';
+import { COUNTRY_ALIASES } from './gazetteerData';
+import { KM_PER_MILE, coveringCells, distanceKm, geohash } from './geo';
+
+// Geohash precision of the cells radius areas are bucketed by, about 156 by 156 km
+// at the equator. Coarser cells mean fewer entries per area but more distance checks.
+const CELL_PRECISION = 3;
+
+export const DEFAULT_RADIUS_MILES = 100;
+export const MAX_RADIUS_MILES = 500;
+
+// A notify area before it is tied to a DM channel.
+export type AreaRequest = Omit<NotifyArea, 'dmChannelId'>;
+
+/**
+ * The area for a state, province or country, e.g. "CO", "Ontario" or "Canada".
+ * A two-letter code is read as a US state or Canadian province first.
+ */
+export function regionArea(gazetteer: Gazetteer, userId: string, text: string): AreaRequest | null {
+    const region = gazetteer.findRegion(text);
+    if (region) {
+        return {
+            userId, area: `region:${region.country}:${region.code}`, label: `${region.name}, ${region.country}`,
+            country: region.country, region: region.code, latitude: null, longitude: null, radiusKm: null,
+        };
+    }
+    const country = COUNTRY_ALIASES[text.trim().toLowerCase()];
+    if (country) {
+        return { userId, area: `region:${country}:`, label: text.trim(), country, region: null, latitude: null, longitude: null, radiusKm: null };
+    }
+    return null;
+}
+
+// The area within `miles` of a place the gazetteer can locate, e.g. "Denver, CO".
+export function radiusArea(gazetteer: Gazetteer, userId: string, place: string, miles: number): AreaRequest | null {
+    const parsed = gazetteer.parseLocation(place);
+    if (parsed.latitude === null || parsed.longitude === null) {
+        return null;
+    }
+    const radiusKm = Math.round(Math.min(miles, MAX_RADIUS_MILES) * KM_PER_MILE);
+    const name = parsed.city ?? gazetteer.regionName(parsed.region!, parsed.country!);
+    return {
+        userId,
+        area: `near:${parsed.latitude.toFixed(2)},${parsed.longitude.toFixed(2)}:${radiusKm}`,
+        label: [name, parsed.city ? parsed.region ?? parsed.country : null].filter(Boolean).join(', '),
+        country: parsed.country,
+        region: parsed.region,
+        latitude: parsed.latitude,
+        longitude: parsed.longitude,
+        radiusKm,
+    };
+}
+
+export function describeArea(area: NotifyArea | AreaRequest): string {
+    return area.radiusKm !== null
+        ? `within ${Math.round(area.radiusKm / KM_PER_MILE)} miles of ${area.label}`
+        : `in ${area.label}`;
+}
+
+/**
+ * The notify areas of all fans, indexed so that matching a show does not look
+ * at every area: region areas by country and region, radius areas by the
+ * geohash cells their circle overlaps. Only the radius areas in the show's own
+ * cell get the exact distance check.
+ */
+export class NotificationIndex {
+    private areas = new Map<string, NotifyArea>(); // By user id and area key
+    private byRegion = new Map<string, Map<string, NotifyArea>>(); // 'US:CO', or 'US:' for the whole country
+    private byCell = new Map<string, Map<string, NotifyArea>>(); // Geohash cell -> radius areas overlapping it
+
+    get size(): number {
+        return this.areas.size;
+    }
+
+    replaceAll(areas: NotifyArea[]): void {
+        this.areas.clear();
+        this.byRegion.clear();
+        this.byCell.clear();
+        areas.forEach(area => this.add(area));
+    }
+
+    add(area: NotifyArea): void {
+        const id = `${area.userId}|${area.area}`;
+        this.remove(area.userId, area.area);
+        this.areas.set(id, area);
+        for (const key of this.bucketsOf(area)) {
+            const buckets = area.radiusKm !== null ? this.byCell : this.byRegion;
+            let bucket = buckets.get(key);
+            if (!bucket) {
+                bucket = new Map();
+                buckets.set(key, bucket);
+            }
+            bucket.set(id, area);
+        }
+    }
+
+    remove(userId: string, areaKey: string): void {
+        const id = `${userId}|${areaKey}`;
+        const area = this.areas.get(id);
+        if (!area) {
+            return;
+        }
+        this.areas.delete(id);
+        const buckets = area.radiusKm !== null ? this.byCell : this.byRegion;
+        for (const key of this.bucketsOf(area)) {
+            const bucket = buckets.get(key);
+            bucket?.delete(id);
+            if (bucket?.size === 0) {
+                buckets.delete(key);
+            }
+        }
+    }
+
+    removeUser(userId: string): void {
+        for (const area of [...this.areas.values()]) {
+            if (area.userId === userId) {
+                this.remove(userId, area.area);
+            }
+        }
+    }
+
+    /**
+     * The fans to notify about a show at `location`, one area per user. Radius
+     * areas are only checked when the show's city was found, as the center of
+     * its state could be hundreds of miles from the venue.
+     */
+    match(location: ParsedLocation): Map<string, NotifyArea> {
+        const matches = new Map<string, NotifyArea>();
+        const addAll = (areas: Iterable<NotifyArea> | undefined) => {
+            for (const area of areas ?? []) {
+                if (!matches.has(area.userId)) {
+                    matches.set(area.userId, area);
+                }
+            }
+        };
+
+        if (location.country) {
+            addAll(this.byRegion.get(`${location.country}:`)?.values());
+            if (location.region) {
+                addAll(this.byRegion.get(`${location.country}:${location.region}`)?.values());
+            }
+        }
+        if (location.precision === 'city' && location.latitude !== null && location.longitude !== null) {
+            const cell = this.byCell.get(geohash(location.latitude, location.longitude, CELL_PRECISION));
+            for (const area of cell?.values() ?? []) {
+                if (!matches.has(area.userId)
+                    && distanceKm(area.latitude!, area.longitude!, location.latitude, location.longitude) <= area.radiusKm!) {
+                    matches.set(area.userId, area);
+                }
+            }
+        }
+        return matches;
+    }
+
+    private bucketsOf(area: NotifyArea): string[] {
+        return area.radiusKm !== null
+            ? coveringCells(area.latitude!, area.longitude!, area.radiusKm, CELL_PRECISION)
+            : [`${area.country}:${area.region ?? ''}`];
+    }
+} 
\ No newline at end of file
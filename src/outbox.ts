@@ -0,0 +1,162 @@
+// @ts-nocheck
+import { DatabaseService, OutboxEntry } from './database';
+import { Concert } from './scraper';
+import { createLogger } from './logger';
+
+const log = createLogger('outbox');
+
+// Entries handed to the send queue per dispatch.
+const OUTBOX_BATCH_SIZE = Number(process.env.OUTBOX_BATCH_SIZE) || 50;
+// Hand-offs before an entry is left for someone to look at, e.g. when the channel is gone for good.
+const OUTBOX_MAX_ATTEMPTS = Number(process.env.OUTBOX_MAX_ATTEMPTS) || 5;
+// How often the backlog is checked besides the dispatch after every tour check.
+const OUTBOX_DISPATCH_INTERVAL_MS = (Number(process.env.OUTBOX_DISPATCH_INTERVAL_SECONDS) || 60) * 1000;
+
+// What a post did with the concerts it was given, by concert id.
+export interface PostResult {
+    queued: string[]; // Handed to the send queue for at least one channel
+    complete: string[]; // Announced in every channel that gets them, so nothing is left to send
+}
+
+/**
+ * Posts the announcements in the announcement_outbox table. Delivery is at least
+ * once per channel: `post` skips the channels that already have a recorded post
+ * of a show or have one waiting in the send queue, and an entry stays pending
+ * until every channel that gets the show has it. A copy the queue gave up on is
+ * handed over again on a later dispatch, until the entry runs out of attempts.
+ *
+ * Fan DMs are a separate step over the same entries: `notify` queues a show's
+ * DMs once and the entry records it, whatever happens to the channel posts.
+ */
+export class OutboxDispatcher {
+    private readonly database: DatabaseService;
+    private readonly post: (concerts: Concert[]) => Promise<PostResult>;
+    private readonly notify: (concerts: Concert[]) => Promise<void>;
+
+    private timer: NodeJS.Timeout | null = null;
+    private dispatching: Promise<number> | null = null;
+    private backlog: number | null = null; // Unposted entries as counted after the last dispatch
+    private stats = { dispatched: 0, skipped: 0, delivered: 0, notified: 0, lastDispatchAt: null as Date | null };
+
+    // `post` puts announcements for the given concerts on the queue for the channels that do not have them yet,
+    // `notify` queues their fan DMs.
+    constructor(database: DatabaseService, post: (concerts: Concert[]) => Promise<PostResult>, notify: (concerts: Concert[]) => Promise<void>) {
+        this.database = database;
+        this.post = post;
+        this.notify = notify;
+    }
+
+    start(): void {
+        if (this.timer) {
+            return;
+        }
+        this.timer = setInterval(() => {
+            this.dispatch().catch(error => log.error('Outbox dispatch failed', { err: error }));
+        }, OUTBOX_DISPATCH_INTERVAL_MS);
+        // Catch up on anything left pending by the last run.
+        this.dispatch().catch(error => log.error('Outbox dispatch failed', { err: error }));
+    }
+
+    stop(): void {
+        if (this.timer) {
+            clearInterval(this.timer);
+            this.timer = null;
+        }
+    }
+
+    /**
+     * Hands the oldest pending announcements and fan DMs to the send queue and
+     * returns how many announcements were handed over. Concurrent calls share one
+     * dispatch. The two steps run independently; a failed DM step is only logged.
+     */
+    dispatch(): Promise<number> {
+        if (!this.dispatching) {
+            this.dispatching = this.dispatchBoth().finally(() => {
+                this.dispatching = null;
+            });
+        }
+        return this.dispatching;
+    }
+
+    // Unposted entries as of the last dispatch, or null before the first count. Cached, so
+    // status commands that report it do not wait on the database.
+    getBacklog(): number | null {
+        return this.backlog;
+    }
+
+    getStats(): { dispatched: number; skipped: number; delivered: number; notified: number; lastDispatchAt: Date | null } {
+        return { ...this.stats };
+    }
+
+    private async dispatchBoth(): Promise<number> {
+        this.stats.lastDispatchAt = new Date();
+        const [posted, notified] = await Promise.allSettled([this.dispatchPosts(), this.dispatchNotifications()]);
+        if (notified.status === 'rejected') {
+            log.error('Could not queue fan DMs, leaving them in the outbox', { err: notified.reason });
+        }
+        try {
+            this.backlog = await this.database.countPendingOutbox();
+        } catch (error) {
+            log.warn('Could not count the outbox backlog', { err: error });
+        }
+        if (posted.status === 'rejected') {
+            throw posted.reason;
+        }
+        return posted.value;
+    }
+
+    private async dispatchPosts(): Promise<number> {
+        const entries = await this.database.getPendingOutbox(OUTBOX_BATCH_SIZE, OUTBOX_MAX_ATTEMPTS);
+        if (entries.length === 0) {
+            return 0;
+        }
+
+        const concerts = await this.database.getConcertsByIds(entries.map(entry => entry.concertId));
+        concerts.sort((a, b) => new Date(a.date).getTime() - new Date(b.date).getTime());
+        let result: PostResult;
+        try {
+            result = concerts.length > 0 ? await this.post(concerts) : { queued: [], complete: [] };
+        } catch (error) {
+            // Count the attempt anyway, so an entry that keeps failing to post runs out of attempts.
+            await this.database.recordOutboxAttempts(entries);
+            throw error;
+        }
+
+        // A show that is no longer stored has nothing left to announce either.
+        const stored = new Set(concerts.map(concert => concert.id));
+        const complete = [...result.complete, ...entries.map(entry => entry.concertId).filter(id => !stored.has(id))];
+        if (complete.length > 0) {
+            await this.database.markOutboxPosted(complete);
+            this.stats.delivered += complete.length;
+        }
+        const queued = new Set(result.queued);
+        const handedOver = entries.filter(entry => queued.has(entry.concertId));
+        if (handedOver.length > 0) {
+            await this.database.recordOutboxAttempts(handedOver);
+        }
+
+        // The rest still have copies waiting in the send queue from an earlier dispatch.
+        const waiting = entries.length - handedOver.length - complete.length;
+        this.stats.dispatched += handedOver.length;
+        this.stats.skipped += waiting;
+        log.info(`Dispatched ${handedOver.length} pending announcements, closed ${complete.length} and left ${waiting} waiting in the send queue.`);
+        return handedOver.length;
+    }
+
+    // Queues the DMs of shows whose fans have not been notified yet, then records that they were.
+    private async dispatchNotifications(): Promise<number> {
+        const entries = await this.database.getUnnotifiedOutbox(OUTBOX_BATCH_SIZE);
+        if (entries.length === 0) {
+            return 0;
+        }
+        const concerts = await this.database.getConcertsByIds(entries.map(entry => entry.concertId));
+        concerts.sort((a, b) => new Date(a.date).getTime() - new Date(b.date).getTime());
+        if (concerts.length > 0) {
+            await this.notify(concerts);
+        }
+        // Should this fail, the DMs are queued again next time; their dedup keys catch repeats within the dedup window.
+        await this.database.markOutboxNotified(entries.map(entry => entry.concertId));
+        this.stats.notified += concerts.length;
+        return concerts.length;
+    }
+} 
\ No newline at end of file
@@ -0,0 +1,275 @@
+// @ts-nocheck
+import { SchedulerState } from './database';
+import { createLogger } from './logger';
+
+const log = createLogger('poller');
+
+const DAYS = ['sun', 'mon', 'tue', 'wed', 'thu', 'fri', 'sat'];
+
+// A recurring UTC time range in which new dates are likely, e.g. "tue@14:00-18:00".
+interface AnnouncementWindow {
+    day: number | null; // 0 = Sunday, null = every day
+    startMinute: number; // Minutes after midnight UTC
+    endMinute: number;
+}
+
+export interface PollSchedulerOptions {
+    minIntervalMs: number;
+    maxIntervalMs: number;
+    backoffFactor: number;
+    jitter: number; // Fraction of the interval to randomly add or subtract, e.g. 0.1
+    windows: AnnouncementWindow[];
+}
+
+export interface PollSchedulerState {
+    intervalMs: number;
+    lastRunAt: Date | null;
+    lastSuccessAt: Date | null;
+    lastChangeAt: Date | null;
+    nextRunAt: Date | null;
+    overdueMs: number; // How far past its due time the pending check is, for alerting on scrape lag
+    runs: number;
+}
+
+// Where the cadence is kept between restarts.
+export interface PollStateStore {
+    load(): Promise<SchedulerState | null>;
+    save(state: SchedulerState): Promise<void>;
+}
+
+/**
+ * Parses POLL_ANNOUNCEMENT_WINDOWS, a comma-separated list of "<day>@HH:MM-HH:MM"
+ * ranges in UTC where day is mon..sun or * for every day. A range that ends
+ * before it starts runs past midnight into the next day, e.g. "fri@22:00-02:00".
+ */
+export function parseAnnouncementWindows(spec: string): AnnouncementWindow[] {
+    const toMinute = (time: string) => {
+        const [hours, minutes] = time.split(':').map(Number);
+        return hours * 60 + minutes;
+    };
+    const MINUTES_PER_DAY = 24 * 60;
+
+    return spec.split(',').map(part => part.trim()).filter(Boolean).flatMap(part => {
+        const match = /^(\*|[a-z]{3})@(\d{1,2}:[0-5]\d)-(\d{1,2}:[0-5]\d)$/i.exec(part);
+        const day = match && match[1] !== '*' ? DAYS.indexOf(match[1].toLowerCase()) : null;
+        const startMinute = match ? toMinute(match[2]) : 0;
+        const endMinute = match ? toMinute(match[3]) : 0;
+        if (!match || day === -1 || startMinute >= MINUTES_PER_DAY || endMinute > MINUTES_PER_DAY || startMinute === endMinute) {
+            log.warn(`Ignoring invalid announcement window '${part}'.`);
+            return [];
+        }
+        if (endMinute > startMinute) {
+            return [{ day, startMinute, endMinute }];
+        }
+        // Split at midnight, so both halves are plain same-day ranges. "22:00-00:00" has no second half.
+        const windows = [{ day, startMinute, endMinute: MINUTES_PER_DAY }];
+        if (endMinute > 0) {
+            windows.push({ day: day === null ? null : (day + 1) % 7, startMinute: 0, endMinute });
+        }
+        return windows;
+    });
+}
+
+// A numeric setting, or `fallback` when it is unset or not a finite number `isValid` accepts.
+// A NaN or negative delay would make setTimeout fire at once and poll Seated in a tight loop.
+function envNumber(name: string, fallback: number, isValid: (value: number) => boolean): number {
+    const raw = process.env[name];
+    if (raw === undefined || raw.trim() === '') {
+        return fallback;
+    }
+    const value = Number(raw);
+    if (!Number.isFinite(value) || !isValid(value)) {
+        log.warn(`Ignoring invalid ${name} '${raw}', using ${fallback}.`);
+        return fallback;
+    }
+    return value;
+}
+
+export function pollOptionsFromEnv(): PollSchedulerOptions {
+    const minutes = (name: string, fallback: number) => envNumber(name, fallback, value => value > 0) * 60 * 1000;
+    const minIntervalMs = minutes('POLL_MIN_INTERVAL_MINUTES', 15);
+    return {
+        minIntervalMs,
+        maxIntervalMs: Math.max(minIntervalMs, minutes('POLL_MAX_INTERVAL_MINUTES', 240)),
+        backoffFactor: envNumber('POLL_BACKOFF_FACTOR', 2, value => value >= 1),
+        jitter: envNumber('POLL_JITTER', 0.1, value => value >= 0 && value < 1),
+        windows: parseAnnouncementWindows(process.env.POLL_ANNOUNCEMENT_WINDOWS || ''),
+    };
+}
+
+/**
+ * Runs a check on an adaptive cadence: straight back to the minimum interval when
+ * a change is reported, and at the minimum throughout announcement windows;
+ * otherwise the interval grows by backoffFactor after every quiet run, up to the
+ * maximum. Jitter keeps runs from lining up with other pollers.
+ */
+export class AdaptivePollScheduler {
+    private readonly run: () => Promise<void>;
+    private readonly options: PollSchedulerOptions;
+    private readonly store: PollStateStore | null;
+
+    private intervalMs: number;
+    private timer: NodeJS.Timeout | null = null;
+    private nextRunAt: number | null = null;
+    private lastRunAt: number | null = null;
+    private lastSuccessAt: number | null = null;
+    private lastChangeAt: number | null = null;
+    private runs = 0;
+
+    constructor(run: () => Promise<void>, options: PollSchedulerOptions, store: PollStateStore | null = null) {
+        this.run = run;
+        this.options = options;
+        this.store = store;
+        this.intervalMs = options.minIntervalMs;
+    }
+
+    /**
+     * Restores the saved cadence and schedules the next check for its saved due
+     * time. If that time has passed (or nothing was saved) the check runs now.
+     */
+    async start(): Promise<void> {
+        if (this.timer || this.nextRunAt !== null) {
+            return;
+        }
+        this.nextRunAt = Date.now(); // Marks the scheduler as started while the state loads
+
+        const saved = this.store ? await this.store.load() : null;
+        let delay = 0;
+        if (saved) {
+            this.intervalMs = Math.min(this.options.maxIntervalMs, Math.max(this.options.minIntervalMs, saved.intervalMs));
+            this.lastSuccessAt = saved.lastSuccessAt?.getTime() ?? null;
+            this.lastChangeAt = saved.lastChangeAt?.getTime() ?? null;
+            if (saved.nextDueAt) {
+                delay = this.clampToWindow(Math.max(0, saved.nextDueAt.getTime() - Date.now()));
+            }
+        }
+        if (this.nextRunAt === null) {
+            return; // stop() was called while loading
+        }
+
+        if (delay === 0) {
+            const since = this.lastSuccessAt ? new Date(this.lastSuccessAt).toISOString() : 'never';
+            log.info(`Check is overdue (last success: ${since}). Running now.`);
+        }
+        this.schedule(delay);
+        log.info(`Started with ${this.options.minIntervalMs / 60000}-${this.options.maxIntervalMs / 60000} minute intervals and ${this.options.windows.length} announcement windows.`);
+    }
+
+    stop(): void {
+        if (this.timer) {
+            clearTimeout(this.timer);
+            this.timer = null;
+        }
+        this.nextRunAt = null;
+    }
+
+    /**
+     * Reports that new data was seen (by a scheduled or a manual check), which resets
+     * the cadence to the minimum interval and pulls the next run forward if needed.
+     */
+    notifyChange(): void {
+        this.lastChangeAt = Date.now();
+        this.intervalMs = this.options.minIntervalMs;
+        if (this.timer && this.nextRunAt !== null && this.nextRunAt - Date.now() > this.options.minIntervalMs) {
+            this.schedule(this.nextDelay());
+        }
+    }
+
+    getState(): PollSchedulerState {
+        return {
+            intervalMs: this.intervalMs,
+            lastRunAt: this.lastRunAt ? new Date(this.lastRunAt) : null,
+            lastSuccessAt: this.lastSuccessAt ? new Date(this.lastSuccessAt) : null,
+            lastChangeAt: this.lastChangeAt ? new Date(this.lastChangeAt) : null,
+            nextRunAt: this.nextRunAt ? new Date(this.nextRunAt) : null,
+            overdueMs: this.nextRunAt ? Math.max(0, Date.now() - this.nextRunAt) : 0,
+            runs: this.runs,
+        };
+    }
+
+    private schedule(delayMs: number): void {
+        if (this.timer) {
+            clearTimeout(this.timer);
+        }
+        this.nextRunAt = Date.now() + delayMs;
+        this.timer = setTimeout(() => this.tick(), delayMs);
+    }
+
+    private async tick(): Promise<void> {
+        this.timer = null;
+        const startedAt = Date.now();
+        this.lastRunAt = startedAt;
+        this.runs++;
+
+        try {
+            await this.run();
+            this.lastSuccessAt = Date.now();
+            const changed = this.lastChangeAt !== null && this.lastChangeAt >= startedAt;
+            if (!changed) {
+                this.intervalMs = Math.min(this.options.maxIntervalMs, this.intervalMs * this.options.backoffFactor);
+            }
+        } catch (error) {
+            // Keep the current interval so a failing upstream is neither hammered nor forgotten.
+            log.error('Scheduled run failed', { err: error });
+        }
+
+        // stop() clears nextRunAt; don't reschedule after it.
+        if (this.nextRunAt !== null) {
+            this.schedule(this.nextDelay());
+            log.info(`Next check in ${Math.round((this.nextRunAt - Date.now()) / 60000)} minutes.`);
+            await this.persist();
+        }
+    }
+
+    private async persist(): Promise<void> {
+        if (!this.store) {
+            return;
+        }
+        const toDate = (value: number | null) => (value !== null ? new Date(value) : null);
+        await this.store.save({
+            lastSuccessAt: toDate(this.lastSuccessAt),
+            nextDueAt: toDate(this.nextRunAt),
+            intervalMs: this.intervalMs,
+            lastChangeAt: toDate(this.lastChangeAt),
+        });
+    }
+
+    private nextDelay(): number {
+        const interval = this.inAnnouncementWindow(new Date())
+            ? this.options.minIntervalMs
+            : this.intervalMs;
+        const jitter = interval * this.options.jitter * (Math.random() * 2 - 1);
+        return this.clampToWindow(Math.max(this.options.minIntervalMs / 2, interval + jitter));
+    }
+
+    // Never sleep through the start of an announcement window.
+    private clampToWindow(delay: number): number {
+        const windowStart = this.nextWindowStart(Date.now());
+        return windowStart !== null ? Math.min(delay, windowStart - Date.now()) : delay;
+    }
+
+    private inAnnouncementWindow(date: Date): boolean {
+        const minute = date.getUTCHours() * 60 + date.getUTCMinutes();
+        return this.options.windows.some(window =>
+            (window.day === null || window.day === date.getUTCDay())
+            && minute >= window.startMinute && minute < window.endMinute);
+    }
+
+    // The earliest window start within the next 7 days, as epoch ms.
+    private nextWindowStart(now: number): number | null {
+        let earliest: number | null = null;
+        const midnight = new Date(now);
+        midnight.setUTCHours(0, 0, 0, 0);
+        for (let dayOffset = 0; dayOffset <= 7; dayOffset++) {
+            const dayStart = midnight.getTime() + dayOffset * 24 * 60 * 60 * 1000;
+            const weekday = new Date(dayStart).getUTCDay();
+            for (const window of this.options.windows) {
+                const start = dayStart + window.startMinute * 60 * 1000;
+                if ((window.day === null || window.day === weekday) && start > now && (earliest === null || start < earliest)) {
+                    earliest = start;
+                }
+            }
+        }
+        return earliest;
+    }
+} 
\ No newline at end of file
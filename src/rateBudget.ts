@@ -0,0 +1,38 @@
+// @ts-nocheck
+
+/**
+ * At most `limit` events per sliding window of `windowMs`. Used to pace sends
+ * below Discord's rate limits instead of waiting for a 429.
+ */
+export class RateBudget {
+    private readonly limit: number;
+    private readonly windowMs: number;
+    private taken: number[] = []; // Epoch ms of the events in the current window, oldest first
+
+    constructor(limit: number, windowMs: number) {
+        this.limit = limit;
+        this.windowMs = windowMs;
+    }
+
+    // When the next event fits in the budget: `now`, or when the oldest event leaves the window.
+    availableAt(now: number): number {
+        this.prune(now);
+        return this.taken.length < this.limit ? now : this.taken[0] + this.windowMs;
+    }
+
+    take(now: number): void {
+        this.taken.push(now);
+    }
+
+    // Whether nothing is left in the window, i.e. the budget can be forgotten.
+    isIdle(now: number): boolean {
+        this.prune(now);
+        return this.taken.length === 0;
+    }
+
+    private prune(now: number): void {
+        while (this.taken.length > 0 && this.taken[0] + this.windowMs <= now) {
+            this.taken.shift();
+        }
+    }
+} 
\ No newline at end of file
@@ -1,10 +1,18 @@
 // @ts-nocheck
+import { createHash } from 'crypto';
+import { mapWithConcurrency } from './concurrency';
+import { createLogger } from './logger';
+import { seatedFetchDuration, seatedParseDuration, seatedPayloadBytes } from './metrics';
+
+const log = createLogger('scraper');
+
 export interface Concert {
     id: string; // For the ticket link
     venue: string;
     location: string;
     date: string; // This is the YYYY-MM-DD date
     details?: string; // Optional, for "Goose & Mt. Joy"
+    source?: string; // The Seated tour id this concert was scraped from
 }
 
 interface SeatedTourEvent {
@@ -18,54 +26,248 @@ interface SeatedTourEvent {
     type: string;
 }
 
+export interface ScrapeResult {
+    notModified: boolean; // True when every feed answered 304 and nothing needs diffing
+    unchanged: boolean; // True when every feed was not modified or matched its last fingerprint
+    concerts: Concert[]; // Concerts from the feeds that changed, tagged with their source
+    changedSources: string[]; // Tours whose full document was fetched and changed, i.e. the sources of `concerts`
+    fingerprint?: string;
+    failedSources: string[];
+}
+
+export interface FeedCheckpoint {
+    fingerprint: string;
+    checkedAt: Date; // Time of the last successful check that processed this payload
+}
+
+interface FeedValidators {
+    etag?: string;
+    lastModified?: string;
+}
+
+// Per-tour state carried between runs.
+interface SourceState {
+    validators: FeedValidators; // From the last response that was fully processed, sent back as conditional headers
+    fingerprint?: string; // Of the last payload that was fully processed
+}
+
+interface SourceResult {
+    tourId: string;
+    status: 'not-modified' | 'unchanged' | 'changed';
+    concerts: Concert[];
+    validators?: FeedValidators;
+    fingerprint?: string;
+}
+
+// Goose's own tour. Override with a comma-separated SEATED_TOUR_IDS to follow more artists.
+const DEFAULT_TOUR_IDS = ['fe8f12bb-393b-4746-a9c3-11b276c68b5d'];
+
 export class Scraper {
-    private readonly url = 'https://cdn.seated.com/api/tour/fe8f12bb-393b-4746-a9c3-11b276c68b5d?include=tour-events';
+    private readonly tourIds: string[];
+    private readonly concurrency = Number(process.env.SEATED_FETCH_CONCURRENCY) || 4;
+    private readonly timeoutMs = Number(process.env.SEATED_FETCH_TIMEOUT_MS) || 15000;
+    private readonly apiBase = (process.env.SEATED_API_BASE || 'https://cdn.seated.com/api').replace(/\/+$/, '');
+
+    private sources = new Map<string, SourceState>();
+    // Fingerprint over all sources at the last fully processed run.
+    private checkpoint: FeedCheckpoint | null = null;
+    // State from the most recent 200 responses, promoted by acknowledge() once the caller is done with it.
+    private pending = new Map<string, SourceState>();
+    // False when every source failed on the last scrape, so there is nothing to acknowledge.
+    private fetched = false;
+
+    constructor(tourIds?: string[]) {
+        const configured = (process.env.SEATED_TOUR_IDS || '')
+            .split(',')
+            .map(id => id.trim())
+            .filter(Boolean);
+        this.tourIds = tourIds ?? (configured.length > 0 ? configured : DEFAULT_TOUR_IDS);
+    }
 
     public async initialize(): Promise<void> {
         // No browser initialization needed anymore
-        console.log('Scraper initialized (API mode).');
+        log.info(`Scraper initialized (API mode) for ${this.tourIds.length} tour(s).`);
     }
 
-    public async scrapeTourDates(): Promise<Concert[]> {
-        console.log('Scraper: Fetching tour dates from Seated API.');
-        
-        try {
-            const response = await fetch(this.url);
-            if (!response.ok) {
-                throw new Error(`API request failed with status ${response.status}: ${await response.text()}`);
+    /**
+     * Fetches every configured tour in parallel (at most SEATED_FETCH_CONCURRENCY
+     * at once, each bounded by SEATED_FETCH_TIMEOUT_MS) and merges the results.
+     * A tour that fails or times out is reported in failedSources and does not
+     * affect the others.
+     */
+    public async scrapeTourDates(): Promise<ScrapeResult> {
+        log.info(`Fetching tour dates for ${this.tourIds.length} tour(s) from Seated API.`);
+        this.pending.clear();
+        this.fetched = false;
+
+        const settled = await mapWithConcurrency(this.tourIds, this.concurrency, tourId => this.scrapeTour(tourId));
+
+        const result: ScrapeResult = { notModified: true, unchanged: true, concerts: [], changedSources: [], failedSources: [] };
+        settled.forEach((outcome, i) => {
+            const tourId = this.tourIds[i];
+            if (outcome.status === 'rejected') {
+                log.error(`Error fetching or parsing tour ${tourId} from API`, { err: outcome.reason });
+                result.failedSources.push(tourId);
+                result.notModified = false;
+                result.unchanged = false;
+                return;
             }
-            
-            const jsonData = await response.json() as { included: SeatedTourEvent[] };
 
-            if (!jsonData.included || !Array.isArray(jsonData.included)) {
-                console.error('Scraper: Invalid data structure from API. "included" array not found.');
-                return [];
+            const source = outcome.value;
+            if (source.status !== 'not-modified') {
+                result.notModified = false;
+                this.pending.set(tourId, { validators: source.validators!, fingerprint: source.fingerprint });
+            }
+            if (source.status === 'changed') {
+                result.unchanged = false;
+                result.concerts.push(...source.concerts);
+                result.changedSources.push(tourId);
             }
+        });
+
+        if (result.failedSources.length === this.tourIds.length) {
+            // Nothing was fetched, so there is nothing to diff either.
+            result.unchanged = false;
+            return result;
+        }
+
+        this.fetched = true;
+        result.fingerprint = this.combinedFingerprint(this.pending);
+        log.info(`Found ${result.concerts.length} concerts in changed feeds via API.`);
+        return result;
+    }
+
+    /**
+     * Marks the last scraped payloads as fully processed. Until this is called the
+     * previous validators and fingerprints stay in effect, so a run that fails after
+     * scraping (e.g. while saving or posting) gets the full documents again next time.
+     * A scrape where every source failed fetched nothing, so the checkpoint stays put.
+     */
+    public acknowledge(): void {
+        if (!this.fetched) {
+            return;
+        }
+        this.pending.forEach((state, tourId) => this.sources.set(tourId, state));
+        this.pending.clear();
+        this.checkpoint = { fingerprint: this.combinedFingerprint(), checkedAt: new Date() };
+    }
 
-            const concerts: Concert[] = jsonData.included
-                .filter(event => event.type === 'tour-events' && event.attributes)
-                .map(event => {
-                    const attributes = event.attributes;
-                    return {
-                        id: event.id,
-                        date: attributes['starts-at-date-local'],
-                        venue: attributes['venue-name'],
-                        location: attributes['formatted-address'],
-                        details: attributes.details || undefined,
-                    };
-                });
-            
-            console.log(`Scraper: Found ${concerts.length} concerts via API.`);
-            return concerts;
-
-        } catch (error) {
-            console.error('Scraper: Error fetching or parsing tour data from API.', error);
-            return [];
+    public get sourceCount(): number {
+        return this.tourIds.length;
+    }
+
+    public getCheckpoint(): FeedCheckpoint | null {
+        return this.checkpoint;
+    }
+
+    private async scrapeTour(tourId: string): Promise<SourceResult> {
+        const url = `${this.apiBase}/tour/${tourId}?include=tour-events`;
+        const previous = this.sources.get(tourId);
+
+        const headers: Record<string, string> = {};
+        if (previous?.validators.etag) {
+            headers['If-None-Match'] = previous.validators.etag;
+        }
+        if (previous?.validators.lastModified) {
+            headers['If-Modified-Since'] = previous.validators.lastModified;
+        }
+
+        // The signal also covers reading the body, so a stalled download is cut off too.
+        const endFetch = seatedFetchDuration.startTimer({ tour: tourId });
+        const response = await fetch(url, { headers, signal: AbortSignal.timeout(this.timeoutMs) });
+        if (response.status === 304) {
+            endFetch();
+            log.debug(() => `Tour ${tourId} not modified since last check.`);
+            return { tourId, status: 'not-modified', concerts: [] };
+        }
+        if (!response.ok) {
+            throw new Error(`API request failed with status ${response.status}: ${await response.text()}`);
+        }
+
+        const validators: FeedValidators = {
+            etag: response.headers.get('etag') || undefined,
+            lastModified: response.headers.get('last-modified') || undefined,
+        };
+        
+        const body = await response.text();
+        endFetch();
+        seatedPayloadBytes.observe(Buffer.byteLength(body), { tour: tourId });
+
+        const endParse = seatedParseDuration.startTimer({ tour: tourId });
+        const jsonData = JSON.parse(body) as { included: SeatedTourEvent[] };
+
+        if (!jsonData.included || !Array.isArray(jsonData.included)) {
+            throw new Error('Invalid data structure from API. "included" array not found.');
+        }
+
+        const events = jsonData.included.filter(event => event.type === 'tour-events' && event.attributes);
+        const fingerprint = Scraper.fingerprint(events);
+
+        if (previous?.fingerprint === fingerprint) {
+            endParse();
+            log.debug(() => `Tour ${tourId} fingerprint unchanged.`);
+            return { tourId, status: 'unchanged', concerts: [], validators, fingerprint };
+        }
+
+        const concerts: Concert[] = events
+            .map(event => {
+                const attributes = event.attributes;
+                return {
+                    id: event.id,
+                    date: attributes['starts-at-date-local'],
+                    venue: attributes['venue-name'],
+                    location: attributes['formatted-address'],
+                    details: attributes.details || undefined,
+                    source: tourId,
+                };
+            })
+            .filter(concert => {
+                // Without a usable date or venue a show can be neither keyed nor announced.
+                if (!concert.venue || Number.isNaN(Date.parse(concert.date))) {
+                    log.warn(`Dropping event ${concert.id} of tour ${tourId} with venue ${JSON.stringify(concert.venue)} and date ${JSON.stringify(concert.date)}.`);
+                    return false;
+                }
+                return true;
+            });
+        endParse();
+        
+        log.debug(() => `Found ${concerts.length} concerts for tour ${tourId}.`);
+        return { tourId, status: 'changed', concerts, validators, fingerprint };
+    }
+
+    // Combines the per-tour fingerprints, with `overrides` taking precedence over the stored state.
+    private combinedFingerprint(overrides = new Map<string, SourceState>()): string {
+        const parts = this.tourIds.map(tourId => {
+            const state = overrides.get(tourId) ?? this.sources.get(tourId);
+            return `${tourId}:${state?.fingerprint ?? ''}`;
+        });
+        return createHash('sha256').update(parts.join('\n')).digest('hex');
+    }
+
+    // Hashes the tour events in a key-order and array-order independent way,
+    // so cosmetic reshuffles from the CDN do not count as changes.
+    private static fingerprint(events: SeatedTourEvent[]): string {
+        const normalized = events
+            .map(event => [event.id, Scraper.stableStringify(event.attributes)])
+            .sort((a, b) => (a[0] < b[0] ? -1 : a[0] > b[0] ? 1 : 0));
+        return createHash('sha256').update(JSON.stringify(normalized)).digest('hex');
+    }
+
+    private static stableStringify(value: unknown): string {
+        if (Array.isArray(value)) {
+            return `[${value.map(item => Scraper.stableStringify(item)).join(',')}]`;
+        }
+        if (value && typeof value === 'object') {
+            const entries = Object.keys(value as Record<string, unknown>)
+                .sort()
+                .map(key => `${JSON.stringify(key)}:${Scraper.stableStringify((value as Record<string, unknown>)[key])}`);
+            return `{${entries.join(',')}}`;
         }
+        return JSON.stringify(value === undefined ? null : value);
     }
 
     public async close(): Promise<void> {
         // No browser to close
-        console.log('Scraper closed (API mode).');
+        log.info('Scraper closed (API mode).');
     }
 } 
\ No newline at end of file
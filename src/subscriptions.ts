@@ -0,0 +1,46 @@
+// @ts-nocheck
+import { Concert } from './scraper';
+import { SubscriptionFilters } from './database';
+
+// Limits on the locations of one subscription.
+const MAX_LOCATIONS = 20;
+const MAX_LOCATION_CHARS = 100;
+
+function escapeRegExp(text: string): string {
+    return text.replace(/[.*+?^${}()|[\]\\]/g, '\\$&');
+}
+
+/**
+ * Parses the `locations` option of /subscribe, e.g. "CO, Salt Lake City; Canada".
+ * Empty input means no filter.
+ */
+export function parseFilters(locations: string | null | undefined): SubscriptionFilters {
+    const seen = new Set<string>();
+    const terms: string[] = [];
+    for (const raw of (locations ?? '').split(/[,;]/)) {
+        const term = raw.trim().replace(/\s+/g, ' ').slice(0, MAX_LOCATION_CHARS);
+        if (term && !seen.has(term.toLowerCase())) {
+            seen.add(term.toLowerCase());
+            terms.push(term);
+        }
+    }
+    return terms.length > 0 ? { locations: terms.slice(0, MAX_LOCATIONS) } : {};
+}
+
+export function describeFilters(filters: SubscriptionFilters): string {
+    return filters.locations?.length ? `shows in ${filters.locations.join(', ')}` : 'all shows';
+}
+
+/**
+ * A predicate for the concerts a subscription gets. A location matches when it
+ * appears in the concert's address as whole words, case-insensitively, so "CO"
+ * matches "Denver, CO 80204, USA" but not "Concord, CA".
+ */
+export function subscriptionMatcher(filters: SubscriptionFilters): (concert: Concert) => boolean {
+    const locations = filters.locations ?? [];
+    if (locations.length === 0) {
+        return () => true;
+    }
+    const patterns = locations.map(location => new RegExp(`(^|[^\\p{L}\\p{N}])${escapeRegExp(location)}($|[^\\p{L}\\p{N}])`, 'iu'));
+    return concert => patterns.some(pattern => pattern.test(concert.location));
+} 
\ No newline at end of file
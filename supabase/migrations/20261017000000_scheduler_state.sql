@@ -0,0 +1,10 @@
+-- Persisted state of the adaptive tour poller, so restarts resume the cadence
+-- and an overdue check runs as soon as the bot is back.
+create table if not exists scheduler_state (
+    name text primary key,
+    last_success_at timestamptz,
+    next_due_at timestamptz,
+    interval_ms integer not null,
+    last_change_at timestamptz,
+    updated_at timestamptz not null default now()
+);
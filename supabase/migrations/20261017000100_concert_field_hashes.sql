@@ -0,0 +1,10 @@
+-- Columns for the three-way tour diff: the Seated tour each concert came from,
+-- a hash per tracked field so changes are found without comparing full records,
+-- and when a concert disappeared from its tour.
+alter table concerts
+    add column if not exists source text,
+    add column if not exists field_hashes jsonb,
+    add column if not exists cancelled_at timestamptz;
+
+-- Removal candidates are the active concerts of the tours that were fetched.
+create index if not exists concerts_active_source_idx on concerts (source) where cancelled_at is null;
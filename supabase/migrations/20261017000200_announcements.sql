@@ -0,0 +1,15 @@
+-- Where each concert was announced, so later changes and cancellations edit the
+-- post in place instead of sending a new message.
+create table if not exists announcements (
+    concert_id text not null,
+    channel_id text not null,
+    message_id text not null,
+    embed_index integer, -- Position of the concert's embed in the message, null for a plain-text post
+    updated_at timestamptz, -- When the post was last edited for a change to this concert
+    posted_at timestamptz not null default now(),
+    primary key (concert_id, message_id)
+);
+
+-- The primary key serves lookups by concert id. Edits re-render whole messages,
+-- which are looked up by message id.
+create index if not exists announcements_message_id_idx on announcements (message_id);
@@ -0,0 +1,36 @@
+-- Transactional outbox for announcements: a concert that is saved as new gets a
+-- pending row in the same transaction, and the bot's dispatcher posts pending
+-- rows until Discord confirms delivery. A crash between saving and posting can
+-- then only delay an announcement, never lose it.
+create table if not exists announcement_outbox (
+    concert_id text primary key,
+    created_at timestamptz not null default now(),
+    attempts integer not null default 0, -- Times the announcement was handed to the send queue
+    posted_at timestamptz -- Set once Discord confirmed the post
+);
+
+-- The dispatcher reads the backlog oldest first.
+create index if not exists announcement_outbox_pending_idx on announcement_outbox (created_at) where posted_at is null;
+
+-- Upserts concerts and adds outbox rows for the ones to announce, atomically.
+-- Called through PostgREST as rpc('save_concerts_with_outbox').
+create or replace function save_concerts_with_outbox(concerts jsonb, announce_ids text[])
+returns void
+language sql
+as $$
+    insert into concerts (id, venue, location, date, details, source, field_hashes, cancelled_at)
+    select id, venue, location, date, details, source, field_hashes, cancelled_at
+    from jsonb_populate_recordset(null::concerts, concerts)
+    on conflict (id) do update set
+        venue = excluded.venue,
+        location = excluded.location,
+        date = excluded.date,
+        details = excluded.details,
+        source = excluded.source,
+        field_hashes = excluded.field_hashes,
+        cancelled_at = excluded.cancelled_at;
+
+    insert into announcement_outbox (concert_id)
+    select unnest(announce_ids)
+    on conflict (concert_id) do nothing;
+$$;
@@ -0,0 +1,7 @@
+-- Small named values the bot keeps across restarts, e.g. the hash of the slash
+-- commands it last registered.
+create table if not exists bot_state (
+    key text primary key,
+    value text not null,
+    updated_at timestamptz not null default now()
+);
@@ -0,0 +1,12 @@
+-- Channels that get tour date announcements, managed with the /subscribe and
+-- /unsubscribe commands in each server.
+create table if not exists subscriptions (
+    channel_id text primary key,
+    guild_id text not null,
+    filters jsonb not null default '{}'::jsonb, -- e.g. {"locations": ["CO", "Utah"]}; empty matches every show
+    created_by text, -- Discord user id of whoever subscribed the channel
+    created_at timestamptz not null default now(),
+    updated_at timestamptz not null default now()
+);
+
+create index if not exists subscriptions_guild_id_idx on subscriptions (guild_id);
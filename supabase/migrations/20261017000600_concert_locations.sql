@@ -0,0 +1,37 @@
+-- Each concert's location parsed against the bot's gazetteer: normalized city,
+-- state or province and country, plus the city's coordinates. Null where the
+-- address could not be placed.
+alter table concerts
+    add column if not exists city text,
+    add column if not exists region text,
+    add column if not exists country text,
+    add column if not exists latitude double precision,
+    add column if not exists longitude double precision;
+
+create or replace function save_concerts_with_outbox(concerts jsonb, announce_ids text[])
+returns void
+language sql
+as $$
+    insert into concerts (id, venue, location, date, details, source, field_hashes, cancelled_at,
+                          city, region, country, latitude, longitude)
+    select id, venue, location, date, details, source, field_hashes, cancelled_at,
+           city, region, country, latitude, longitude
+    from jsonb_populate_recordset(null::concerts, concerts)
+    on conflict (id) do update set
+        venue = excluded.venue,
+        location = excluded.location,
+        date = excluded.date,
+        details = excluded.details,
+        source = excluded.source,
+        field_hashes = excluded.field_hashes,
+        cancelled_at = excluded.cancelled_at,
+        city = excluded.city,
+        region = excluded.region,
+        country = excluded.country,
+        latitude = excluded.latitude,
+        longitude = excluded.longitude;
+
+    insert into announcement_outbox (concert_id)
+    select unnest(announce_ids)
+    on conflict (concert_id) do nothing;
+$$;
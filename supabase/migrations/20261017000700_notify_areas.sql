@@ -0,0 +1,16 @@
+-- Areas fans get a DM for when a show is announced there, managed with /notify.
+-- A region area names a state, province or whole country; a radius area is a
+-- circle around a place. The bot indexes them in memory by region and geohash cell.
+create table if not exists notify_areas (
+    user_id text not null,
+    area text not null, -- Normalized key, e.g. 'region:US:CO', 'region:CA:' or 'near:39.74,-104.99:161'
+    label text not null, -- The place as shown back to the user, e.g. 'Denver, CO'
+    dm_channel_id text not null,
+    country text,
+    region text,
+    latitude double precision,
+    longitude double precision,
+    radius_km double precision,
+    created_at timestamptz not null default now(),
+    primary key (user_id, area)
+);
@@ -0,0 +1,9 @@
+-- Fan DMs for a show are queued once, by their own dispatcher step, so a channel
+-- that cannot be posted in does not hold them up and retried posts do not DM
+-- anyone twice. Shows announced before this column existed count as done.
+alter table announcement_outbox
+    add column if not exists fans_notified_at timestamptz; -- Set once the show's DMs were queued
+
+update announcement_outbox set fans_notified_at = now() where fans_notified_at is null;
+
+create index if not exists announcement_outbox_unnotified_idx on announcement_outbox (created_at) where fans_notified_at is null;
@@ -0,0 +1,67 @@
+import { test } from 'node:test';
+import assert from 'node:assert/strict';
+import { ChannelResolver, ChannelUnavailableError } from '../src/channelResolver';
+
+// A client with one guild text channel whose permissions the test can change.
+function fakeClient(): { client: any; state: { canSend: boolean; fetches: number; memberFetches: number } } {
+    const state = { canSend: true, fetches: 0, memberFetches: 0 };
+    const me = { id: 'bot' };
+    const channel = {
+        id: 'C',
+        guildId: 'G',
+        guild: {
+            members: {
+                me,
+                async fetchMe() {
+                    state.memberFetches++;
+                    return me;
+                },
+            },
+        },
+        isTextBased: () => true,
+        permissionsFor: () => ({ has: () => state.canSend }),
+    };
+    const client = {
+        user: { id: 'bot' },
+        on() {
+            return client;
+        },
+        channels: {
+            async fetch() {
+                state.fetches++;
+                return channel;
+            },
+        },
+    };
+    return { client, state };
+}
+
+test('a resolved channel is cached until it expires', async t => {
+    t.mock.timers.enable({ apis: ['Date'], now: 1_000_000 });
+    const { client, state } = fakeClient();
+    const resolver = new ChannelResolver(client);
+
+    await resolver.resolveSendable('C');
+    await resolver.resolveSendable('C');
+    assert.equal(state.fetches, 1);
+
+    // The bot lost its role; no gateway event says so.
+    state.canSend = false;
+    t.mock.timers.tick(10 * 60 * 1000);
+
+    await assert.rejects(resolver.resolveSendable('C'), ChannelUnavailableError);
+    assert.equal(state.fetches, 2);
+    assert.equal(state.memberFetches, 2);
+});
+
+test('an invalidated channel is looked up again', async () => {
+    const { client, state } = fakeClient();
+    const resolver = new ChannelResolver(client);
+
+    await resolver.resolveSendable('C');
+    state.canSend = false;
+    resolver.invalidate('C');
+
+    await assert.rejects(resolver.resolveSendable('C'), ChannelUnavailableError);
+    assert.deepEqual(resolver.getStats(), { size: 1, hits: 0, misses: 2, invalidations: 1 });
+});
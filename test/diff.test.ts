@@ -0,0 +1,59 @@
+import { test } from 'node:test';
+import assert from 'node:assert/strict';
+import { ExistingConcertKeys, StoredConcert, concertKey, hashFields } from '../src/database';
+import { diffConcerts } from '../src/diff';
+import { Concert } from '../src/scraper';
+
+function stored(concert: Concert): StoredConcert {
+    return { ...concert, fieldHashes: hashFields(concert), cancelledAt: null };
+}
+
+function existingFor(rows: StoredConcert[], scraped: Concert[]): ExistingConcertKeys {
+    const byId = new Map(rows.map(row => [row.id, row]));
+    return {
+        ids: new Set(rows.map(row => row.id)),
+        keys: new Set(rows.map(concertKey)),
+        stored: new Map(scraped.filter(concert => byId.has(concert.id)).map(concert => [concert.id, byId.get(concert.id)!])),
+    };
+}
+
+const show: Concert = { id: 'old-id', venue: 'Red Rocks', location: 'Morrison, CO, USA', date: '2026-07-01', source: 'tour' };
+
+test('a show re-issued under a new id at the same venue and date is neither added nor removed', () => {
+    const rows = [stored(show)];
+    const scraped = [{ ...show, id: 'new-id' }];
+
+    const diff = diffConcerts(scraped, existingFor(rows, scraped), rows);
+
+    assert.deepEqual(diff.added, []);
+    assert.deepEqual(diff.removed, []);
+    assert.equal(diff.unchanged, 1);
+});
+
+test('a show missing from its tour is removed', () => {
+    const other = { ...show, id: 'other', venue: 'Ogden Theatre', date: '2026-07-02' };
+    const rows = [stored(show), stored(other)];
+    const scraped = [show];
+
+    const diff = diffConcerts(scraped, existingFor(rows, scraped), rows);
+
+    assert.deepEqual(diff.removed.map(concert => concert.id), ['other']);
+});
+
+test('a changed field is reported with its old and new value', () => {
+    const rows = [stored(show)];
+    const scraped = [{ ...show, details: 'Goose & Friends' }];
+
+    const diff = diffConcerts(scraped, existingFor(rows, scraped), rows);
+
+    assert.equal(diff.changed.length, 1);
+    assert.deepEqual(diff.changed[0].changes, [{ field: 'details', before: null, after: 'Goose & Friends' }]);
+});
+
+test('a stored row with an unparseable date does not break the diff', () => {
+    const broken = stored({ ...show, id: 'broken', date: 'TBA' });
+
+    assert.equal(concertKey(broken), 'Red Rocks|TBA');
+    const diff = diffConcerts([show], existingFor([broken], [show]), [broken]);
+    assert.deepEqual(diff.added.map(concert => concert.id), ['old-id']);
+});
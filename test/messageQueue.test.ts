@@ -0,0 +1,186 @@
+import { test, TestContext } from 'node:test';
+import assert from 'node:assert/strict';
+import { promises as fs } from 'fs';
+import os from 'os';
+import path from 'path';
+import { DiscordAPIError } from 'discord.js';
+import { MessageQueue, OutboundRequest } from '../src/messageQueue';
+
+interface FakeChannels {
+    sent: string[]; // 'channel:content' of every successful send, in order
+    attempts: Map<string, number>; // Sends tried per content
+    invalidated: string[];
+    failures: Map<string, Error[]>; // Errors to throw, in turn, for sends of a content
+    resolveSendable(channelId: string): Promise<{ send(payload: { content: string }): Promise<{ id: string }> }>;
+    invalidate(channelId: string): void;
+}
+
+function fakeChannels(): FakeChannels {
+    const channels: FakeChannels = {
+        sent: [],
+        attempts: new Map(),
+        invalidated: [],
+        failures: new Map(),
+        async resolveSendable(channelId) {
+            return {
+                async send(payload) {
+                    channels.attempts.set(payload.content, (channels.attempts.get(payload.content) ?? 0) + 1);
+                    const error = channels.failures.get(payload.content)?.shift();
+                    if (error) {
+                        throw error;
+                    }
+                    channels.sent.push(`${channelId}:${payload.content}`);
+                    return { id: `m${channels.sent.length}` };
+                },
+            };
+        },
+        invalidate(channelId) {
+            channels.invalidated.push(channelId);
+        },
+    };
+    return channels;
+}
+
+function apiError(code: number): DiscordAPIError {
+    return Object.assign(Object.create(DiscordAPIError.prototype), { code, message: `Discord error ${code}` });
+}
+
+function message(content: string, dedupKey?: string): OutboundRequest {
+    return { payload: { content }, dedupKey };
+}
+
+async function queueFile(t: TestContext): Promise<string> {
+    const dir = await fs.mkdtemp(path.join(os.tmpdir(), 'queue-test-'));
+    t.after(() => fs.rm(dir, { recursive: true, force: true }));
+    return path.join(dir, 'queue.json');
+}
+
+function createQueue(file: string, channels: FakeChannels): MessageQueue {
+    process.env.MESSAGE_QUEUE_FILE = file;
+    return new MessageQueue({ rest: { on() {} } } as any, channels as any);
+}
+
+// Lets the sends started by the last timer tick run to completion.
+async function settle(): Promise<void> {
+    for (let i = 0; i < 20; i++) {
+        await new Promise(resolve => setImmediate(resolve));
+    }
+}
+
+test('a failed send holds back its channel only', async t => {
+    t.mock.timers.enable({ apis: ['setTimeout', 'Date'], now: 1_000_000 });
+    const channels = fakeChannels();
+    channels.failures.set('a1', [new Error('socket hang up')]);
+    const queue = createQueue(await queueFile(t), channels);
+    queue.start();
+
+    await queue.enqueueAll([
+        { channelId: 'A', requests: [message('a1'), message('a2')] },
+        { channelId: 'B', requests: [message('b1'), message('b2')] },
+    ]);
+    await settle();
+    assert.deepEqual(channels.sent, ['B:b1', 'B:b2']);
+
+    t.mock.timers.tick(1000); // First backoff
+    await settle();
+    assert.deepEqual(channels.sent, ['B:b1', 'B:b2', 'A:a1', 'A:a2']);
+    assert.equal(queue.getStats().retried, 1);
+    await queue.stop();
+});
+
+test('a message is dropped after its last attempt', async t => {
+    t.mock.timers.enable({ apis: ['setTimeout', 'Date'], now: 1_000_000 });
+    const channels = fakeChannels();
+    channels.failures.set('doomed', Array.from({ length: 20 }, () => new Error('socket hang up')));
+    const queue = createQueue(await queueFile(t), channels);
+    queue.start();
+
+    await queue.enqueue('A', [message('doomed'), message('next')]);
+    for (let i = 0; i < 20; i++) {
+        await settle();
+        t.mock.timers.tick(5 * 60 * 1000);
+    }
+    await settle();
+
+    assert.equal(channels.attempts.get('doomed'), 8);
+    assert.deepEqual(channels.sent, ['A:next']);
+    assert.equal(queue.getStats().dropped, 1);
+    await queue.stop();
+});
+
+test('a permanent error drops the message at once and forgets the channel', async t => {
+    t.mock.timers.enable({ apis: ['setTimeout', 'Date'], now: 1_000_000 });
+    const channels = fakeChannels();
+    channels.failures.set('forbidden', [apiError(50013)]);
+    const queue = createQueue(await queueFile(t), channels);
+    queue.start();
+
+    await queue.enqueue('A', [message('forbidden'), message('next')]);
+    await settle();
+
+    assert.equal(channels.attempts.get('forbidden'), 1);
+    assert.deepEqual(channels.sent, ['A:next']);
+    assert.deepEqual(channels.invalidated, ['A']);
+    assert.equal(queue.getStats().dropped, 1);
+    await queue.stop();
+});
+
+test('pending messages survive a restart', async t => {
+    const file = await queueFile(t);
+    const before = createQueue(file, fakeChannels());
+    await before.enqueue('A', [message('a1'), message('a2')]);
+    await before.stop();
+
+    const channels = fakeChannels();
+    const after = createQueue(file, channels);
+    await after.load();
+    assert.equal(after.getStats().pending, 2);
+    after.start();
+    await settle();
+    await after.stop();
+
+    assert.deepEqual(channels.sent, ['A:a1', 'A:a2']);
+    assert.deepEqual(JSON.parse(await fs.readFile(file, 'utf8')), []);
+});
+
+test('a message with a recently sent dedup key is dropped', async t => {
+    const channels = fakeChannels();
+    const queue = createQueue(await queueFile(t), channels);
+    queue.start();
+
+    await queue.enqueue('A', [message('show', 'key-1'), message('show again', 'key-1')]);
+    await settle();
+    await queue.enqueue('A', [message('show once more', 'key-1'), message('other', 'key-2')]);
+    await settle();
+    await queue.stop();
+
+    assert.deepEqual(channels.sent, ['A:show', 'A:other']);
+    assert.equal(queue.getStats().deduplicated, 2);
+});
+
+test('enqueue rejects when the queue cannot be written', async t => {
+    const dir = await fs.mkdtemp(path.join(os.tmpdir(), 'queue-test-'));
+    t.after(() => fs.rm(dir, { recursive: true, force: true }));
+    const blocker = path.join(dir, 'not-a-directory');
+    await fs.writeFile(blocker, '');
+    const queue = createQueue(path.join(blocker, 'queue.json'), fakeChannels());
+
+    await assert.rejects(queue.enqueue('A', [message('a1')]));
+    await queue.stop();
+});
+
+test('a burst of sends is saved in one write', async t => {
+    const file = await queueFile(t);
+    const channels = fakeChannels();
+    const queue = createQueue(file, channels);
+    queue.start();
+    const writes = t.mock.method(fs, 'writeFile');
+
+    await queue.enqueueAll(Array.from({ length: 30 }, (_, i) => ({ channelId: `C${i}`, requests: [message(`m${i}`)] })));
+    await settle();
+    assert.equal(channels.sent.length, 30);
+    await queue.stop();
+
+    assert.equal(writes.mock.callCount(), 2); // The enqueue, then every send at once
+    assert.deepEqual(JSON.parse(await fs.readFile(file, 'utf8')), []);
+});
@@ -0,0 +1,41 @@
+import { test } from 'node:test';
+import assert from 'node:assert/strict';
+import { Gazetteer } from '../src/gazetteer';
+import { NotificationIndex, radiusArea, regionArea } from '../src/notifications';
+
+const gazetteer = new Gazetteer();
+
+function indexOf(...areas: ReturnType<typeof regionArea>[]): NotificationIndex {
+    const index = new NotificationIndex();
+    areas.forEach((area, i) => index.add({ ...area!, dmChannelId: `dm-${i}` }));
+    return index;
+}
+
+test('a show in a listed city matches radius areas around it', () => {
+    const index = indexOf(radiusArea(gazetteer, 'near', 'Colorado Springs, CO', 50));
+    const location = gazetteer.parseLocation('Ford Amphitheater, Colorado Springs, CO 80921, USA');
+
+    assert.equal(location.precision, 'city');
+    assert.deepEqual([...index.match(location).keys()], ['near']);
+});
+
+test('a show in a city not in the table matches region areas only', () => {
+    // Colorado's center is within 50 miles of Colorado Springs; Craig is about 200 miles away.
+    const index = indexOf(
+        radiusArea(gazetteer, 'near', 'Colorado Springs, CO', 50),
+        regionArea(gazetteer, 'state', 'Colorado'),
+    );
+    const location = gazetteer.parseLocation('Moffat County Fairgrounds, Craig, CO 81625, USA');
+
+    assert.equal(location.precision, 'region');
+    assert.equal(location.region, 'CO');
+    assert.deepEqual([...index.match(location).keys()], ['state']);
+});
+
+test('a show with an unknown location matches nothing', () => {
+    const index = indexOf(radiusArea(gazetteer, 'near', 'Denver, CO', 500), regionArea(gazetteer, 'state', 'CO'));
+    const location = gazetteer.parseLocation('Somewhere');
+
+    assert.equal(location.precision, null);
+    assert.equal(index.match(location).size, 0);
+});
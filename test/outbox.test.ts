@@ -0,0 +1,102 @@
+import { test } from 'node:test';
+import assert from 'node:assert/strict';
+import { DatabaseService } from '../src/database';
+import { OutboxDispatcher, PostResult } from '../src/outbox';
+import { Concert } from '../src/scraper';
+import { MemoryTables, createMemoryClient } from '../bench/standins/memorySupabase';
+import { concertRows } from '../bench/fixtures';
+
+async function setup(count: number): Promise<{ tables: MemoryTables; database: DatabaseService; concerts: Concert[] }> {
+    const tables = new MemoryTables();
+    const database = new DatabaseService(createMemoryClient(tables));
+    const concerts = concertRows(count);
+    await database.saveConcerts(concerts, new Set(concerts.map(concert => concert.id)));
+    return { tables, database, concerts };
+}
+
+const noDMs = async (): Promise<void> => undefined;
+
+function attempts(tables: MemoryTables): Record<string, number> {
+    return Object.fromEntries([...tables.table('announcement_outbox').values()].map(row => [row.concert_id, row.attempts]));
+}
+
+test('an entry stays pending until the post reports it complete', async () => {
+    const { tables, database, concerts } = await setup(2);
+    const [a, b] = concerts.map(concert => concert.id);
+    const results: PostResult[] = [
+        { queued: [a, b], complete: [] }, // Both handed to the queue
+        { queued: [a], complete: [b] }, // One channel dropped a's copy, b is everywhere
+        { queued: [], complete: [] }, // a's copy is still waiting in the queue
+        { queued: [], complete: [a] },
+    ];
+    const dispatcher = new OutboxDispatcher(database, async () => results.shift()!, noDMs);
+
+    assert.equal(dispatcher.getBacklog(), null);
+    assert.equal(await dispatcher.dispatch(), 2);
+    assert.equal(dispatcher.getBacklog(), 2);
+    assert.equal(await dispatcher.dispatch(), 1);
+    assert.equal(dispatcher.getBacklog(), 1);
+    assert.equal(await dispatcher.dispatch(), 0);
+    assert.deepEqual(attempts(tables), { [a]: 2, [b]: 1 });
+    await dispatcher.dispatch();
+    assert.equal(dispatcher.getBacklog(), 0);
+});
+
+test('a failing post counts an attempt for every entry', async () => {
+    const { tables, database, concerts } = await setup(2);
+    const dispatcher = new OutboxDispatcher(database, async () => {
+        throw new Error('Discord is down');
+    }, noDMs);
+
+    await assert.rejects(dispatcher.dispatch(), /Discord is down/);
+    assert.deepEqual(Object.values(attempts(tables)), [1, 1]);
+    assert.equal(await database.countPendingOutbox(), concerts.length);
+});
+
+test('an entry whose concert is gone is closed', async () => {
+    const { tables, database, concerts } = await setup(2);
+    tables.table('concerts').delete(concerts[0].id);
+    const posted: string[][] = [];
+    const dispatcher = new OutboxDispatcher(database, async shows => {
+        posted.push(shows.map(show => show.id));
+        return { queued: shows.map(show => show.id), complete: [] };
+    }, noDMs);
+
+    await dispatcher.dispatch();
+
+    assert.deepEqual(posted, [[concerts[1].id]]);
+    assert.equal(await database.countPendingOutbox(), 1);
+});
+
+test('fan DMs are queued once per show, even while the channel posts fail', async () => {
+    const { database, concerts } = await setup(2);
+    const notified: string[] = [];
+    const dispatcher = new OutboxDispatcher(database, async () => {
+        throw new Error('No channel can be posted in');
+    }, async shows => {
+        notified.push(...shows.map(show => show.id));
+    });
+
+    await assert.rejects(dispatcher.dispatch());
+    await assert.rejects(dispatcher.dispatch());
+
+    assert.deepEqual(notified.sort(), concerts.map(concert => concert.id).sort());
+    assert.equal(dispatcher.getStats().notified, 2);
+});
+
+test('fan DMs that fail to queue are tried again', async () => {
+    const { database } = await setup(1);
+    let calls = 0;
+    const dispatcher = new OutboxDispatcher(database, async shows => ({ queued: [], complete: shows.map(show => show.id) }), async () => {
+        calls++;
+        if (calls === 1) {
+            throw new Error('Disk full');
+        }
+    });
+
+    await dispatcher.dispatch();
+    await dispatcher.dispatch();
+    await dispatcher.dispatch();
+
+    assert.equal(calls, 2);
+});
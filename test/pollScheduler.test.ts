@@ -0,0 +1,185 @@
+import { test, TestContext } from 'node:test';
+import assert from 'node:assert/strict';
+import { SchedulerState } from '../src/database';
+import { AdaptivePollScheduler, PollSchedulerOptions, parseAnnouncementWindows, pollOptionsFromEnv } from '../src/pollScheduler';
+
+const MINUTE = 60 * 1000;
+const TUESDAY_NOON = Date.UTC(2026, 9, 13, 12, 0);
+
+function options(overrides: Partial<PollSchedulerOptions> = {}): PollSchedulerOptions {
+    return { minIntervalMs: 15 * MINUTE, maxIntervalMs: 60 * MINUTE, backoffFactor: 2, jitter: 0, windows: [], ...overrides };
+}
+
+// Lets a run started by the last timer tick finish and reschedule.
+async function settle(): Promise<void> {
+    for (let i = 0; i < 10; i++) {
+        await new Promise(resolve => setImmediate(resolve));
+    }
+}
+
+function minutesUntilNextRun(scheduler: AdaptivePollScheduler): number {
+    return (scheduler.getState().nextRunAt!.getTime() - Date.now()) / MINUTE;
+}
+
+function useClock(t: TestContext, now = TUESDAY_NOON): void {
+    t.mock.timers.enable({ apis: ['setTimeout', 'Date'], now });
+}
+
+test('the interval doubles after every quiet run, up to the maximum', async t => {
+    useClock(t);
+    let runs = 0;
+    const scheduler = new AdaptivePollScheduler(async () => {
+        runs++;
+    }, options());
+
+    await scheduler.start(); // Nothing saved, so the first check runs at once
+    t.mock.timers.tick(0);
+    await settle();
+    assert.equal(minutesUntilNextRun(scheduler), 30);
+
+    t.mock.timers.tick(30 * MINUTE);
+    await settle();
+    assert.equal(minutesUntilNextRun(scheduler), 60);
+
+    t.mock.timers.tick(60 * MINUTE);
+    await settle();
+    assert.equal(minutesUntilNextRun(scheduler), 60);
+    assert.equal(runs, 3);
+    scheduler.stop();
+});
+
+test('a change resets the interval and pulls the next run forward', async t => {
+    useClock(t);
+    const scheduler = new AdaptivePollScheduler(async () => undefined, options());
+    await scheduler.start();
+    for (const minutes of [0, 30, 60]) {
+        t.mock.timers.tick(minutes * MINUTE);
+        await settle();
+    }
+    assert.equal(minutesUntilNextRun(scheduler), 60);
+
+    scheduler.notifyChange();
+
+    assert.equal(scheduler.getState().intervalMs, 15 * MINUTE);
+    assert.equal(minutesUntilNextRun(scheduler), 15);
+    scheduler.stop();
+});
+
+test('a failed run keeps the interval', async t => {
+    useClock(t);
+    const scheduler = new AdaptivePollScheduler(async () => {
+        throw new Error('Seated is down');
+    }, options());
+
+    await scheduler.start();
+    t.mock.timers.tick(0);
+    await settle();
+
+    assert.equal(minutesUntilNextRun(scheduler), 15);
+    assert.equal(scheduler.getState().lastSuccessAt, null);
+    scheduler.stop();
+});
+
+test('the next run never sleeps through the start of an announcement window', async t => {
+    useClock(t, TUESDAY_NOON - 45 * MINUTE);
+    const scheduler = new AdaptivePollScheduler(async () => undefined, options({
+        maxIntervalMs: 240 * MINUTE,
+        windows: parseAnnouncementWindows('tue@12:00-13:00'),
+    }));
+    await scheduler.start();
+    t.mock.timers.tick(0);
+    await settle();
+
+    assert.equal(minutesUntilNextRun(scheduler), 30); // Not yet clamped: the window starts in 45 minutes
+    t.mock.timers.tick(30 * MINUTE);
+    await settle();
+    assert.equal(minutesUntilNextRun(scheduler), 15); // 60 minutes, clamped to the window start
+
+    t.mock.timers.tick(15 * MINUTE);
+    await settle();
+    assert.equal(minutesUntilNextRun(scheduler), 15); // In the window: the minimum interval
+    scheduler.stop();
+});
+
+test('a window past midnight covers the early hours of the next day', async t => {
+    useClock(t, Date.UTC(2026, 9, 18, 1, 0)); // Sunday 01:00
+    const scheduler = new AdaptivePollScheduler(async () => undefined, options({
+        maxIntervalMs: 240 * MINUTE,
+        windows: parseAnnouncementWindows('sat@22:00-02:00'),
+    }));
+    await scheduler.start();
+    for (const minutes of [0, 30]) {
+        t.mock.timers.tick(minutes * MINUTE);
+        await settle();
+    }
+
+    assert.equal(scheduler.getState().intervalMs, 60 * MINUTE);
+    assert.equal(minutesUntilNextRun(scheduler), 15);
+    scheduler.stop();
+});
+
+test('a restart picks up the saved cadence and due time', async t => {
+    useClock(t);
+    const saved: SchedulerState = {
+        lastSuccessAt: new Date(TUESDAY_NOON - 20 * MINUTE),
+        nextDueAt: new Date(TUESDAY_NOON + 40 * MINUTE),
+        intervalMs: 60 * MINUTE,
+        lastChangeAt: null,
+    };
+    const writes: SchedulerState[] = [];
+    const scheduler = new AdaptivePollScheduler(async () => undefined, options(), {
+        load: async () => saved,
+        save: async state => {
+            writes.push(state);
+        },
+    });
+
+    await scheduler.start();
+
+    assert.equal(scheduler.getState().intervalMs, 60 * MINUTE);
+    assert.equal(minutesUntilNextRun(scheduler), 40);
+    t.mock.timers.tick(40 * MINUTE);
+    await settle();
+    assert.equal(writes.length, 1);
+    assert.equal(writes[0].nextDueAt!.getTime(), Date.now() + 60 * MINUTE);
+    scheduler.stop();
+});
+
+test('a restart after the due time catches up at once', async t => {
+    useClock(t);
+    let runs = 0;
+    const scheduler = new AdaptivePollScheduler(async () => {
+        runs++;
+    }, options(), {
+        load: async () => ({ lastSuccessAt: null, nextDueAt: new Date(TUESDAY_NOON - 3 * 60 * MINUTE), intervalMs: 10 * 60 * MINUTE, lastChangeAt: null }),
+        save: async () => undefined,
+    });
+
+    await scheduler.start();
+    assert.equal(minutesUntilNextRun(scheduler), 0);
+    assert.equal(scheduler.getState().intervalMs, 60 * MINUTE); // Clamped to the maximum
+    t.mock.timers.tick(0);
+    await settle();
+    assert.equal(runs, 1);
+    scheduler.stop();
+});
+
+test('invalid poll settings fall back to the defaults', t => {
+    const names = ['POLL_MIN_INTERVAL_MINUTES', 'POLL_MAX_INTERVAL_MINUTES', 'POLL_BACKOFF_FACTOR', 'POLL_JITTER'];
+    const saved = names.map(name => process.env[name]);
+    t.after(() => names.forEach((name, i) => {
+        if (saved[i] === undefined) {
+            delete process.env[name];
+        } else {
+            process.env[name] = saved[i];
+        }
+    }));
+    Object.assign(process.env, { POLL_MIN_INTERVAL_MINUTES: '-5', POLL_MAX_INTERVAL_MINUTES: 'soon', POLL_BACKOFF_FACTOR: '0.5', POLL_JITTER: 'lots' });
+
+    const parsed = pollOptionsFromEnv();
+
+    assert.equal(parsed.minIntervalMs, 15 * MINUTE);
+    assert.equal(parsed.maxIntervalMs, 240 * MINUTE);
+    assert.equal(parsed.backoffFactor, 2);
+    assert.equal(parsed.jitter, 0.1);
+});